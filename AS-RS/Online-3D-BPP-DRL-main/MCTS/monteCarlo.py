@@ -35,8 +35,19 @@ class MCTree(object):
         cur_node = self.root
         cur_depth = 0
         obs = self.observation
-        sim2_env = copy.deepcopy(self.sim_env)
+        # simulate on the environment itself and restore it afterwards instead of copying it
+        sim2_env = self.sim_env
+        root_state = sim2_env.get_state()
+        try:
+            cur_node, cur_depth, value = self._descend(cur_node, cur_depth, obs, sim2_env)
+        finally:
+            sim2_env.set_state(root_state)
 
+        if cur_depth > self.reached_depth:
+            self.reached_depth = cur_depth
+        self.backup(cur_node, value)
+
+    def _descend(self, cur_node, cur_depth, obs, sim2_env):
         while True:
             # Terminated: back up
             if cur_node.is_terminated():
@@ -74,26 +85,19 @@ class MCTree(object):
                 break
             cur_node = next_node
             cur_depth += 1
-
-        if cur_depth > self.reached_depth:
-            self.reached_depth = cur_depth
-        self.backup(cur_node, value)
+        return cur_node, cur_depth, value
 
     def backup(self, leaf_node, value, gamma=1):
-        cur_node = leaf_node
-        while True:
-            value = cur_node.reward + gamma * value
-            cur_node.update(value)
-            if cur_node.prev_node is not None:
-                cur_node = cur_node.prev_node
-                continue
-            break
+        store, index = leaf_node.store, leaf_node.index
+        while index >= 0:
+            value = store.reward[index] + gamma * value
+            store.update(index, value)
+            index = store.parent[index]
 
     def play(self, zeta):
-        actions_visits = [(a, nd.n) for (a, nd) in self.root.next_nodes.items()]
-        actions, visits = zip(*actions_visits)
-        values = softmax(1.0 / zeta * np.log(np.array(visits) + 1e-10))
-        actions_values = dict(zip(actions, values))
+        actions, visits = self.root.child_visits()
+        values = softmax(1.0 / zeta * np.log(visits + 1e-10))
+        actions_values = dict(zip(actions.tolist(), values))
         return actions_values
 
     def get_policy(self, sim_times, zeta=1):
@@ -110,9 +114,8 @@ class MCTree(object):
 
     def sample_action(self, policy):
         if self.max_depth == 0:
-            def get_p(key):
-                return self.root.next_nodes[key].p
-            max_action = max(self.root.next_nodes, key=get_p)
+            actions, priors = self.root.child_priors()
+            max_action = int(actions[np.argmax(priors)])
             return max_action
         poss = [pos for _, pos in policy.items()]
         actions = [key for key in policy.keys()]
@@ -123,12 +126,13 @@ class MCTree(object):
         put_action = int(put_action)
         self.known_size_seq.pop(0)
         self.known_size_seq.append(new_box_size)
-        new_node = self.root.next_nodes.get(put_action)
+        new_node = self.root.get_child(put_action)
         assert new_node is not None
+        # keep only the subtree of the action, the rest of the old tree is freed
+        new_node = new_node.detach()
         new_node.p = 1.0
-        new_node.prev_node = None
         print('reused simulation times:', new_node.n)
-        print('children node number:', len(new_node.next_nodes))
+        print('children node number:', new_node.store.num_children[new_node.index])
         self.observation = observation
         self.root = new_node
         self.reached_depth = -1
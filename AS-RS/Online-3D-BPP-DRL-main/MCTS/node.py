@@ -4,35 +4,210 @@ import math, copy, time
 
 INF = 1e9+7
 
+class TreeStore:
+    """
+    Struct-of-arrays storage of a search tree.
+
+    Every node is an index into the arrays below, and the children of a node occupy the contiguous block
+    [first_child, first_child + num_children). Expanding a node with 200 actions allocates one block instead of
+    200 objects, and choosing a child evaluates PUCT for the whole block with NumPy.
+    """
+    FIELDS = {
+        'parent': (np.int64, -1),
+        'action': (np.int64, 0),
+        'first_child': (np.int64, 0),
+        'num_children': (np.int64, 0),
+        'terminated': (np.bool_, False),
+        'value': (np.float64, np.nan),
+        'reward': (np.float64, 0),
+        'q': (np.float64, 0),
+        'w': (np.float64, 0),
+        'n': (np.int64, 0),
+        'p': (np.float64, 0),
+    }
+
+    def __init__(self, capacity=1024):
+        self.size = 0
+        for name, (dtype, default) in self.FIELDS.items():
+            setattr(self, name, np.full(capacity, default, dtype=dtype))
+
+    def allocate(self, count):
+        """Allocate `count` consecutive nodes and return the index of the first one."""
+        start = self.size
+        if start + count > len(self.parent):
+            capacity = max(2 * len(self.parent), start + count)
+            for name, (dtype, default) in self.FIELDS.items():
+                array = np.full(capacity, default, dtype=dtype)
+                array[:start] = getattr(self, name)[:start]
+                setattr(self, name, array)
+        self.size += count
+        return start
+
+    def add_root(self, p):
+        index = self.allocate(1)
+        self.p[index] = p
+        return index
+
+    def add_children(self, index, actions, priors):
+        start = self.allocate(len(actions))
+        block = slice(start, start + len(actions))
+        self.parent[block] = index
+        self.action[block] = actions
+        self.p[block] = priors
+        self.first_child[index] = start
+        self.num_children[index] = len(actions)
+
+    def children(self, index):
+        """The slice of the children of a node."""
+        start = self.first_child[index]
+        return slice(start, start + self.num_children[index])
+
+    def update(self, index, value):
+        self.n[index] += 1
+        self.w[index] += value
+        # normal average
+        self.q[index] = self.w[index] / self.n[index]
+
+    def choose_best(self, index, c=1):
+        """
+        :return: The index of the child with the highest PUCT value. Ties are broken at random.
+        """
+        block = self.children(index)
+        assert block.stop > block.start
+        n = self.n[block]
+        u_value = self.p[block] * np.sqrt(self.n[index]) / (n + 1)
+        cur_value = np.where(n > 0, self.q[block] - self.q[index], 0.0) + c * u_value
+        max_value = cur_value.max()
+        # math.isclose(cur_value, max_value, rel_tol=1e-5)
+        max_nodes = np.flatnonzero(np.abs(cur_value - max_value) <= 1e-5 * np.maximum(np.abs(cur_value), abs(max_value)))
+        idx = np.random.randint(0, len(max_nodes))
+        return block.start + max_nodes[idx]
+
+    def compact(self, index):
+        """
+        Copy the subtree of a node into a new store, e.g. when the node becomes the root and the rest of the
+        tree is dropped.
+
+        :return: A tuple (new store, index of the node in the new store).
+        """
+        store = TreeStore(max(1024, self.size))
+        old_indexes, new_indexes = [index], [store.allocate(1)]
+        i = 0
+        while i < len(old_indexes):
+            old, new = old_indexes[i], new_indexes[i]
+            i += 1
+            count = int(self.num_children[old])
+            if count:
+                start = store.allocate(count)
+                store.first_child[new] = start
+                store.parent[start:start + count] = new
+                old_indexes.extend(range(self.first_child[old], self.first_child[old] + count))
+                new_indexes.extend(range(start, start + count))
+        for name in ('action', 'num_children', 'terminated', 'value', 'reward', 'q', 'w', 'n', 'p'):
+            getattr(store, name)[new_indexes] = getattr(self, name)[old_indexes]
+        return store, new_indexes[0]
+
+
 class Node:
-    def __init__(self, prev, p):
-        self.prev_node = prev
-        self.next_nodes = {}
-        self.terminated = False
-        self.value = None
-        self.reward = 0
+    """
+    A handle to a node of a TreeStore. Handles are created on access, so they are cheap and hold no statistics.
+    `Node(None, p)` creates the root of a new tree.
+    """
+    __slots__ = ('store', 'index')
 
-        self.q = 0
-        self.w = 0
-        self.n = 0
-        self.p = p
+    def __init__(self, prev, p):
+        assert prev is None, "children are created by expand"
+        self.store = TreeStore()
+        self.index = self.store.add_root(p)
+
+    @classmethod
+    def _view(cls, store, index):
+        node = cls.__new__(cls)
+        node.store = store
+        node.index = int(index)
+        return node
+
+    @property
+    def prev_node(self):
+        parent = self.store.parent[self.index]
+        return self._view(self.store, parent) if parent >= 0 else None
+
+    @property
+    def next_nodes(self):
+        """A dictionary {action: Node} of the children."""
+        block = self.store.children(self.index)
+        return {action: self._view(self.store, child)
+                for action, child in zip(self.store.action[block].tolist(), range(block.start, block.stop))}
+
+    def get_child(self, action):
+        block = self.store.children(self.index)
+        found = np.flatnonzero(self.store.action[block] == action)
+        return self._view(self.store, block.start + found[0]) if len(found) else None
+
+    def child_visits(self):
+        """:return: A tuple (actions, visit counts) of the children as arrays."""
+        block = self.store.children(self.index)
+        return self.store.action[block], self.store.n[block]
+
+    def child_priors(self):
+        """:return: A tuple (actions, priors) of the children as arrays."""
+        block = self.store.children(self.index)
+        return self.store.action[block], self.store.p[block]
+
+    def detach(self):
+        """
+        Make this node the root of its own tree. Only its subtree is kept; the rest of the old tree is freed.
+
+        :return: The handle of the node in the new tree.
+        """
+        store, index = self.store.compact(self.index)
+        return self._view(store, index)
+
+    n = property(lambda self: int(self.store.n[self.index]))
+    w = property(lambda self: float(self.store.w[self.index]))
+    q = property(lambda self: float(self.store.q[self.index]))
+
+    @property
+    def p(self):
+        return float(self.store.p[self.index])
+
+    @p.setter
+    def p(self, p):
+        self.store.p[self.index] = p
+
+    @property
+    def reward(self):
+        return float(self.store.reward[self.index])
+
+    @reward.setter
+    def reward(self, reward):
+        self.store.reward[self.index] = reward
+
+    @property
+    def value(self):
+        value = self.store.value[self.index]
+        return None if np.isnan(value) else float(value)
+
+    @value.setter
+    def value(self, value):
+        self.store.value[self.index] = np.nan if value is None else value
+
+    @property
+    def terminated(self):
+        return bool(self.store.terminated[self.index])
 
     def is_expanded(self):
-        return len(self.next_nodes) > 0
+        return self.store.num_children[self.index] > 0
 
     def is_terminated(self):
         return self.terminated
 
     def terminate(self):
-        self.terminated = True
-        self.p = 0
+        self.store.terminated[self.index] = True
+        self.store.p[self.index] = 0
 
     def update(self, value):
-        self.n += 1
-        self.w += value
-        # normal average
-        self.q = self.w / self.n
-        # moving average
+        self.store.update(self.index, value)
 
     def get_u_value(self):
         u_value = self.p * np.sqrt(self.prev_node.n)/(self.n+1)
@@ -59,35 +234,15 @@ class Node:
     #     return True
 
     def choose_best(self, c=1):
-        assert len(self.next_nodes) > 0
-        max_value = -INF
-        max_nodes = []
-
-        for (action, node) in self.next_nodes.items():
-            if node.n > 0:
-                advanced_q = node.get_q_value() - node.prev_node.get_q_value()
-                cur_value = advanced_q + c * node.get_u_value()
-            else:
-                cur_value = 0.0 + c * node.get_u_value()
-            if math.isclose(cur_value, max_value, rel_tol=1e-5):
-                max_nodes.append((action, node))
-            elif cur_value > max_value:
-                max_value = cur_value
-                max_nodes.clear()
-                max_nodes.append((action, node))
-        assert len(max_nodes) > 0
-        idx = np.random.randint(0, len(max_nodes))
-        return max_nodes[idx]
+        child = self.store.choose_best(self.index, c)
+        return int(self.store.action[child]), self._view(self.store, child)
 
     def expand(self, **kwargs):
         pass
 
 
 class PutNode(Node):
-
-    def __init__(self, prev, p):
-        super().__init__(prev, p)
-        self.q = 0
+    __slots__ = ()
 
     def expand(self, nmodel, **kwargs):
 
@@ -115,25 +270,26 @@ class PutNode(Node):
         
         # get valid position
         action_mask = sim_env.get_possible_position()
-        action_mask = np.reshape(action_mask, newshape=(-1,))
+        action_mask = np.reshape(action_mask, (-1,))
         
         # get possibilities using neural network
         value, pvec = nmodel.evaluate(observation, False)
 
         valid_action_num = np.sum(action_mask)
-        
-        for i in range(len(action_mask)):
-            action = i
-            if action_mask[i] == 1: # !!! still use mask !!!
-                action_possibility = credit * pvec[action] + (1-credit) * (1/valid_action_num)
-                self.next_nodes[action] = PutNode(self, action_possibility)
-
-        # no give-up action, default action is '0'
-        if len(self.next_nodes) == 0:
-            self.next_nodes[0] = PutNode(self, 1)
+        valid_actions = np.flatnonzero(action_mask == 1) # !!! still use mask !!!
+        if len(valid_actions) > 0:
+            action_possibility = credit * np.asarray(pvec)[valid_actions] + (1-credit) * (1/valid_action_num)
+            self.store.add_children(self.index, valid_actions, action_possibility)
+        else:
+            # no give-up action, default action is '0'
+            self.store.add_children(self.index, np.array([0]), np.array([1.0]))
 
         if rollout_length >= 1 and len(box_size_list) >= rollout_length + 1:
-            value = self.roll_out(box_size_list[:rollout_length+1], copy.deepcopy(sim_env), observation, nmodel)
+            state = sim_env.get_state()
+            try:
+                value = self.roll_out(box_size_list[:rollout_length+1], sim_env, observation, nmodel)
+            finally:
+                sim_env.set_state(state)
         self.value = value
 
     def roll_out(self, box_size_list, sim_env, observation, nmodel, gamma=1):
@@ -65,8 +65,9 @@ class ReorderTree(object):
         # the shape of the action mask
         self.mask_shape = env.bin_size[:2]
         self.mask_len = self.mask_shape[0] * self.mask_shape[1]
-        # copy the env and box list
-        self.env = copy.deepcopy(env)
+        # the env is shared with the caller, not copied: get_baseline and reorder_search step it and
+        # restore it with set_state before they return, so it must not be used while they run
+        self.env = env
         self.box_list = copy.deepcopy(box_list)
         # threshold
         self.p_bound = p_bound
@@ -223,7 +224,13 @@ class ReorderTree(object):
         self.search(next_masks, cur_env, next_idxs, next_node, next_value, action)
 
     def get_baseline(self):
-        env = copy.deepcopy(self.env)
+        state = self.env.get_state()
+        try:
+            return self._get_baseline(self.env)
+        finally:
+            self.env.set_state(state)
+
+    def _get_baseline(self, env):
         obs = env.cur_observation
         nor_exp = 0
         nor_act = None
@@ -247,11 +254,15 @@ class ReorderTree(object):
         root = Node(None, None, self.box_num - 1)
         root.max_value = nor_exp 
         root.action = nor_act
-        for i in range(self.times):
-            sim_env = copy.deepcopy(self.env)
-            res_idxs = list(range(self.box_num))
-            masks = np.ones((self.box_num, self.mask_len))
-            self.search(masks, sim_env, res_idxs, root, 0, None)
+        state = self.env.get_state()
+        try:
+            for i in range(self.times):
+                self.env.set_state(state)
+                res_idxs = list(range(self.box_num))
+                masks = np.ones((self.box_num, self.mask_len))
+                self.search(masks, self.env, res_idxs, root, 0, None)
+        finally:
+            self.env.set_state(state)
         max_exp = root.max_value
         max_act = root.action
         if max_act != nor_act and max_exp - nor_exp < self.v_bound:
@@ -63,12 +63,24 @@ class PackingGame(gym.Env):
         hmap = self.space.plain
         # mask = self.get_possible_position()
         size = self.get_box_plain()
-        return np.reshape(np.stack((hmap,  *size)), newshape=(-1,))
+        return np.reshape(np.stack((hmap,  *size)), (-1,))
 
     @property
     def next_box(self):
         return self.box_creator.preview(1)[0]
 
+    def get_state(self):
+        """
+        Snapshot of the game for tree search: the height map, the placed-box count and volume, and the box queue.
+        Much cheaper than copy.deepcopy(env), which also copies the box creator and the wrapper.
+        """
+        return (self.space.get_state(), self.box_creator.get_state())
+
+    def set_state(self, state):
+        space_state, creator_state = state
+        self.space.set_state(space_state)
+        self.box_creator.set_state(creator_state)
+
     def get_possible_position(self, plain=None):
         x = self.next_box[0]
         y = self.next_box[1]
@@ -21,6 +21,12 @@ class BoxCreator(object):
         assert len(self.box_list) >= 0
         self.box_list.pop(0)
 
+    def get_state(self):
+        return tuple(self.box_list)
+
+    def set_state(self, state):
+        self.box_list = list(state)
+
 class RandomBoxCreator(BoxCreator):
     default_box_set = []
     for i in range(5):
@@ -69,4 +75,12 @@ class LoadBoxCreator(BoxCreator):
         else:
             self.box_list.append((10, 10, 10))
             self.recorder.append((10, 10, 10))
-            self.box_index += 1
\ No newline at end of file
+            self.box_index += 1
+
+    def get_state(self):
+        return (super().get_state(), self.box_index, len(self.recorder))
+
+    def set_state(self, state):
+        box_list, self.box_index, recorder_len = state
+        super().set_state(box_list)
+        del self.recorder[recorder_len:]
\ No newline at end of file
@@ -127,6 +127,17 @@ class CuttingBoxCreator(BoxCreator):
         self._update(box)
         self._add_candidate()
 
+    def get_state(self):
+        # the meta boxes are never modified, only the lists and the height map
+        return (super().get_state(), self.plain.copy(), tuple(self.meta_list), tuple(self.candidates))
+
+    def set_state(self, state):
+        box_list, plain, meta_list, candidates = state
+        super().set_state(box_list)
+        self.plain = plain.copy()
+        self.meta_list = list(meta_list)
+        self.candidates = list(candidates)
+
 class LoadBoxCreator(BoxCreator):
     def __init__(self, data_name = None):
         super().__init__()
@@ -150,3 +161,11 @@ class LoadBoxCreator(BoxCreator):
         self.recorder.append(self.box_set[self.box_index])
         self.box_index += 1
 
+    def get_state(self):
+        return (super().get_state(), self.box_index, len(self.recorder))
+
+    def set_state(self, state):
+        box_list, self.box_index, recorder_len = state
+        super().set_state(box_list)
+        del self.recorder[recorder_len:]
+
@@ -163,4 +163,11 @@ class MDlayerBoxCreator(BoxCreator):
 
     def generate_box_size(self, **kwargs):
         self.box_list.append(self.box_set[self.index])
-        self.index += 1
\ No newline at end of file
+        self.index += 1
+
+    def get_state(self):
+        return (super().get_state(), self.index)
+
+    def set_state(self, state):
+        box_list, self.index = state
+        super().set_state(box_list)
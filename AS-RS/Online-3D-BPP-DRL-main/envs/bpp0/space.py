@@ -1,5 +1,4 @@
 import numpy as np
-from functools import reduce
 import copy, time
 
 
@@ -23,6 +22,20 @@ class Space(object):
         self.boxes = []
         self.flags = [] # record rotation information
         self.height = height
+        self.volume = 0 # total volume of the placed boxes
+
+    def get_state(self):
+        # a read-only copy of the height map, so neither the snapshot nor the live map can change the other
+        plain = self.plain.copy()
+        plain.setflags(write=False)
+        return (plain, len(self.boxes), self.volume, self.height)
+
+    def set_state(self, state):
+        # restore a snapshot of this space taken before the boxes placed since then
+        plain, box_num, self.volume, self.height = state
+        self.plain = plain.copy() # writable again, and the snapshot can be restored more than once
+        del self.boxes[box_num:]
+        del self.flags[box_num:]
 
     def print_height_graph(self):
         print(self.plain)
@@ -35,7 +48,7 @@ class Space(object):
 
     @staticmethod
     def update_height_graph(plain, box):
-        plain = copy.deepcopy(plain)
+        plain = plain.copy()
         le = box.lx
         ri = box.lx + box.x
         up = box.ly
@@ -144,7 +157,7 @@ class Space(object):
         return -1
 
     def get_ratio(self):
-        vo = reduce(lambda x, y: x+y, [box.x * box.y * box.z for box in self.boxes], 0.0)
+        vo = float(self.volume)
         mx = self.plain_size[0] * self.plain_size[1] * self.plain_size[2]
         ratio = vo / mx
         assert ratio <= 1.0
@@ -175,6 +188,7 @@ class Space(object):
         if new_h != -1:
             self.boxes.append(Box(x, y, z, lx, ly, new_h)) # record rotated box
             self.flags.append(flag)
+            self.volume += x * y * z
             self.plain = self.update_height_graph(plain, self.boxes[-1])
             self.height = max(self.height, new_h + z)
             return True
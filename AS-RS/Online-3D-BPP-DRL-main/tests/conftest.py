@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the packages (envs, acktr, MCTS) are imported from the project root, as when main.py is run
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,167 @@
+"""
+Tests of the get_state/set_state snapshots of Space, the box creators and PackingGame used by the tree search.
+A restored snapshot has to replay exactly what happened after it was taken.
+"""
+import random
+import numpy as np
+import pytest
+
+# envs.bpp0 imports the gym environment and the box creators, which need gymnasium, torch and transforms3d
+pytest.importorskip('gymnasium')
+pytest.importorskip('transforms3d')
+torch = pytest.importorskip('torch')
+from envs.bpp0.bin3D import PackingGame
+from envs.bpp0.binCreator import LoadBoxCreator
+from envs.bpp0.cutCreator import CuttingBoxCreator
+from envs.bpp0.mdCreator import MDlayerBoxCreator
+from envs.bpp0.space import Space
+
+CONTAINER = (10, 10, 10)
+BOX_RANGE = [2, 2, 2, 5, 5, 5]
+
+
+def space_state(space):
+    return (space.plain.tolist(), [box.standardize() for box in space.boxes], list(space.flags),
+            space.volume, space.height, space.get_ratio())
+
+
+def test_space_round_trip():
+    space = Space(*CONTAINER)
+    assert space.drop_box((4, 5, 3), 0, False)
+    before = space_state(space)
+    state = space.get_state()
+
+    assert space.drop_box((4, 5, 3), space.position_to_index((5, 0)), True)
+    assert space.drop_box((2, 2, 2), 0, False)
+    after = space_state(space)
+    assert after != before
+
+    space.set_state(state)
+    assert space_state(space) == before
+    # the snapshot can be restored again after more boxes were dropped
+    assert space.drop_box((3, 3, 3), 0, False)
+    space.set_state(state)
+    assert space_state(space) == before
+
+
+def test_space_snapshot_is_a_read_only_copy():
+    space = Space(*CONTAINER)
+    space.drop_box((4, 5, 3), 0, False)
+    state = space.get_state()
+    plain = state[0]
+    assert not plain.flags.writeable
+    # the live height map stays writable and the snapshot does not follow it
+    assert space.plain.flags.writeable
+    space.plain[9, 9] = 7
+    assert plain[9, 9] == 0
+
+    space.set_state(state)
+    assert space.plain.flags.writeable and space.plain[9, 9] == 0
+    space.plain[9, 9] = 7
+    assert state[0][9, 9] == 0
+
+
+def draw_boxes(creator, num_boxes, seed):
+    """
+    Take boxes from the creator the way PackingGame.step does and return them.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    boxes = []
+    for _ in range(num_boxes):
+        boxes.append(tuple(creator.preview(1)[0]))
+        creator.drop_box()
+        creator.generate_box_size()
+    return boxes
+
+
+def check_creator_round_trip(creator):
+    def replay():
+        # preview may draw a new box, so it is seeded as well
+        random.seed(1)
+        return creator.preview(2), draw_boxes(creator, 6, seed=1)
+
+    draw_boxes(creator, 3, seed=0)
+    state = creator.get_state()
+    first = replay()
+    creator.set_state(state)
+    assert replay() == first
+    # the snapshot can be restored more than once
+    creator.set_state(state)
+    assert replay() == first
+
+
+def test_cutting_box_creator_round_trip():
+    random.seed(0)
+    creator = CuttingBoxCreator(CONTAINER, BOX_RANGE)
+    creator.generate_box_size()
+    check_creator_round_trip(creator)
+    # the height map of the creator is copied, not shared with the snapshot
+    state = creator.get_state()
+    draw_boxes(creator, 2, seed=2)
+    assert not np.array_equal(creator.plain, state[1])
+
+
+def test_md_layer_box_creator_round_trip():
+    random.seed(0)
+    np.random.seed(0)
+    creator = MDlayerBoxCreator(CONTAINER, [2, 5])
+    creator.reset()
+    creator.generate_box_size()
+    check_creator_round_trip(creator)
+
+
+def test_load_box_creator_round_trip(tmp_path):
+    data_name = tmp_path / 'boxes.pt'
+    torch.save([[[2, 3, 4], [5, 5, 2], [3, 2, 2], [4, 4, 4], [2, 2, 5], [3, 3, 3],
+                 [5, 2, 3], [2, 4, 2], [4, 2, 2], [3, 5, 4], [2, 2, 2], [5, 5, 5]]], data_name)
+    creator = LoadBoxCreator(str(data_name))
+    creator.reset(index=0)
+    creator.generate_box_size()
+    check_creator_round_trip(creator)
+    state = creator.get_state()
+    recorded = list(creator.recorder)
+    draw_boxes(creator, 3, seed=0)
+    creator.set_state(state)
+    assert creator.recorder == recorded
+
+
+def game_state(game):
+    return (game.cur_observation.tolist(), space_state(game.space), game.box_creator.preview(2))
+
+
+def play(game, num_steps, seed):
+    """
+    Drop boxes at the first feasible position and return the observations, rewards and infos.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    trace = []
+    for _ in range(num_steps):
+        action = int(np.argmax(game.get_possible_position().reshape(-1)))
+        obs, reward, terminated, truncated, info = game.step([action])
+        trace.append((obs.tolist(), reward, terminated, info['counter'], info['ratio']))
+        if terminated:
+            break
+    return trace
+
+
+def test_packing_game_round_trip():
+    random.seed(0)
+    game = PackingGame(box_creator=CuttingBoxCreator(CONTAINER, BOX_RANGE), container_size=CONTAINER)
+    game.reset()
+    play(game, 3, seed=0)
+    before = game_state(game)
+    state = game.get_state()
+
+    first = play(game, 5, seed=1)
+    assert game_state(game) != before
+    game.set_state(state)
+    assert game_state(game) == before
+    assert play(game, 5, seed=1) == first
+
+    # restoring does not tie the game to the snapshot
+    game.set_state(state)
+    play(game, 2, seed=2)
+    game.set_state(state)
+    assert game_state(game) == before
@@ -0,0 +1,145 @@
+"""
+Tests of the struct-of-arrays search tree, see MCTS/node.py.
+The vectorized PUCT selection is compared with the per-node loop that the tree used before the TreeStore.
+"""
+import math
+import numpy as np
+import pytest
+from MCTS.node import INF, PutNode, TreeStore
+
+
+def reference_choose_best(node, c=1):
+    """
+    The per-node PUCT selection of the object tree: one Python loop over the children, ties kept with math.isclose.
+
+    :return: A tuple (action, index of the child in the store).
+    """
+    max_value = -INF
+    max_nodes = []
+    for action, child in node.next_nodes.items():
+        u_value = child.p * np.sqrt(node.n) / (child.n + 1)
+        if child.n > 0:
+            cur_value = child.q - node.q + c * u_value
+        else:
+            cur_value = 0.0 + c * u_value
+        if math.isclose(cur_value, max_value, rel_tol=1e-5):
+            max_nodes.append((action, child.index))
+        elif cur_value > max_value:
+            max_value = cur_value
+            max_nodes.clear()
+            max_nodes.append((action, child.index))
+    idx = np.random.randint(0, len(max_nodes))
+    return max_nodes[idx]
+
+
+def backup(node, value):
+    while node is not None:
+        node.update(value)
+        node = node.prev_node
+
+
+def build_tree(seed, num_actions=20):
+    """
+    A root with `num_actions` children, two of them expanded again, and random visits backed up from the leaves.
+    """
+    rng = np.random.default_rng(seed)
+    root = PutNode(None, 1.0)
+    store = root.store
+
+    def expand(node, actions):
+        priors = rng.dirichlet(np.ones(len(actions)))
+        store.add_children(node.index, actions, priors)
+
+    expand(root, np.sort(rng.choice(100, num_actions, replace=False)))
+    children = list(root.next_nodes.values())
+    for child in children[:2]:
+        expand(child, np.arange(5))
+    leaves = [node for node in root.next_nodes.values() if not node.is_expanded()]
+    leaves += [grandchild for child in children[:2] for grandchild in child.next_nodes.values()]
+    for _ in range(60):
+        backup(leaves[rng.integers(len(leaves))], rng.normal())
+    return root
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('c', [0.5, 1, 4])
+def test_choose_best_matches_the_per_node_values(seed, c):
+    root = build_tree(seed)
+    for node in [root] + [child for child in root.next_nodes.values() if child.is_expanded()]:
+        np.random.seed(seed)
+        expected = reference_choose_best(node, c)
+        np.random.seed(seed)
+        action, child = node.choose_best(c)
+        assert (action, child.index) == expected
+        assert child.prev_node.index == node.index
+
+
+def test_choose_best_breaks_ties_like_the_per_node_loop():
+    # unvisited children with equal priors all tie, and both pick the tied child with one np.random.randint draw
+    root = PutNode(None, 1.0)
+    root.store.add_children(root.index, np.array([3, 7, 11, 12]), np.array([0.25, 0.25, 0.25, 0.25]))
+    root.update(1.0)
+    picked = set()
+    for seed in range(20):
+        np.random.seed(seed)
+        expected = reference_choose_best(root)
+        np.random.seed(seed)
+        action, child = root.choose_best()
+        assert (action, child.index) == expected
+        picked.add(action)
+    assert picked == {3, 7, 11, 12}
+
+
+def subtree(node):
+    """The statistics and the child links of a subtree, keyed by action, independent of the store indexes."""
+    return (node.n, node.w, node.q, node.p, node.reward, node.value, node.terminated,
+            {action: subtree(child) for action, child in node.next_nodes.items()})
+
+
+def test_detach_keeps_the_visits_and_the_child_links():
+    root = build_tree(0)
+    children = list(root.next_nodes.values())
+    kept = children[1]
+    kept.reward = 0.5
+    kept.value = 2.0
+    next(iter(kept.next_nodes.values())).terminate()
+    expected = subtree(kept)
+    old_size = root.store.size
+
+    new_root = kept.detach()
+    assert new_root.store is not root.store
+    assert new_root.prev_node is None
+    assert subtree(new_root) == expected
+    # only the subtree is copied: the node and its 5 children
+    assert new_root.store.size == 6
+    for action, child in new_root.next_nodes.items():
+        assert child.prev_node.index == new_root.index
+        assert new_root.get_child(action).index == child.index
+    actions, visits = new_root.child_visits()
+    assert visits.sum() == sum(child.n for child in kept.next_nodes.values())
+    np.testing.assert_array_equal(actions, np.arange(5))
+
+    # the old tree is left as it was, and the new tree grows on its own
+    assert root.store.size == old_size
+    new_root.update(1.0)
+    assert new_root.n == kept.n + 1
+
+
+def test_compact_of_the_root_copies_the_whole_tree():
+    root = build_tree(1)
+    store, index = root.store.compact(root.index)
+    assert store.size == root.store.size
+    copy = PutNode._view(store, index)
+    assert subtree(copy) == subtree(root)
+
+
+def test_allocate_grows_the_arrays():
+    store = TreeStore(capacity=2)
+    root = store.add_root(1.0)
+    store.add_children(root, np.arange(10), np.full(10, 0.1))
+    store.update(root, 3.0)
+    assert store.size == 11 and len(store.n) >= 11
+    assert store.n[root] == 1 and store.q[root] == 3.0
+    assert store.parent[store.children(root)].tolist() == [root] * 10
+    # the new nodes start with the defaults
+    assert np.isnan(store.value[store.children(root)]).all() and not store.n[store.children(root)].any()
@@ -1,8 +1,23 @@
 import yaml
+import copy
+import time
+import numpy as np
 from bin import Bin
 from item import Item
 from algorithms.first_fit import first_fit
 from algorithms.best_fit import best_fit
+from algorithms.retrieval_sequencing import plan_retrieval_sequence
+from algorithms.dual_command import pair_dual_command_cycles
+from algorithms.pallet_prepositioning import plan_pallet_moves
+from algorithms.lookahead import plan_lookahead
+from capacity_index import CapacityClassIndex
+from inventory_index import InventoryIndex
+from copy_on_write import CopyOnWriteBins
+from storage import SQLiteBins
+from occupancy_view import OccupancyPublisher
+from rack_topology import RackTopology
+from adaptive_priority import AdaptivePriority, weighted_score
+import snapshot
 from visualization import visualize_bin
 import utils
 
@@ -13,12 +28,25 @@ class ASRSManager:
     You can either provide a configuration file or specify the parameters directly.
 
     :param online_priority: A list of bin IDs representing the order in which to try placing items online.
+                            'nearest' or 'farthest' orders the bins of the rack topology by their travel time from the entrance.
     :param offline_priority: A list of bin IDs representing the order in which to try placing items when reorganizing items offline.
-    :param bin_dimensions: A tuple representing the dimensions of the bins (width, height, depth, min_adjust_length).
+                             Like `online_priority`, it can be 'nearest' or 'farthest'.
+    :param bin_dimensions: A tuple representing the default dimensions of the bins (width, height, depth, min_adjust_length).
+    :param bin_sizes: Optional dictionary {bin_id: (width, height, depth)} for bins whose dimensions differ from `bin_dimensions`.
     :param weight_limit: Weight limit for the bins.
+    :param load_limit: Optional limit of the total weight of the items stored in one bin.
     :param bins_for_pallets: A list of bin IDs designated for empty pallets. In optimal, these bins should be as close to the entrance as possible.
     :param num_pallets: Number of empty pallets to be initialized in the ASRS system.
     :param entrance_position: A tuple representing the entrance position of the ASRS system (x, y, z, bin_id).
+    :param storage_path: Optional path of an SQLite database to keep the bins and items in (see `storage.SQLiteBins`).
+                         The database must be new; use `ASRSManager.open` to continue with an existing one.
+    :param cache_size: Maximum number of bins whose items are kept in memory when `storage_path` is set.
+    :param topology: Optional dictionary describing the rack (see `RackTopology.from_config`): the bay and level of each bin,
+                     and the speeds and accelerations of the crane. Without it, the bins form a single row and travel times
+                     are distances.
+    :param adaptive_priority: Optional dictionary {'travel_weight': float, 'residual_weight': float}. If it is given, online
+                              placement tries the bins of `online_priority` in the order of a score computed from the
+                              current state of the bins (see `adaptive_priority.AdaptivePriority`) instead of the list order.
     :param config_path: Optional path to a configuration
 
     The configuration file should have the following structure:
@@ -39,6 +67,31 @@ class ASRSManager:
         # offline operation phase bin usage priority.
         # This is a list of integers representing bin IDs in the order they should be tried.
         offline_priority: [19, 1, 18, 2, 17, 3, 16, 4, 15, 5, 14, 6, 13, 7, 12, 8, 11, 9, 10]
+
+        # optional per-bin dimensions. Bins that are not listed use bin_config.
+        bin_sizes:
+          1: {height: 300}
+          19: {width: 80, height: 300, depth: 80}
+
+        # optional SQLite database for the bins and items
+        storage_path: ./inventory.db
+
+        # optional rack layout and crane speeds. The travel times are used to choose empty pallets,
+        # to order the bins for 'nearest' / 'farthest' priorities and to report reorganization costs.
+        topology:
+          bay_width: 100
+          level_height: 100
+          horizontal_speed: 2.0
+          vertical_speed: 0.5
+          horizontal_acceleration: 0.5
+          vertical_acceleration: 0.5
+          bins: {1: [0, 0], 2: [0, 1], 3: [1, 0], 4: [1, 1]}  # bin_id: [bay, level]
+
+        # optional online priority computed from the live occupancy:
+        # score = travel_weight * travel time to the top of the bin - residual_weight * residual height
+        adaptive_priority:
+          travel_weight: 1.0
+          residual_weight: 0.0
     """
     def __init__(self, online_priority: list=None, 
                 offline_priority: list=None, 
@@ -47,6 +100,12 @@ class ASRSManager:
                 bins_for_pallets: list=None, 
                 num_pallets: int=None, 
                 entrance_position: tuple=(0, 0, 0, 5),  # entrance position (x, y, z, bin_id)
+                bin_sizes: dict=None,
+                load_limit: float=None,
+                storage_path=None,
+                cache_size: int=1000,
+                topology: dict=None,
+                adaptive_priority: dict=None,
                 config_path=None):
         
         if config_path:
@@ -60,6 +119,11 @@ class ASRSManager:
             self.bins_for_pallets = config['bins_for_pallets']
             self.num_pallets = config['num_pallets']
             self.entrance_position = config['entrance_position']
+            bin_sizes = config.get('bin_sizes', None)
+            self.load_limit = bin_config.get('load_limit', None)
+            storage_path = config.get('storage_path', storage_path)
+            topology = config.get('topology', topology)
+            adaptive_priority = config.get('adaptive_priority', adaptive_priority)
 
             try:
                 self.weight_limit = bin_config['weight_limit']
@@ -74,6 +138,7 @@ class ASRSManager:
             self.num_pallets = num_pallets
             self.entrance_position = entrance_position
             self.weight_limit = weight_limit if weight_limit is not None else None
+            self.load_limit = load_limit
             if not self.online_priority or not self.offline_priority or not self.bin_dimensions or not self.bins_for_pallets or not self.num_pallets or not self.entrance_position:
                 raise ValueError("If config_path is not provided, online_priority, offline_priority, bin_dimensions, bins_for_pallets, num_pallets and entrance_position must be specified.")
 
@@ -83,19 +148,196 @@ class ASRSManager:
                 # print ("no weight limit is set")
                 self.weight_limit = None
 
-        # initialize bins
+        self.version = 0  # incremented on every change of the bins
+        self._fork_parent = None
+        self.occupancy_publisher = None
+        self.topology_config = topology
+        self.adaptive_priority_config = adaptive_priority
+        self._initialize_topology()
+        self._initialize_bins(bin_sizes)
+        self._initialize_empty_pallets()
+        if storage_path is not None:
+            self._initialize_storage(storage_path, cache_size)
+        self._initialize_indexes()
+
+    def _initialize_topology(self):
+        """
+        Build the rack topology and resolve 'nearest' / 'farthest' priorities into lists of bin IDs.
+        """
+        priorities = (self.online_priority, self.offline_priority)
+        bin_ids = set(self.bins_for_pallets)
+        for priority in priorities:
+            if not isinstance(priority, str):
+                bin_ids.update(priority)
+        if any(isinstance(priority, str) for priority in priorities):
+            if not self.topology_config or 'bins' not in self.topology_config:
+                raise ValueError("'nearest' and 'farthest' priorities need the bins of the rack topology.")
+            topology_bins = self.topology_config['bins']
+            bin_ids.update(topology_bins if isinstance(topology_bins, dict) else (row[0] for row in topology_bins))
+        self.topology = RackTopology.from_config(self.topology_config, bin_ids, self.bin_dimensions)
+
+        storage_bins = [bin_id for bin_id in sorted(bin_ids) if bin_id not in self.bins_for_pallets]
+        entrance_bin, entrance_y = self.entrance_position[3], self.entrance_position[1]
+        resolved = []
+        for priority in priorities:
+            if priority in ('nearest', 'farthest'):
+                priority = self.topology.priority(storage_bins, entrance_bin, entrance_y, farthest_first=priority == 'farthest')
+            elif isinstance(priority, str):
+                raise ValueError(f"Unknown priority '{priority}'. Use a list of bin IDs, 'nearest' or 'farthest'.")
+            resolved.append(priority)
+        self.online_priority, self.offline_priority = resolved
+
+    def _initialize_bins(self, bin_sizes: dict=None):
+        """
+        Create the empty bins of the ASRS system.
+
+        :param bin_sizes: Optional dictionary {bin_id: (width, height, depth)} for bins whose dimensions differ from `bin_dimensions`.
+        """
         self.bins = {}
+        self.bin_sizes = {}
         all_bins = set(self.online_priority + self.bins_for_pallets + self.offline_priority)
         for i in all_bins:
+            self.bin_sizes[i] = self._resolve_bin_size((bin_sizes or {}).get(i))
             self.bins[i] = Bin(id=i,
-                               width=self.bin_dimensions[0], 
-                               height=self.bin_dimensions[1], 
-                               depth=self.bin_dimensions[2], 
+                               width=self.bin_sizes[i][0], 
+                               height=self.bin_sizes[i][1], 
+                               depth=self.bin_sizes[i][2], 
                                min_adjust_length=self.bin_dimensions[3], 
-                               weight_limit=self.weight_limit
+                               weight_limit=self.weight_limit,
+                               load_limit=self.load_limit
                                )
-        
-        self._initialize_empty_pallets()
+
+    def _initialize_storage(self, storage_path, cache_size: int):
+        """
+        Move the bins into a new SQLite database.
+        """
+        storage = SQLiteBins(storage_path, cache_size=cache_size, pinned=self.bins_for_pallets)
+        if storage.read_config() is not None:
+            storage.close()
+            raise ValueError(f"{storage_path} already contains an ASRS system. Use ASRSManager.open to continue with it.")
+        for bin_id, bin in self.bins.items():
+            storage[bin_id] = bin
+        storage.flush()
+        storage.write_config(self._get_config())
+        self.bins = storage
+
+    def _flush_bins(self, bin_ids):
+        """
+        Write the given bins to the storage backend in one transaction, if the bins are stored in one.
+        """
+        flush = getattr(self.bins, 'flush', None)
+        if flush is not None:
+            flush(bin_ids)
+
+    def _peek_bins_holding(self, item_id):
+        """
+        Iterate over the bins that may hold an item, for reading only. A storage backend that indexes the items
+        narrows this down to the one bin holding the item, otherwise all the bins are returned.
+        """
+        locate = getattr(self.bins, 'locate', None)
+        if locate is None:
+            yield from self._peek_bins()
+            return
+        bin_id = locate(item_id)
+        if bin_id is not None:
+            yield self._peek_bin(bin_id)
+
+    def _initialize_indexes(self):
+        """
+        (Re)build the indexes from the current content of the bins.
+        """
+        self.online_index = CapacityClassIndex(self.bins, self.online_priority)
+        self.inventory_index = None  # built on the first query, see _get_inventory_index
+        self._initialize_adaptive_priority()
+
+    def _initialize_adaptive_priority(self):
+        """
+        (Re)build the adaptive online priority from the current entrance, weights and content of the bins.
+        """
+        if self.adaptive_priority_config is None:
+            self.adaptive_priority = None
+            return
+        entrance_bin, entrance_y = self.entrance_position[3], self.entrance_position[1]
+        topology = self.topology
+        self.adaptive_priority = AdaptivePriority(
+            bins=self.bins,
+            bin_ids=self.online_priority,
+            travel_time=lambda bin_id, y: topology.travel_time_from(entrance_bin, entrance_y, bin_id, y),
+            score=weighted_score(**self.adaptive_priority_config),
+            capacity_index=self.online_index)
+
+    def update_priority(self, entrance_position: tuple=None, travel_weight: float=None, residual_weight: float=None):
+        """
+        Recompute the adaptive online priority for a new entrance or new weights, e.g. when the shift pattern changes,
+        without rebuilding the manager. Enables the adaptive priority if it was not enabled.
+
+        :param entrance_position: Optional new entrance position (x, y, z, bin_id). It is also used to choose empty pallets.
+        :param travel_weight: Optional new weight of the travel time in the score.
+        :param residual_weight: Optional new weight of the residual height in the score.
+        :return: The IDs of the online bins in their new order, lowest score first.
+        """
+        config = dict(self.adaptive_priority_config or {})
+        if travel_weight is not None:
+            config['travel_weight'] = travel_weight
+        if residual_weight is not None:
+            config['residual_weight'] = residual_weight
+        self.adaptive_priority_config = config
+        if entrance_position is not None:
+            self.entrance_position = entrance_position
+        self._initialize_adaptive_priority()
+        return self.adaptive_priority.order()
+
+    def _resolve_bin_size(self, bin_size) -> tuple:
+        """
+        Resolve the dimensions of one bin from its `bin_sizes` entry, falling back to `bin_dimensions`.
+
+        :param bin_size: None, a tuple (width, height, depth), or a dictionary with any of the keys width, height and depth.
+        :return: A tuple (width, height, depth).
+        """
+        default_size = tuple(self.bin_dimensions[:3])
+        if bin_size is None:
+            return default_size
+        if isinstance(bin_size, dict):
+            return (bin_size.get('width', default_size[0]),
+                    bin_size.get('height', default_size[1]),
+                    bin_size.get('depth', default_size[2]))
+        if len(bin_size) != 3:
+            raise ValueError(f"Bin size {bin_size} should be (width, height, depth).")
+        return tuple(bin_size)
+
+    def _peek_bin(self, bin_id):
+        """
+        Get a bin for reading only. On a fork, this does not copy the bin.
+        """
+        peek = getattr(self.bins, 'peek', None)
+        return peek(bin_id) if peek is not None else self.bins[bin_id]
+
+    def _peek_bins(self):
+        """
+        Iterate over all the bins for reading only. On a fork, this does not copy the bins.
+        """
+        for bin_id in self.bins:
+            yield self._peek_bin(bin_id)
+
+    def _refresh_bins(self, *bin_ids):
+        """
+        Update the indexes after items were placed into or removed from the given bins.
+        """
+        self.version += 1
+        self._flush_bins(bin_ids)
+        for bin_id in bin_ids:
+            self.online_index.update(bin_id)
+            if self.adaptive_priority is not None:
+                self.adaptive_priority.update(bin_id)
+            if self.inventory_index is not None:
+                self.inventory_index.update(self.bins[bin_id])
+        if self.occupancy_publisher is not None:
+            self.occupancy_publisher.update([self.bins[bin_id] for bin_id in bin_ids], self.version)
+
+    def _get_inventory_index(self) -> InventoryIndex:
+        if self.inventory_index is None:
+            self.inventory_index = InventoryIndex(self._peek_bins())
+        return self.inventory_index
 
     def _initialize_empty_pallets(self):
         """ Initialize empty pallets in the ASRS system.
@@ -108,17 +350,20 @@ class ASRSManager:
 
         for i in range (1, num_pallets + 1, 1):    
             item = Item(
-                    width=self.bin_dimensions[0]/2,
+                    width=None,
                     height=self.bin_dimensions[3],  # set as min_adjust_length
-                    depth=self.bin_dimensions[2]/2,
+                    depth=None,
                     rotation=False,
                     weight=None,
                     id=i,
                     empty=True
                     )
-            item.placed_dimensions = (self.bin_dimensions[0]/2, self.bin_dimensions[3], self.bin_dimensions[2]/2)  # Set as min_adjust_length. This is for bin.can_place(item) to work correctly.
             for bin_id in bins_for_pallets:
                 bin = self.bins[bin_id]
+                # the pallet is sized from the bin it is stored in
+                item.width = bin.width/2
+                item.depth = bin.depth/2
+                item.placed_dimensions = (bin.width/2, self.bin_dimensions[3], bin.depth/2)  # Set as min_adjust_length. This is for bin.can_place(item) to work correctly.
                 if bin.can_place(item):
                     item.position = (0, bin.get_current_height(), 0)
                     item.placed_bin = bin_id
@@ -157,11 +402,6 @@ class ASRSManager:
         If no suitable bin is found, it returns None.
         """
         best_pallet = None
-        item_dimension = utils.get_optimal_dimension(item_to_place, self.bin_dimensions)
-
-
-        item_to_place.placed_dimensions = item_dimension
-
         best_pallet = self.get_closest_pallet(self.entrance_position)
         if best_pallet is None:
             raise ValueError("No empty pallet found for item placement.")
@@ -169,9 +409,110 @@ class ASRSManager:
                                    all_bins=self.bins, 
                                    online_priority=self.online_priority, 
                                    bin_dimensions=self.bin_dimensions, 
-                                   best_pallet=utils.ItemDictToItem(best_pallet))
+                                   best_pallet=utils.ItemDictToItem(best_pallet),
+                                   capacity_index=self.online_index,
+                                   priority=self.adaptive_priority)
         return first_fit_plan
     
+    def plan_lookahead_placement(self, buffer: list[Item], beam_width: int=8, time_limit: float=0.01, new_bin_cost: float=None) -> dict:
+        """
+        Plan the next placement for a buffer of incoming items (e.g. the pallets waiting on the inbound conveyor):
+        which buffered item to store next and into which bin. The order and the bins of the whole buffer are planned
+        with a beam search (see `algorithms.lookahead.plan_lookahead`) minimizing the travel time from the entrance
+        plus `new_bin_cost` for every empty bin that is used; only the first placement of the plan is returned.
+
+        :param buffer: A list of the buffered Item objects.
+        :param beam_width: Number of partial plans kept after every placement.
+        :param time_limit: Time budget of the decision in seconds.
+        :param new_bin_cost: Cost of using an empty bin. By default the travel time to the farthest online bin.
+        :return: A placement plan like `plan_online_placement`, with the 'buffer_index' of the item to store and the
+                 planned 'sequence' of buffer indexes, or None if no buffered item can be placed.
+        """
+        entrance_bin, entrance_y = self.entrance_position[3], self.entrance_position[1]
+        distance_to_entrance = lambda bin_id, y: self.topology.travel_time_from(entrance_bin, entrance_y, bin_id, y)
+        if new_bin_cost is None:
+            new_bin_cost = max(distance_to_entrance(bin_id, 0) for bin_id in self.online_priority)
+        sequence, _ = plan_lookahead(items=buffer,
+                                     capacity_index=self.online_index,
+                                     bins={bin_id: self._peek_bin(bin_id) for bin_id in self.online_priority},
+                                     distance_to_entrance=distance_to_entrance,
+                                     new_bin_cost=new_bin_cost,
+                                     beam_width=beam_width,
+                                     time_limit=time_limit)
+        if not sequence:
+            return None
+
+        best_pallet = self.get_closest_pallet(self.entrance_position)
+        if best_pallet is None:
+            raise ValueError("No empty pallet found for item placement.")
+        buffer_index, target_bin, placed_dimensions, y = sequence[0]
+        buffer[buffer_index].placed_dimensions = placed_dimensions
+        return {
+            'pallet_id': best_pallet['id'],
+            'original_pallet_placed_bin': best_pallet['placed_bin'],
+            'original_pallet_position': best_pallet['position'],
+            'target_bin': target_bin,
+            'target_position': (0, y, 0),
+            'buffer_index': buffer_index,
+            'sequence': [index for index, _, _, _ in sequence],
+        }
+
+    def place_items_lookahead(self, items: list[Item], buffer_size: int=5, beam_width: int=8, time_limit: float=0.01,
+                              new_bin_cost: float=None, compare: bool=True) -> dict:
+        """
+        Place a stream of items online, keeping the next `buffer_size` items in a buffer and storing the item chosen by
+        `plan_lookahead_placement` each time. When no buffered item can be placed, the oldest one is rejected.
+
+        :param items: The Item objects in arrival order.
+        :param buffer_size: Number of items that can wait in the buffer (e.g. 3 to 10 on an inbound conveyor).
+        :param compare: Whether to also place the items one at a time with first fit, on a fork, and report both.
+        :return: A dictionary {'plans': list of placement plans with the 'item_object', 'unplaced': list of Item,
+                 'lookahead': stats, 'first_fit': stats or None}. The stats are {'bins_used', 'travel_time', 'unplaced'}:
+                 the number of non-empty online bins and the total travel time from the entrance to the storage slots.
+        """
+        first_fit_stats = None
+        if compare:
+            forked = self.fork()
+            travel_time, unplaced = 0.0, 0
+            for item in items:
+                try:
+                    plan = forked.place_item_online(copy.copy(item))
+                except ValueError:
+                    unplaced += 1
+                    continue
+                travel_time += forked._calculate_distance_to_entrance(forked._peek_bin(plan['target_bin']).items[plan['pallet_id']],
+                                                                      forked.entrance_position)
+            first_fit_stats = {'bins_used': forked._count_used_bins(), 'travel_time': travel_time, 'unplaced': unplaced}
+
+        plans, unplaced = [], []
+        travel_time = 0.0
+        incoming = iter(items)
+        buffer = []
+        while True:
+            buffer.extend(item for _, item in zip(range(buffer_size - len(buffer)), incoming))
+            if not buffer:
+                break
+            plan = self.plan_lookahead_placement(buffer, beam_width, time_limit, new_bin_cost)
+            if plan is None:
+                unplaced.append(buffer.pop(0))  # nothing fits: reject the oldest item to make room
+                continue
+            item = buffer.pop(plan['buffer_index'])
+            plan['item_object'] = item
+            self.execute_online_placement_plan(plan, item)
+            travel_time += self._calculate_distance_to_entrance(self._peek_bin(plan['target_bin']).items[plan['pallet_id']],
+                                                                self.entrance_position)
+            plans.append(plan)
+
+        return {
+            'plans': plans,
+            'unplaced': unplaced,
+            'lookahead': {'bins_used': self._count_used_bins(), 'travel_time': travel_time, 'unplaced': len(unplaced)},
+            'first_fit': first_fit_stats,
+        }
+
+    def _count_used_bins(self) -> int:
+        return sum(1 for bin_id in self.online_priority if self._peek_bin(bin_id).items)
+
     def execute_online_placement_plan(self, plan: dict, item_to_place: Item) -> bool:
         """
         Execute the placement plan for an item in the ASRS system.
@@ -190,17 +531,20 @@ class ASRSManager:
             print(f"No valid pallet found for item placement.")
             return False
 
-        del self.bins[original_pallet_placed_bin].items[pallet_id]
+        self.bins[original_pallet_placed_bin].remove_item(pallet_id)
 
         pallet.width = item_to_place.placed_dimensions[0]
         pallet.height = item_to_place.placed_dimensions[1]
         pallet.depth = item_to_place.placed_dimensions[2]
         pallet.empty = False
+        pallet.weight = item_to_place.weight
+        pallet.arrival_time = item_to_place.arrival_time if item_to_place.arrival_time is not None else time.time()
         pallet.placed_dimensions = item_to_place.placed_dimensions
         pallet.position = target_position
         pallet.placed_bin = target_bin
 
         self.bins[target_bin].place_item(pallet, target_position)
+        self._refresh_bins(original_pallet_placed_bin, target_bin)
 
         return True
 
@@ -210,7 +554,8 @@ class ASRSManager:
         This method collects all items from the bins, clears the bins,
         and then applies the Best Fit algorithm to reorganize them.
 
-        :return: Boolean indicating whether the reorganization was successful.
+        :return: A dictionary {item_id: {'new_position': tuple, 'travel_time': float}} where travel_time is the crane travel
+                 time from the original position of the item to its new one, or False if there is nothing to reorganize.
         """
 
         items_to_reorganize = []
@@ -220,6 +565,7 @@ class ASRSManager:
         
         if not items_to_reorganize:
             return False
+        original_positions = {item.id: (item.placed_bin, item.position[1]) for item in items_to_reorganize}
 
         # 2. reset all bins
         for bin_obj in self.bins.values():
@@ -229,18 +575,30 @@ class ASRSManager:
         unplaced_items = best_fit(items=items_to_reorganize, 
                                    all_bins=self.bins, 
                                    bin_dimensions=self.bin_dimensions, 
-                                   offline_priority=self.offline_priority)
+                                   offline_priority=self.offline_priority,
+                                   capacity_index=CapacityClassIndex(self.bins, self.offline_priority))
+        self.version += 1
+        self._flush_bins(list(self.bins))
+        self._initialize_indexes()
+        if self.occupancy_publisher is not None:
+            self.occupancy_publisher.update(self._peek_bins(), self.version)
 
         if unplaced_items:
             print (unplaced_items)
             raise ValueError(f"Reorganization failed. The following items could not be placed: {[item.id for item in unplaced_items]}. Please check the bin configurations and available space.")
         else:
+            moved_items = [item for bin in self._peek_bins() for item in bin.items.values()]
+            # crane travel time of moving every item from its original position to its new one
+            travel_times = self._calculate_distance(np.array([original_positions[item.id][0] for item in moved_items]),
+                                                    np.array([original_positions[item.id][1] for item in moved_items], dtype=float),
+                                                    np.array([item.placed_bin for item in moved_items]),
+                                                    np.array([item.position[1] for item in moved_items], dtype=float))
             result_dict = {}
-            for bin in self.bins.values():
-                for item in bin.items.values():
-                    result_dict[f"{item.id}"] = {
-                        'new_position': item.position,
-                    }
+            for item, travel_time in zip(moved_items, travel_times.tolist()):
+                result_dict[f"{item.id}"] = {
+                    'new_position': item.position,
+                    'travel_time': travel_time,
+                }
             return result_dict
     
     def retrieve_item(self, item_id:str) -> Item:
@@ -250,7 +608,7 @@ class ASRSManager:
         :param item_id: ID of the item to be retrieved.
         :return: Item object if found, None otherwise.
         """
-        for bin_obj in self.bins.values():
+        for bin_obj in self._peek_bins_holding(item_id):
             for item in bin_obj.items.values():
                 if item.id == item_id:
                     return item.to_dict()
@@ -263,12 +621,60 @@ class ASRSManager:
         :return: A list of Item objects representing all items in the system.
         """
         all_items = {}
-        for bin_obj in self.bins.values():
-            for item in bin_obj.items:
+        for bin_obj in self._peek_bins():
+            for item in bin_obj.items.values():
                 if (not item.empty):
                     all_items[f"{item.id}"] = item.to_dict()
         return all_items
     
+    def query_items_by_weight(self, min_weight: float=None, max_weight: float=None):
+        """
+        Iterate over the stored items with min_weight <= weight <= max_weight, lightest first.
+        Items without a weight are skipped. None means unbounded.
+
+        :return: A lazy iterator of item dictionaries.
+        """
+        return self._iter_items(self._get_inventory_index().by_weight, min_weight, max_weight)
+
+    def query_items_by_position(self, min_y: float=None, max_y: float=None):
+        """
+        Iterate over the stored items with min_y <= y-position <= max_y, lowest first. None means unbounded.
+
+        :return: A lazy iterator of item dictionaries.
+        """
+        return self._iter_items(self._get_inventory_index().by_position, min_y, max_y)
+
+    def query_items_by_arrival(self, start: float=None, end: float=None):
+        """
+        Iterate over the stored items that arrived between `start` and `end` (time.time() values), oldest first.
+        None means unbounded.
+
+        :return: A lazy iterator of item dictionaries.
+        """
+        return self._iter_items(self._get_inventory_index().by_arrival, start, end)
+
+    def query_bins_by_residual_height(self, min_residual_height: float=None, max_residual_height: float=None):
+        """
+        Iterate over the bins with min_residual_height <= residual height <= max_residual_height,
+        smallest residual height first. None means unbounded.
+
+        :return: A lazy iterator of (bin_id, residual height) tuples.
+        """
+        version = self.version
+        for residual_height, bin_id in InventoryIndex.iter_range(self._get_inventory_index().by_residual_height,
+                                                                 min_residual_height, max_residual_height):
+            if self.version != version:
+                raise RuntimeError("The ASRS system was modified during the query.")
+            yield bin_id, residual_height
+
+    def _iter_items(self, sorted_list, low, high):
+        version = self.version
+        locations = self.inventory_index.locations
+        for _, item_id in InventoryIndex.iter_range(sorted_list, low, high):
+            if self.version != version:
+                raise RuntimeError("The ASRS system was modified during the query.")
+            yield self._peek_bin(locations[item_id]).items[item_id].to_dict()
+
     def visualize_bins(self, bin_id:str, save_path=None):
         """
         Visualize the current state of one bin in the ASRS system.
@@ -285,15 +691,19 @@ class ASRSManager:
         """
         item = None
         flag = False
-        for bin_obj in self.bins.values():
+        pallet_height = utils.get_adjusted_height(self.bin_dimensions[3], self.bin_dimensions[3])
+        for bin_obj in self._peek_bins_holding(item_id):
             if item_id in bin_obj.items:
                 # check if the empty pallet can be placed in the bin designated for pallets
                 for bin_id_for_pallet in self.bins_for_pallets: 
-                    item = bin_obj.items[item_id]
-                    item.reset(self.bin_dimensions[3])  # reset the item to be an empty pallet
-                    if self.bins[bin_id_for_pallet].can_place(item):
-                        self.bins[bin_id_for_pallet].place_item(item, (0, self.bins[bin_id_for_pallet].get_current_height(), 0))
-                        bin_obj.items.pop(item_id)
+                    pallet_bin = self._peek_bin(bin_id_for_pallet)
+                    if pallet_bin.height - pallet_bin.get_current_height() - pallet_height >= 0:
+                        bin_obj = self.bins[bin_obj.id]
+                        pallet_bin = self.bins[bin_id_for_pallet]
+                        item = bin_obj.remove_item(item_id)
+                        item.reset(self.bin_dimensions[3])  # reset the item to be an empty pallet
+                        pallet_bin.place_item(item, (0, pallet_bin.get_current_height(), 0))
+                        self._refresh_bins(bin_obj.id, bin_id_for_pallet)
                         flag = True # the item is successfully removed and the empty pallet is placed
                         break
                 if flag:
@@ -317,12 +727,20 @@ class ASRSManager:
         """
         closest_pallet = None
         min_distance = float('inf')
+        travel_times = self.topology.travel_times_from(entrance_position[3], entrance_position[1])
+        min_adjust_length = self.topology.min_adjust_length
 
         for bin_id in self.bins_for_pallets:
-            if self.bins[bin_id].items:  # Check if the bin is not empty
-                for item in self.bins[bin_id].items.values():
+            if self._peek_bin(bin_id).items:  # Check if the bin is not empty
+                bin_travel_times = travel_times[bin_id]
+                max_y = len(bin_travel_times) * min_adjust_length
+                for item in self._peek_bin(bin_id).items.values():
                     if item.empty:
-                        distance = self._calculate_distance_to_entrance(item, entrance_position)
+                        y = item.position[1]
+                        if y < max_y and y % min_adjust_length == 0:
+                            distance = bin_travel_times[int(y // min_adjust_length)]
+                        else:
+                            distance = self._calculate_distance_to_entrance(item, entrance_position)
                         if distance < min_distance:
                             min_distance = distance
                             closest_pallet = item
@@ -331,16 +749,533 @@ class ASRSManager:
     
     def _calculate_distance_to_entrance(self, item: Item, entrance_position=(0, 0, 0, 1)):
         """
-        A util function for calculating the Manhattan distance between an item and the entrance.
+        A util function for calculating the travel time of the crane between an item and the entrance.
 
-        :param item: The item to calculate the distance for.
+        :param item: The item to calculate the travel time for.
         :param entrance_position: The entrance position as a tuple (x, y, z, bin_id).
-        :return: Manhattan distance between the item and the entrance.
+        :return: Travel time between the item and the entrance (see `RackTopology`).
         """
-        item_position = item.position
-        return self.bin_dimensions[0] * abs(int(item.placed_bin) - int(entrance_position[3])) + \
-               abs(item_position[1] - entrance_position[1])
+        return self.topology.travel_time_from(entrance_position[3], entrance_position[1], item.placed_bin, item.position[1])
+
+    def _calculate_distance(self, bin_a, y_a, bin_b, y_b):
+        """
+        A util function for calculating the travel time of the crane between two positions in the ASRS system.
+        The arguments can be either numbers or NumPy arrays.
+
+        :param bin_a: Bin ID of the first position.
+        :param y_a: Height of the first position.
+        :param bin_b: Bin ID of the second position.
+        :param y_b: Height of the second position.
+        :return: Travel time between the two positions (see `RackTopology`).
+        """
+        return self.topology.travel_time(bin_a, y_a, bin_b, y_b)
+
+    def _get_pallet_return_slots(self, num_pallets: int) -> list:
+        """
+        Simulate where the next `num_pallets` empty pallets returned by `remove_item` will be placed.
+        Like `remove_item`, each pallet goes to the first bin in `bins_for_pallets` that still has room.
+
+        :param num_pallets: Number of empty pallets to be returned.
+        :return: A list of (bin_id, y) tuples, one per returned pallet.
+        """
+        pallet_height = utils.get_adjusted_height(self.bin_dimensions[3], self.bin_dimensions[3])
+        current_heights = {bin_id: self._peek_bin(bin_id).get_current_height() for bin_id in self.bins_for_pallets}
+        slots = []
+        for _ in range(num_pallets):
+            for bin_id in self.bins_for_pallets:
+                if self._peek_bin(bin_id).height - current_heights[bin_id] - pallet_height >= 0:
+                    slots.append((bin_id, current_heights[bin_id]))
+                    current_heights[bin_id] += pallet_height
+                    break
+            else:
+                raise ValueError(f"No suitable bin found for empty pallet {len(slots) + 1} of the retrieval wave.")
+        return slots
+
+    def _get_stored_items(self, item_ids: list) -> list[Item]:
+        """
+        Look up a list of stored (non-empty) items by their IDs with a single pass over the bins.
+
+        :param item_ids: A list of item IDs.
+        :return: A list of Item objects in the same order as `item_ids`.
+        """
+        if len(set(item_ids)) != len(item_ids):
+            raise ValueError("The requested items contain duplicated item IDs.")
+        items_by_id = {}
+        for bin_obj in self._peek_bins():
+            items_by_id.update(bin_obj.items)
+
+        items = []
+        for item_id in item_ids:
+            item = items_by_id.get(item_id)
+            if item is None or item.empty:
+                raise ValueError(f"Item {item_id} not found in any bin.")
+            items.append(item)
+        return items
+
+    def plan_retrievals(self, item_ids: list, time_limit: float=0.1) -> dict:
+        """
+        Plan the order in which a wave of items should be removed to minimise crane travel.
+        Each retrieval brings the item to the entrance and returns its empty pallet to `bins_for_pallets`,
+        exactly as `remove_item` does. The system state is not changed.
+
+        :param item_ids: A list of item IDs to be retrieved, in arrival order.
+        :param time_limit: Time budget in seconds for improving the sequence. The improvement also stops as soon as
+                           a pass over the wave gains less than 0.1 %, so small waves take far less.
+        :return: A dictionary containing the plan: {'sequence': list of item IDs, 'moves': list of dict,
+                 'planned_travel': float, 'naive_travel': float, 'saving': float}.
+        """
+        items = self._get_stored_items(item_ids)
+        pallet_slots = self._get_pallet_return_slots(len(items))
+        entrance = (self.entrance_position[3], self.entrance_position[1])
+        order, planned_travel, naive_travel = plan_retrieval_sequence(
+            item_bins=[item.placed_bin for item in items],
+            item_heights=[item.position[1] for item in items],
+            pallet_slots=pallet_slots,
+            entrance=entrance,
+            distance=self._calculate_distance,
+            time_limit=time_limit)
+
+        moves = []
+        for step, index in enumerate(order):
+            item = items[index]
+            moves.append({
+                'item_id': item.id,
+                'from_bin': item.placed_bin,
+                'from_position': item.position,
+                'pallet_return_bin': pallet_slots[step][0],
+                'pallet_return_position': (0, pallet_slots[step][1], 0),
+            })
+
+        return {
+            'sequence': [move['item_id'] for move in moves],
+            'moves': moves,
+            'planned_travel': planned_travel,
+            'naive_travel': naive_travel,
+            'saving': naive_travel - planned_travel,
+        }
     
+    def plan_dual_command_cycles(self, store_plans: list, retrieval_ids: list, crane_speed: float=1.0, handling_time: float=0.0) -> dict:
+        """
+        Pair pending stores and retrievals into dual-command cycles to minimise the empty travel of the crane.
+        In a dual-command cycle the crane stores an item on the way out and retrieves another one on the way back.
+        The pallet emptied by a retrieval is brought back to the entrance, so it is reused by the next store
+        instead of being returned to `bins_for_pallets` and fetching another one. Whatever cannot be paired
+        is executed as single-command cycles, exactly like `place_item_online` and `remove_item`.
+        The system state is not changed.
+
+        :param store_plans: A list of placement plans that can be executed one after another, e.g. returned by
+                            `place_item_online` on a `fork` of this manager. Plans made with `plan_online_placement`
+                            on the same state all take the same pallet and slot, and are rejected.
+        :param retrieval_ids: A list of item IDs to be retrieved.
+        :param crane_speed: Travel speed of the crane, in distance units per second. Keep 1.0 when the crane speeds
+                            are set in the rack topology, since the travel is then already a time in seconds.
+        :param handling_time: Time in seconds to pick up or drop off a pallet at the entrance or in a bin.
+        :return: A dictionary containing the cycles and the throughput report: {'cycles': list of dict,
+                 'dual_command_cycles': int, 'single_command_cycles': int, 'total_travel': float,
+                 'empty_travel': float, 'single_command_travel': float, 'total_time': float,
+                 'cycles_per_hour': float, 'operations_per_hour': float, 'single_command_operations_per_hour': float}.
+        """
+        pallets, slots = set(), set()
+        for plan in store_plans:
+            slot = (plan['target_bin'], tuple(plan['target_position']))
+            if plan['pallet_id'] in pallets or slot in slots:
+                raise ValueError(f"Store plans share pallet {plan['pallet_id']} or slot {slot[1]} in bin {slot[0]}. "
+                                 f"Please plan the stores one after another, e.g. with place_item_online on a fork.")
+            pallets.add(plan['pallet_id'])
+            slots.add(slot)
+        retrievals = self._get_stored_items(retrieval_ids)
+        entrance_bin, entrance_y = self.entrance_position[3], self.entrance_position[1]
+
+        def to_entrance(bin_id, y):
+            return float(self._calculate_distance(bin_id, y, entrance_bin, entrance_y))
+
+        pairs = pair_dual_command_cycles(
+            store_bins=[plan['target_bin'] for plan in store_plans],
+            store_heights=[plan['target_position'][1] for plan in store_plans],
+            retrieval_bins=[item.placed_bin for item in retrievals],
+            retrieval_heights=[item.position[1] for item in retrievals],
+            distance=self._calculate_distance)
+        paired_stores = {store_index for store_index, _ in pairs}
+        paired_retrievals = {retrieval_index for _, retrieval_index in pairs}
+        single_stores = [i for i in range(len(store_plans)) if i not in paired_stores]
+        single_retrievals = [i for i in range(len(retrievals)) if i not in paired_retrievals]
+
+        cycles = []
+        reusable_pallet = None  # (pallet_id, index of the cycle that brought it to the entrance)
+
+        def store_pallet_legs(plan):
+            # use the pallet emptied in the previous cycle, or fetch one from the bins for pallets
+            nonlocal reusable_pallet
+            if reusable_pallet is not None:
+                pallet_id, _ = reusable_pallet
+                reusable_pallet = None
+                return pallet_id, 'reused', 0.0
+            return plan['pallet_id'], 'pallet_bin', to_entrance(plan['original_pallet_placed_bin'], plan['original_pallet_position'][1])
+
+        for store_index, retrieval_index in pairs:
+            plan = store_plans[store_index]
+            item = retrievals[retrieval_index]
+            pallet_id, pallet_source, pallet_leg = store_pallet_legs(plan)
+            between = float(self._calculate_distance(plan['target_bin'], plan['target_position'][1], item.placed_bin, item.position[1]))
+            cycles.append({
+                'type': 'dual',
+                'store_plan': plan,
+                'pallet_id': pallet_id,
+                'pallet_source': pallet_source,
+                'retrieval_item_id': item.id,
+                'travel': 2 * pallet_leg + to_entrance(plan['target_bin'], plan['target_position'][1]) + between + to_entrance(item.placed_bin, item.position[1]),
+                'empty_travel': pallet_leg + between,
+            })
+            reusable_pallet = (item.id, len(cycles) - 1)
+
+        for store_index in single_stores:
+            plan = store_plans[store_index]
+            pallet_id, pallet_source, pallet_leg = store_pallet_legs(plan)
+            target_leg = to_entrance(plan['target_bin'], plan['target_position'][1])
+            cycles.append({
+                'type': 'store',
+                'store_plan': plan,
+                'pallet_id': pallet_id,
+                'pallet_source': pallet_source,
+                'retrieval_item_id': None,
+                'travel': 2 * pallet_leg + 2 * target_leg,
+                'empty_travel': pallet_leg + target_leg,
+            })
+
+        # every retrieval that is not followed by a store returns its empty pallet like `remove_item`
+        pallet_slots = self._get_pallet_return_slots(len(single_retrievals) + (reusable_pallet is not None))
+        if reusable_pallet is not None:
+            slot_leg = to_entrance(*pallet_slots.pop(0))
+            cycles[reusable_pallet[1]]['travel'] += 2 * slot_leg
+            cycles[reusable_pallet[1]]['empty_travel'] += slot_leg
+
+        for retrieval_index, slot in zip(single_retrievals, pallet_slots):
+            item = retrievals[retrieval_index]
+            item_leg = to_entrance(item.placed_bin, item.position[1])
+            slot_leg = to_entrance(*slot)
+            cycles.append({
+                'type': 'retrieval',
+                'store_plan': None,
+                'pallet_id': None,
+                'pallet_source': None,
+                'retrieval_item_id': item.id,
+                'travel': 2 * item_leg + 2 * slot_leg,
+                'empty_travel': item_leg + slot_leg,
+            })
+
+        # baseline: every store and every retrieval as its own single-command cycle
+        single_command_travel = sum(2 * to_entrance(plan['original_pallet_placed_bin'], plan['original_pallet_position'][1]) +
+                                    2 * to_entrance(plan['target_bin'], plan['target_position'][1]) for plan in store_plans)
+        single_command_travel += sum(2 * to_entrance(item.placed_bin, item.position[1]) for item in retrievals)
+        single_command_travel += sum(2 * to_entrance(*slot) for slot in self._get_pallet_return_slots(len(retrievals)))
+
+        num_operations = len(store_plans) + len(retrievals)
+        total_travel = sum(cycle['travel'] for cycle in cycles)
+        total_time = total_travel / crane_speed + handling_time * 2 * num_operations
+        single_command_time = single_command_travel / crane_speed + handling_time * 2 * num_operations
+
+        return {
+            'cycles': cycles,
+            'dual_command_cycles': len(pairs),
+            'single_command_cycles': len(cycles) - len(pairs),
+            'total_travel': total_travel,
+            'empty_travel': sum(cycle['empty_travel'] for cycle in cycles),
+            'single_command_travel': single_command_travel,
+            'total_time': total_time,
+            'cycles_per_hour': 3600 * len(cycles) / total_time if total_time > 0 else float('inf'),
+            'operations_per_hour': 3600 * num_operations / total_time if total_time > 0 else float('inf'),
+            'single_command_operations_per_hour': 3600 * num_operations / single_command_time if single_command_time > 0 else float('inf'),
+        }
+
+    def plan_pallet_prepositioning(self, forecast_inbound: int, max_moves: int=None, crane_speed: float=1.0) -> dict:
+        """
+        Plan relocations of empty pallets toward the entrance, to be executed during idle periods.
+        During an inbound peak every placement fetches the empty pallet closest to the entrance (`get_closest_pallet`),
+        so the pallets that will be used by the forecast inbound volume are moved as close to the entrance as
+        `bins_for_pallets` allows. The system state is not changed; use `execute_pallet_prepositioning` to apply the plan.
+
+        :param forecast_inbound: Number of items expected to be placed before the next idle period.
+        :param max_moves: Maximum number of relocations to plan. None means no limit.
+        :param crane_speed: Travel speed of the crane, in distance units per second. Keep 1.0 when the crane speeds
+                            are set in the rack topology, since the travel is then already a time in seconds.
+        :return: A dictionary containing the plan: {'moves': list of dict, 'fetch_travel_before': float,
+                 'fetch_travel_after': float, 'expected_saving': float, 'expected_time_saving': float, 'relocation_travel': float}.
+        """
+        entrance_bin, entrance_y = self.entrance_position[3], self.entrance_position[1]
+
+        def distance_to_entrance(bin_id, y):
+            return float(self._calculate_distance(bin_id, y, entrance_bin, entrance_y))
+
+        pallets = []
+        bin_tops = {}
+        for bin_id in self.bins_for_pallets:
+            bin_obj = self._peek_bin(bin_id)
+            bin_tops[bin_id] = [item.position[1] + utils.get_adjusted_height(item.placed_dimensions[1], bin_obj.min_adjust_length)
+                                for item in bin_obj.items.values()]
+            pallets.extend((item.id, bin_id, item.position[1]) for item in bin_obj.items.values() if item.empty)
+
+        moves, travel_before, travel_after = plan_pallet_moves(
+            pallets=pallets,
+            bin_tops=bin_tops,
+            bin_heights={bin_id: self._peek_bin(bin_id).height for bin_id in self.bins_for_pallets},
+            pallet_height=utils.get_adjusted_height(self.bin_dimensions[3], self.bin_dimensions[3]),
+            forecast_inbound=forecast_inbound,
+            distance_to_entrance=distance_to_entrance,
+            max_moves=max_moves)
+
+        # each relocation is a cycle of its own: entrance -> pallet -> new position -> entrance
+        relocation_travel = sum(distance_to_entrance(from_bin, from_y) +
+                                float(self._calculate_distance(from_bin, from_y, to_bin, to_y)) +
+                                distance_to_entrance(to_bin, to_y)
+                                for _, from_bin, from_y, to_bin, to_y in moves)
+        return {
+            'moves': [{
+                'pallet_id': pallet_id,
+                'from_bin': from_bin,
+                'from_position': (0, from_y, 0),
+                'to_bin': to_bin,
+                'to_position': (0, to_y, 0),
+            } for pallet_id, from_bin, from_y, to_bin, to_y in moves],
+            'fetch_travel_before': travel_before,
+            'fetch_travel_after': travel_after,
+            'expected_saving': travel_before - travel_after,
+            'expected_time_saving': (travel_before - travel_after) / crane_speed,
+            'relocation_travel': relocation_travel,
+        }
+
+    def execute_pallet_prepositioning(self, plan: dict) -> bool:
+        """
+        Execute the relocations planned by `plan_pallet_prepositioning`.
+        The relocations are applied on a fork and committed together, so either all of them are executed or, when one
+        of them is no longer possible (the bins changed since the plan was made), none is.
+
+        :param plan: A dictionary returned by `plan_pallet_prepositioning`.
+        :return: Boolean indicating whether all the relocations were executed.
+        """
+        forked = self.fork()
+        for move in plan['moves']:
+            from_bin = forked.bins[move['from_bin']]
+            to_bin = forked.bins[move['to_bin']]
+            pallet = from_bin.items.get(move['pallet_id'])
+            if pallet is None or not pallet.empty or pallet.position != move['from_position']:
+                print(f"Pallet {move['pallet_id']} is no longer at {move['from_position']} in bin {move['from_bin']}. Please plan the relocations again.")
+                return False
+
+            from_bin.remove_item(pallet.id)
+            if not to_bin.can_place(pallet) or to_bin.get_current_height() != move['to_position'][1]:
+                print(f"Pallet {pallet.id} cannot be moved to {move['to_position']} in bin {move['to_bin']}. Please plan the relocations again.")
+                return False
+            to_bin.place_item(pallet, move['to_position'])
+            forked._refresh_bins(move['from_bin'], move['to_bin'])
+        self.commit(forked)
+        return True
+
+    def _get_config(self) -> dict:
+        """
+        :return: The configuration of the manager as a JSON-serializable dictionary.
+        """
+        return {
+            'online_priority': list(self.online_priority),
+            'offline_priority': list(self.offline_priority),
+            'bin_dimensions': list(self.bin_dimensions),
+            'weight_limit': self.weight_limit,
+            'load_limit': self.load_limit,
+            'bins_for_pallets': list(self.bins_for_pallets),
+            'num_pallets': self.num_pallets,
+            'entrance_position': list(self.entrance_position),
+            'topology': self._get_topology_config(),
+            'adaptive_priority': self.adaptive_priority_config,
+        }
+
+    def _get_topology_config(self):
+        if self.topology_config is None:
+            return None
+        config = dict(self.topology_config)
+        if isinstance(config.get('bins'), dict):
+            # JSON keys are strings, so the bins are saved as [bin_id, bay, level] rows
+            config['bins'] = [[bin_id, bay, level] for bin_id, (bay, level) in config['bins'].items()]
+        return config
+
+    def _set_config(self, config: dict):
+        """
+        Set the configuration of a manager created without `__init__` from a dictionary returned by `_get_config`.
+        """
+        self.online_priority = config['online_priority']
+        self.offline_priority = config['offline_priority']
+        self.bin_dimensions = tuple(config['bin_dimensions'])
+        self.weight_limit = config['weight_limit']
+        self.load_limit = config.get('load_limit', None)
+        self.bins_for_pallets = config['bins_for_pallets']
+        self.num_pallets = config['num_pallets']
+        self.entrance_position = config['entrance_position']
+        self.version = 0
+        self._fork_parent = None
+        self.occupancy_publisher = None
+        self.topology_config = config.get('topology')
+        self.adaptive_priority_config = config.get('adaptive_priority')
+        self._initialize_topology()
+
+    def publish_occupancy(self, path):
+        """
+        Publish the occupancy of every bin (residual height, number of items and empty pallets, load and version)
+        to a memory-mapped file that is updated after every change. Other processes read it with
+        `occupancy_view.OccupancyReader` without calling into the manager.
+
+        :param path: Path of the file to write, e.g. under /dev/shm.
+        """
+        if self.occupancy_publisher is not None:
+            self.occupancy_publisher.close()
+        self.occupancy_publisher = OccupancyPublisher(path, self._peek_bins(), self.version)
+
+    def save(self, path):
+        """
+        Save the full state of the ASRS system (configuration, bins, items and empty pallets) to a compact
+        columnar `.npz` file. Use `ASRSManager.load` to restore it.
+
+        :param path: Path of the snapshot file.
+        """
+        snapshot.save_columns(path, snapshot.bins_to_columns(self.bins), self._get_config())
+
+    @classmethod
+    def load(cls, path) -> 'ASRSManager':
+        """
+        Restore an ASRS system saved with `save`.
+
+        :param path: Path of the snapshot file.
+        :return: A new ASRSManager with the saved state.
+        """
+        columns, config = snapshot.load_columns(path)
+
+        manager = cls.__new__(cls)
+        manager._set_config(config)
+
+        bin_ids = snapshot.bin_ids(columns)
+        manager._initialize_bins(snapshot.bin_sizes(columns))
+        if set(bin_ids) != set(manager.bins):
+            raise ValueError(f"The bins in {path} do not match its configuration.")
+
+        current_heights = columns['bin_current_height'].tolist()
+        current_loads = columns['bin_current_load'].tolist() if 'bin_current_load' in columns else [None] * len(bin_ids)
+        for bin_id, items, current_height, current_load in zip(bin_ids, snapshot.item_loaders(columns), current_heights, current_loads):
+            manager.bins[bin_id].load_items(items, current_height, current_load)
+        manager._initialize_indexes()
+        return manager
+
+    @classmethod
+    def open(cls, storage_path, cache_size: int=1000) -> 'ASRSManager':
+        """
+        Continue with an ASRS system kept in an SQLite database, e.g. after a restart.
+        Only the bins are read; the items of a bin are read when the bin is first accessed.
+
+        :param storage_path: Path of a database created with the `storage_path` parameter.
+        :param cache_size: Maximum number of bins whose items are kept in memory.
+        :return: A new ASRSManager working on the database.
+        """
+        storage = SQLiteBins(storage_path, cache_size=cache_size)
+        config = storage.read_config()
+        if config is None:
+            storage.close()
+            raise ValueError(f"{storage_path} does not contain an ASRS system.")
+
+        manager = cls.__new__(cls)
+        manager._set_config(config)
+        storage.pinned = set(manager.bins_for_pallets)
+        manager.bins = storage
+        manager.bin_sizes = {bin_id: (bin.width, bin.height, bin.depth) for bin_id, bin in storage.bins.items()}
+        manager._initialize_indexes()
+        return manager
+
+    def close(self):
+        """
+        Close the storage backend and the occupancy view, if any. The manager must not be used afterwards.
+        """
+        close = getattr(self.bins, 'close', None)
+        if close is not None:
+            close()
+        if self.occupancy_publisher is not None:
+            self.occupancy_publisher.close()
+
+    def diff(self, other: 'ASRSManager', include_pallets: bool=False) -> dict:
+        """
+        Compare the items of this ASRS system with another one, e.g. a snapshot taken before a reorganization.
+        `self` is treated as the old state and `other` as the new state.
+
+        :param other: The ASRSManager to compare with.
+        :param include_pallets: Whether empty pallets are compared as well.
+        :return: A dictionary {'moved': list of dict, 'added': list of item IDs, 'removed': list of item IDs}.
+                 Each moved entry contains the item ID and its bin and position before and after.
+        """
+        def locations(manager):
+            return {item.id: (item.placed_bin, tuple(item.position))
+                    for bin_obj in manager._peek_bins()
+                    for item in bin_obj.items.values()
+                    if include_pallets or not item.empty}
+
+        old, new = locations(self), locations(other)
+        moved = []
+        for item_id, (old_bin, old_position) in old.items():
+            if item_id in new and new[item_id] != (old_bin, old_position):
+                new_bin, new_position = new[item_id]
+                moved.append({
+                    'id': item_id,
+                    'from_bin': old_bin,
+                    'from_position': old_position,
+                    'to_bin': new_bin,
+                    'to_position': new_position,
+                })
+        return {
+            'moved': moved,
+            'added': [item_id for item_id in new if item_id not in old],
+            'removed': [item_id for item_id in old if item_id not in new],
+        }
+
+    def fork(self) -> 'ASRSManager':
+        """
+        Create a copy-on-write copy of the ASRS system to evaluate what-if plans.
+        The fork shares the bins of this manager and only copies a bin when the fork accesses it,
+        so it is cheap to create and to discard. Apply its changes with `commit`, or just drop it.
+        This manager must not be modified while the fork is in use.
+
+        :return: A new ASRSManager sharing the state of this one.
+        """
+        forked = copy.copy(self)
+        forked.bins = CopyOnWriteBins(self.bins)
+        forked.online_index = self.online_index.copy(forked.bins)
+        if self.adaptive_priority is not None:
+            forked.adaptive_priority = self.adaptive_priority.copy(forked.bins, forked.online_index)
+        forked.inventory_index = self.inventory_index.copy() if self.inventory_index is not None else None
+        forked._fork_parent = (self, self.version)
+        forked.occupancy_publisher = None  # only the committed state is published
+        return forked
+
+    def commit(self, forked: 'ASRSManager') -> list:
+        """
+        Apply the changes of a fork created with `fork` to this manager. The fork must not be used afterwards.
+
+        :param forked: A fork of this manager.
+        :return: A list of the IDs of the bins taken over from the fork.
+        """
+        if forked._fork_parent is None or forked._fork_parent[0] is not self:
+            raise ValueError("The manager to commit is not a fork of this manager.")
+        if forked._fork_parent[1] != self.version:
+            raise ValueError("The manager was modified after the fork was created. Please fork again.")
+
+        changed_bins = list(forked.bins.materialized)
+        for bin_id in changed_bins:
+            self.bins[bin_id] = forked.bins.materialized[bin_id]
+        for bin_id in forked.bins.deleted:
+            del self.bins[bin_id]
+        self.online_index = forked.online_index.copy(self.bins)
+        if forked.adaptive_priority is not None:
+            self.adaptive_priority = forked.adaptive_priority.copy(self.bins, self.online_index)
+        self.inventory_index = forked.inventory_index
+        self.version = forked.version
+        self._flush_bins(changed_bins)
+        if self.occupancy_publisher is not None:
+            self.occupancy_publisher.update([self.bins[bin_id] for bin_id in changed_bins], self.version)
+        forked._fork_parent = None
+        return changed_bins
+
     def batch_place_items(self, items: list[Item]) -> dict:
         """
         Place a batch of items in the ASRS system. These items' all information (including placed bin, position, etc.) should be provided in advanced.
@@ -357,6 +1292,7 @@ class ASRSManager:
             if placed_bin is None:
                 raise ValueError (f"Item {item.id} does not have a placed bin. Please check the item configurations.")
             self.bins[placed_bin].place_item(item, item.position)
+            self._refresh_bins(placed_bin)
             results[item.id] = {
                 'placed_bin': placed_bin if placed_bin else None,
                 'position': item.position,
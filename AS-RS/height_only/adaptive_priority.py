@@ -0,0 +1,143 @@
+import copy
+import heapq
+
+
+class AdaptivePriority:
+    """
+    Online placement priority computed from the live state of the bins instead of a static list.
+
+    Every bin has a score computed from the travel time between the entrance and the slot where the next item
+    would be stored (the top of the bin) and from its residual height; bins with lower scores are tried first.
+    The scores are kept in a heap that is updated incrementally with `update` when a bin changes. Outdated heap
+    entries are skipped when they are reached and dropped when the heap is rebuilt. Full bins, which cannot take
+    even the lowest item (their residual height is below `min_adjust_length`), are kept out of the heap until
+    items are removed from them, so queries on a nearly full rack do not walk over them.
+
+    :param bins: A dictionary of Bin objects {id: Bin}.
+    :param bin_ids: The IDs of the bins to order.
+    :param travel_time: A function travel_time(bin_id, y) from the entrance to a height in a bin.
+    :param score: A function score(travel_time, residual_height) -> float. Lower scores are tried first.
+    :param capacity_index: The CapacityClassIndex of the same bins, used to skip the bins that cannot hold an item.
+    """
+    def __init__(self, bins, bin_ids: list, travel_time, score, capacity_index):
+        self.bins = bins
+        self.bin_ids = list(bin_ids)
+        self.travel_time = travel_time
+        self.score = score
+        self.capacity_index = capacity_index
+        self.queries = 0  # number of iter_first_fit calls
+        self.probes = 0  # number of bins returned by iter_first_fit
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        Recompute the score of every bin, e.g. after the entrance or the score function changed.
+        """
+        self.scores = {}
+        self.full = set()  # bins left out of the heap
+        for bin_id in self.bin_ids:
+            self.scores[bin_id], full = self._state(bin_id)
+            if full:
+                self.full.add(bin_id)
+        # ties are broken by the position in bin_ids
+        self.ranks = {bin_id: rank for rank, bin_id in enumerate(self.bin_ids)}
+        self._rebuild_heap()
+
+    def _rebuild_heap(self):
+        self.heap = [(score, self.ranks[bin_id], bin_id) for bin_id, score in self.scores.items() if bin_id not in self.full]
+        heapq.heapify(self.heap)
+
+    def copy(self, bins, capacity_index) -> 'AdaptivePriority':
+        """
+        Create an independent copy for another dictionary of bins with the same content and its capacity index.
+        The bins are not read, so this also works on copy-on-write bins.
+        """
+        priority_copy = copy.copy(self)
+        priority_copy.bins = bins
+        priority_copy.capacity_index = capacity_index
+        priority_copy.scores = dict(self.scores)
+        priority_copy.full = set(self.full)
+        priority_copy.heap = list(self.heap)
+        return priority_copy
+
+    def _state(self, bin_id):
+        """
+        :return: A tuple (score of the bin, whether the bin is full).
+        """
+        peek = getattr(self.bins, 'peek', None)
+        bin = peek(bin_id) if peek is not None else self.bins[bin_id]
+        residual_height = bin.get_residual_height()
+        full = residual_height <= 0 or residual_height < bin.min_adjust_length
+        return self.score(self.travel_time(bin_id, bin.get_current_height()), residual_height), full
+
+    def update(self, bin_id):
+        """
+        Refresh the score of a bin after items were placed into or removed from it.
+        Bins that are not ordered by this priority are ignored.
+        """
+        if bin_id not in self.scores:
+            return
+        score, full = self._state(bin_id)
+        was_full = bin_id in self.full
+        changed = score != self.scores[bin_id]
+        self.scores[bin_id] = score
+        if full:
+            self.full.add(bin_id)  # its heap entries are outdated from now on
+        elif was_full or changed:
+            self.full.discard(bin_id)
+            heapq.heappush(self.heap, (score, self.ranks[bin_id], bin_id))
+        if len(self.heap) > 2 * (len(self.scores) - len(self.full)):
+            self._rebuild_heap()
+
+    def order(self) -> list:
+        """
+        :return: The IDs of all the bins, lowest score first.
+        """
+        return sorted(self.scores, key=lambda bin_id: (self.scores[bin_id], self.ranks[bin_id]))
+
+    def iter_first_fit(self, item):
+        """
+        Iterate over the bins that have enough residual height for the item, lowest score first.
+        The heap is walked in order without popping entries, so an abandoned iteration leaves it intact.
+        The heap must not be updated during the iteration.
+
+        :param item: Item object to be placed.
+        :return: A generator of (bin_id, placed_dimensions) tuples.
+        """
+        self.queries += 1
+        # classes where no bin has enough residual height left (tree[1] is the largest one) are not searched
+        fits = {id(capacity_class): (capacity_class, placed_dimensions, adjusted_height)
+                for capacity_class, placed_dimensions, adjusted_height in self.capacity_index.fitting_classes(item)
+                if capacity_class.tree[1] >= adjusted_height}
+        if not fits:
+            return
+
+        heap = self.heap
+        frontier = [(heap[0], 0)] if heap else []
+        seen = set()  # a bin may have several up-to-date entries if its score returned to an earlier value
+        while frontier:
+            (score, _, bin_id), index = heapq.heappop(frontier)
+            for child in (2 * index + 1, 2 * index + 2):
+                if child < len(heap):
+                    heapq.heappush(frontier, (heap[child], child))
+            if self.scores[bin_id] != score or bin_id in seen or bin_id in self.full:
+                continue  # outdated entry
+            seen.add(bin_id)
+            fit = fits.get(id(self.capacity_index.class_of_bin.get(bin_id)))
+            if fit is None:
+                continue
+            capacity_class, placed_dimensions, adjusted_height = fit
+            if capacity_class.residual_heights[capacity_class.positions[bin_id]] < adjusted_height:
+                continue
+            self.probes += 1
+            yield bin_id, placed_dimensions
+
+
+def weighted_score(travel_weight: float=1.0, residual_weight: float=0.0):
+    """
+    Create the default score function: travel_weight * travel time - residual_weight * residual height.
+    A positive residual_weight prefers bins with more free height, keeping nearly full bins for small items.
+    """
+    def score(travel_time, residual_height):
+        return travel_weight * travel_time - residual_weight * residual_height
+    return score
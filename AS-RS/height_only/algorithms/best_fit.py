@@ -3,7 +3,7 @@ from bin import Bin
 from item import Item
 import utils
 
-def best_fit(items:list, all_bins, bin_dimensions, offline_priority=None):
+def best_fit(items:list, all_bins, bin_dimensions, offline_priority=None, capacity_index=None):
     """
     Applies the offline Best Fit algorithm to pack 3D items into bins.
 
@@ -11,12 +11,20 @@ def best_fit(items:list, all_bins, bin_dimensions, offline_priority=None):
     an optimal, height-minimized orientation. It then searches all existing
     bins to find the placement that results in the lowest new total height.
     If no suitable space is found in existing bins, a new bin is created.
+    Bins whose weight limits (`Bin.can_carry`) do not allow an item are skipped.
 
     :param items: A list of Item objects to be packed.
     :param bin_dimensions: A tuple representing the dimensions
                             (width, height, depth, min_adjust_length) of the bins.
+    :param capacity_index: Optional CapacityClassIndex built on `offline_priority` with empty bins. If it is given,
+                           bins may have different dimensions, and only the capacity classes that can hold an item are
+                           inspected. Items that fit the fewest classes are placed first, so tall
+                           items get the tall bays before short items fill them.
     :return: list of unplaced Item objects).
     """
+    if capacity_index is not None:
+        return _best_fit_with_index(items, all_bins, capacity_index)
+
     # put down all the items in the bins if needed. The codes for this part has not been implemented yet.
     # for bin in all_bins.values():
     #     sorted_items = sorted(items, key=lambda item: item.position[1])
@@ -49,6 +57,8 @@ def best_fit(items:list, all_bins, bin_dimensions, offline_priority=None):
 
         for bin_id in offline_priority:
             bin = all_bins[bin_id]
+            if not bin.can_carry(item):
+                continue
             position = (0, bin.get_current_height(), 0)
             
             adjusted_item_height = utils.get_adjusted_height(item.placed_dimensions[1], bin.min_adjust_length)
@@ -70,4 +80,40 @@ def best_fit(items:list, all_bins, bin_dimensions, offline_priority=None):
         else:
             unplaced_items.append(item)
 
+    return unplaced_items
+
+def _best_fit_with_index(items:list, all_bins, capacity_index):
+    unplaced_items = []
+    placeable_items = []
+    for item in items:
+        fitting_classes = capacity_index.fitting_classes(item)
+        if not fitting_classes:
+            unplaced_items.append(item)
+            continue
+        # the lowest orientation over all the classes that can hold the item
+        item.placed_dimensions = min((fit[1] for fit in fitting_classes), key=lambda d: d[1])
+        placeable_items.append((len(fitting_classes), item))
+
+    # items that fit the fewest capacity classes go first, so they get their bays before other items fill them.
+    # Within the same number of classes, sort items by height in descending order after rotation
+    placeable_items.sort(key=lambda i: (i[0], -i[1].placed_dimensions[1]))
+
+    # without any weight limit every bin can carry every item, so the per-bin check is skipped
+    peek = getattr(all_bins, 'peek', None)
+    weight_limited = any(bin.weight_limit is not None or bin.load_limit is not None
+                         for bin in (peek(bin_id) if peek is not None else all_bins[bin_id] for bin_id in capacity_index.priority))
+
+    for _, item in placeable_items:
+        accept = None
+        if weight_limited and item.weight is not None:
+            accept = lambda bin_id: all_bins[bin_id].can_carry(item)
+        best = capacity_index.best_fit(item, accept=accept)
+        if best is None:
+            unplaced_items.append(item)
+            continue
+        best_bin_id, item.placed_dimensions = best
+        best_bin = all_bins[best_bin_id]
+        best_bin.place_item(item, (0, best_bin.get_current_height(), 0))
+        capacity_index.update(best_bin_id)
+
     return unplaced_items
\ No newline at end of file
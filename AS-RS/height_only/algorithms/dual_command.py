@@ -0,0 +1,43 @@
+import numpy as np
+
+
+def pair_dual_command_cycles(store_bins, store_heights, retrieval_bins, retrieval_heights, distance):
+    """
+    Pairs pending stores and retrievals into dual-command cycles.
+
+    In a dual-command cycle the crane leaves the entrance with the item to store, drops it at
+    its target, travels empty to the item to retrieve and brings it back to the entrance.
+    The only empty travel of such a cycle is the leg from the store target to the retrieval,
+    so the pairs are chosen greedily by the shortest of these legs (nearest-neighbour pairing).
+
+    :param store_bins: Array of target bin IDs of the stores.
+    :param store_heights: Array of target y-positions of the stores.
+    :param retrieval_bins: Array of bin IDs of the items to retrieve.
+    :param retrieval_heights: Array of y-positions of the items to retrieve.
+    :param distance: A function distance(bin_a, y_a, bin_b, y_b) that accepts NumPy arrays.
+    :return: A list of (store_index, retrieval_index) tuples, shortest empty leg first.
+    """
+    store_bins = np.asarray(store_bins, dtype=float)
+    store_heights = np.asarray(store_heights, dtype=float)
+    retrieval_bins = np.asarray(retrieval_bins, dtype=float)
+    retrieval_heights = np.asarray(retrieval_heights, dtype=float)
+    if len(store_bins) == 0 or len(retrieval_bins) == 0:
+        return []
+
+    # empty leg of every possible pair: rows are stores, columns are retrievals
+    legs = distance(store_bins[:, None], store_heights[:, None], retrieval_bins[None, :], retrieval_heights[None, :])
+
+    num_pairs = min(len(store_bins), len(retrieval_bins))
+    store_used = np.zeros(len(store_bins), dtype=bool)
+    retrieval_used = np.zeros(len(retrieval_bins), dtype=bool)
+    pairs = []
+    for flat_index in np.argsort(legs, axis=None, kind='stable'):
+        store_index, retrieval_index = divmod(int(flat_index), len(retrieval_bins))
+        if store_used[store_index] or retrieval_used[retrieval_index]:
+            continue
+        store_used[store_index] = True
+        retrieval_used[retrieval_index] = True
+        pairs.append((store_index, retrieval_index))
+        if len(pairs) == num_pairs:
+            break
+    return pairs
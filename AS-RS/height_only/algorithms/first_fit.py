@@ -2,7 +2,7 @@ from bin import Bin
 import utils
 from item import Item
 
-def first_fit(item_to_place:Item, all_bins, online_priority:list, bin_dimensions:tuple, best_pallet: Item):
+def first_fit(item_to_place:Item, all_bins, online_priority:list, bin_dimensions:tuple, best_pallet: Item, capacity_index=None, priority=None):
     """
     Implements the First Fit algorithm for placing an item into bins.
 
@@ -10,24 +10,34 @@ def first_fit(item_to_place:Item, all_bins, online_priority:list, bin_dimensions
     :param all_bins: A dictionary of Bin objects {id: Bin}.
     :param online_priority: A list of bin IDs representing the order in which to try placing the item.
     :param bin_dimensions: A tuple representing the dimensions of the bins (width, height, depth, min_adjust_length).
+    :param capacity_index: Optional CapacityClassIndex built on `online_priority`. If it is given, only the bins
+                           of the capacity classes that can hold the item and have enough residual height are inspected.
+    :param priority: Optional AdaptivePriority built on `capacity_index`. If it is given, the bins are tried in the order
+                     of its live scores instead of the order of `online_priority`.
     :return: The ID of the bin where the item
     """
 
-    item_dimension = utils.get_optimal_dimension(item_to_place, bin_dimensions)
-    
-    if item_dimension is None:
-        raise ValueError (f"Item {item_to_place.id} cannot be placed due to dimension constraints.")
-        # item_to_place.placed_bin = None
-        # item_to_place.position = None
-        # item_to_place.placed_dimensions = None
-        # return None
+    if capacity_index is not None:
+        if all(utils.get_optimal_dimension(item_to_place, capacity_class.dimensions) is None for capacity_class in capacity_index.classes):
+            raise ValueError (f"Item {item_to_place.id} cannot be placed due to dimension constraints.")
+        candidates = (priority if priority is not None else capacity_index).iter_first_fit(item_to_place)
+        candidate_bin_ids = (bin_id for bin_id, _ in candidates)
+    else:
+        item_dimension = utils.get_optimal_dimension(item_to_place, bin_dimensions)
+
+        if item_dimension is None:
+            raise ValueError (f"Item {item_to_place.id} cannot be placed due to dimension constraints.")
+            # item_to_place.placed_bin = None
+            # item_to_place.position = None
+            # item_to_place.placed_dimensions = None
+            # return None
+        candidate_bin_ids = online_priority
 
     best_bin = None
-    for bin_id in online_priority:
+    for bin_id in candidate_bin_ids:
         bin = all_bins[bin_id]
-        if bin.weight_limit != None:
-            if bin.weight_limit < item_to_place.weight:
-                continue
+        if not bin.can_carry(item_to_place):
+            continue
         if bin.can_place(item_to_place):
             best_bin = bin
             break
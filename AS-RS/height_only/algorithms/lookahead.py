@@ -0,0 +1,114 @@
+import bisect
+import time
+
+
+def plan_lookahead(items, capacity_index, bins, distance_to_entrance, new_bin_cost, beam_width=8, time_limit=0.01):
+    """
+    Plans the order and the bins of a buffer of incoming items with a beam search over the residual heights.
+
+    A state is the set of buffered items that are not placed yet and the residual heights (and added loads) of the bins
+    that the plan has used so far; all the other bins keep the residual heights of `capacity_index`. Residual heights
+    are multiples of `min_adjust_length`, so many orders lead to the same state and only the cheapest one is kept.
+    For every item and capacity class that can hold it, two bins are tried: the first bin in priority order (what
+    first fit would take) and the bin with the tightest fit. The cost of a placement is the travel time from the
+    entrance to the slot, plus `new_bin_cost` if the bin was empty.
+
+    :param items: A list of the buffered Item objects.
+    :param capacity_index: The CapacityClassIndex of the bins to place the items into.
+    :param bins: A dictionary of Bin objects {id: Bin}, only read for the weight limits and loads.
+    :param distance_to_entrance: A function distance_to_entrance(bin_id, y).
+    :param new_bin_cost: Cost added for placing an item into an empty bin.
+    :param beam_width: Number of states kept after every placement.
+    :param time_limit: Time budget in seconds. When it runs out, the best plan found so far is returned.
+    :return: A tuple (sequence, cost) where sequence is a list of (item index, bin_id, placed_dimensions, y) tuples
+             in the planned order; items that cannot be placed are missing from it.
+    """
+    deadline = time.perf_counter() + time_limit
+    fits = [capacity_index.fitting_classes(item) for item in items]
+    weights = [item.weight for item in items]
+
+    def can_carry(bin_id, weight, added_load):
+        if weight is None:
+            return True
+        bin = bins[bin_id]
+        if bin.weight_limit is not None and bin.weight_limit < weight:
+            return False
+        return bin.load_limit is None or bin.get_current_load() + added_load + weight <= bin.load_limit
+
+    def candidates(index, overlay):
+        weight = weights[index]
+        found = {}
+        for capacity_class, placed_dimensions, adjusted_height in fits[index]:
+            # first fit: the bin with the lowest rank among the untouched and the touched bins that can take the item
+            first = None
+            position = capacity_class.first_fit(adjusted_height)
+            while position is not None:
+                bin_id = capacity_class.bin_ids[position]
+                if bin_id not in overlay and can_carry(bin_id, weight, 0):
+                    first = (capacity_class.ranks[position], bin_id)
+                    break
+                position = capacity_class.first_fit(adjusted_height, start=position + 1)
+
+            # best fit: the untouched or touched bin with the smallest residual height that can take the item
+            best = None
+            i = bisect.bisect_left(capacity_class.sorted_residuals, (adjusted_height, -1))
+            while i < len(capacity_class.sorted_residuals):
+                residual_height, rank = capacity_class.sorted_residuals[i]
+                bin_id = capacity_index.priority[rank]
+                if bin_id not in overlay and can_carry(bin_id, weight, 0):
+                    best = (residual_height, rank, bin_id)
+                    break
+                i += 1
+
+            for bin_id, (residual_height, added_load) in overlay.items():
+                if capacity_index.class_of_bin.get(bin_id) is not capacity_class:
+                    continue
+                if residual_height < adjusted_height or not can_carry(bin_id, weight, added_load):
+                    continue
+                rank = capacity_index.ranks[bin_id]
+                if first is None or rank < first[0]:
+                    first = (rank, bin_id)
+                if best is None or (residual_height, rank) < best[:2]:
+                    best = (residual_height, rank, bin_id)
+
+            for choice in (first and first[1], best and best[2]):
+                if choice is not None and choice not in found:
+                    found[choice] = (capacity_class, placed_dimensions, adjusted_height)
+        return found
+
+    # state: (cost, remaining item indexes, overlay {bin_id: (residual height, added load)}, sequence)
+    beam = [(0.0, tuple(range(len(items))), {}, [])]
+    finished = []  # states in which none of the remaining items can be placed
+    while beam:
+        expanded = {}
+        out_of_time = False
+        for cost, remaining, overlay, sequence in beam:
+            if expanded and time.perf_counter() > deadline:
+                out_of_time = True
+                break
+            expandable = False
+            for index in remaining:
+                for bin_id, (capacity_class, placed_dimensions, adjusted_height) in candidates(index, overlay).items():
+                    expandable = True
+                    residual_height, added_load = overlay.get(
+                        bin_id, (capacity_class.residual_heights[capacity_class.positions[bin_id]], 0))
+                    y = capacity_class.dimensions[1] - residual_height
+                    step_cost = distance_to_entrance(bin_id, y) + (new_bin_cost if y == 0 else 0)
+                    child_overlay = dict(overlay)
+                    child_overlay[bin_id] = (residual_height - adjusted_height, added_load + (weights[index] or 0))
+                    child_remaining = tuple(i for i in remaining if i != index)
+                    key = (child_remaining, frozenset(child_overlay.items()))
+                    child_cost = cost + step_cost
+                    if key not in expanded or child_cost < expanded[key][0]:
+                        expanded[key] = (child_cost, child_remaining, child_overlay, sequence + [(index, bin_id, placed_dimensions, y)])
+            if not expandable:
+                finished.append((cost, remaining, overlay, sequence))
+        if not expanded:
+            break
+        beam = sorted(expanded.values(), key=lambda state: state[0])[:beam_width]
+        if out_of_time or not beam[0][1]:
+            break
+
+    # prefer plans that place more items, then cheaper ones
+    best = min(beam + finished, key=lambda state: (len(state[1]), state[0]))
+    return best[3], best[0]
@@ -0,0 +1,63 @@
+import bisect
+
+
+def plan_pallet_moves(pallets, bin_tops, bin_heights, pallet_height, forecast_inbound, distance_to_entrance, max_moves=None):
+    """
+    Plans relocations of empty pallets toward the entrance before an inbound peak.
+
+    Every placement fetches the empty pallet closest to the entrance, so the next `forecast_inbound`
+    placements will use the `forecast_inbound` closest pallets. The planner repeatedly takes the farthest
+    of these pallets and moves it to the top of the pallet bin stack closest to the entrance, as long as
+    this brings the pallet closer. Pallets are only ever placed on top of a stack, like `remove_item` does.
+
+    :param pallets: A list of (pallet_id, bin_id, y) tuples of the empty pallets.
+    :param bin_tops: A dictionary {bin_id: list of the top heights of every item in the bin} for the bins for pallets.
+    :param bin_heights: A dictionary {bin_id: height of the bin} for the bins for pallets.
+    :param pallet_height: Adjusted height of an empty pallet.
+    :param forecast_inbound: Number of placements expected before the next idle period.
+    :param distance_to_entrance: A function distance_to_entrance(bin_id, y).
+    :param max_moves: Maximum number of relocations to plan. None means no limit.
+    :return: A tuple (moves, travel_before, travel_after) where moves is a list of
+             (pallet_id, from_bin, from_y, to_bin, to_y) tuples and travel is the round-trip fetch travel
+             of the forecast placements before and after the moves.
+    """
+    positions = {pallet_id: (bin_id, y) for pallet_id, bin_id, y in pallets}
+    tops = {bin_id: sorted(item_tops) for bin_id, item_tops in bin_tops.items()}
+    num_demanded = min(forecast_inbound, len(positions))
+
+    def fetch_travel():
+        distances = sorted(distance_to_entrance(*position) for position in positions.values())
+        return 2 * sum(distances[:num_demanded])
+
+    travel_before = fetch_travel()
+    moves = []
+    while num_demanded > 0 and (max_moves is None or len(moves) < max_moves):
+        # the farthest pallet among the ones the forecast placements will use
+        demanded = sorted(positions, key=lambda pallet_id: distance_to_entrance(*positions[pallet_id]))[:num_demanded]
+        pallet_id = demanded[-1]
+        from_bin, from_y = positions[pallet_id]
+        current_distance = distance_to_entrance(from_bin, from_y)
+
+        # lift the pallet first: if it is the top of its stack, the stack gets lower
+        from_tops = tops[from_bin]
+        from_tops.pop(bisect.bisect_left(from_tops, from_y + pallet_height))
+
+        best_slot = None
+        for bin_id, item_tops in tops.items():
+            top = item_tops[-1] if item_tops else 0
+            if bin_heights[bin_id] - top - pallet_height < 0:
+                continue
+            distance = distance_to_entrance(bin_id, top)
+            if best_slot is None or distance < best_slot[0]:
+                best_slot = (distance, bin_id, top)
+
+        if best_slot is None or best_slot[0] >= current_distance:
+            bisect.insort(from_tops, from_y + pallet_height)
+            break
+
+        _, to_bin, to_y = best_slot
+        bisect.insort(tops[to_bin], to_y + pallet_height)
+        positions[pallet_id] = (to_bin, to_y)
+        moves.append((pallet_id, from_bin, from_y, to_bin, to_y))
+
+    return moves, travel_before, fetch_travel()
@@ -0,0 +1,83 @@
+import time
+import numpy as np
+
+
+def plan_retrieval_sequence(item_bins, item_heights, pallet_slots, entrance, distance, time_limit=0.1, min_improvement=1e-3):
+    """
+    Sequences a wave of retrievals so that the empty travel of the crane is minimised.
+
+    Every retrieval is a single command cycle: the crane travels to the item, brings it to
+    the entrance, and returns the emptied pallet to the next free slot in `bins_for_pallets`.
+    The k-th cycle therefore always ends at the k-th pallet slot, and only the leg from the
+    previous slot to the next item depends on the order. The sequence is built with a
+    nearest-neighbour pass and then improved by pairwise exchanges. The exchange passes stop when a pass
+    shortens the order-dependent travel by less than `min_improvement` (relative), or when `time_limit`
+    (seconds) is reached; the later passes of large waves gain a fraction of a percent each.
+
+    :param item_bins: Array of bin IDs of the items to retrieve, in arrival order.
+    :param item_heights: Array of y-positions of the items to retrieve, in arrival order.
+    :param pallet_slots: A list of (bin_id, y) tuples where the k-th empty pallet will be returned.
+    :param entrance: A tuple (bin_id, y) of the entrance.
+    :param distance: A function distance(bin_a, y_a, bin_b, y_b) that accepts NumPy arrays.
+    :param time_limit: Time budget in seconds for the exchange improvement.
+    :param min_improvement: Relative gain below which a pass counts as finding nothing and the exchanges stop.
+    :return: A tuple (order, planned_travel, naive_travel) where order is an array of indices into the inputs.
+    """
+    item_bins = np.asarray(item_bins, dtype=float)
+    item_heights = np.asarray(item_heights, dtype=float)
+    n = len(item_bins)
+    if n == 0:
+        return np.zeros(0, dtype=int), 0.0, 0.0
+
+    # the crane starts at the entrance, and starts cycle k+1 where cycle k dropped its pallet
+    origin_bins = np.array([entrance[0]] + [slot[0] for slot in pallet_slots[:n - 1]], dtype=float)
+    origin_heights = np.array([entrance[1]] + [slot[1] for slot in pallet_slots[:n - 1]], dtype=float)
+
+    # legs that do not depend on the order: item -> entrance -> pallet slot
+    fixed_travel = distance(item_bins, item_heights, entrance[0], entrance[1]).sum() + \
+                   sum(distance(entrance[0], entrance[1], slot[0], slot[1]) for slot in pallet_slots[:n])
+
+    naive_order = np.arange(n)
+    naive_travel = fixed_travel + distance(origin_bins, origin_heights, item_bins, item_heights).sum()
+
+    # 1. nearest neighbour construction
+    order = np.empty(n, dtype=int)
+    remaining = np.ones(n, dtype=bool)
+    for k in range(n):
+        legs = distance(origin_bins[k], origin_heights[k], item_bins, item_heights)
+        legs[~remaining] = np.inf
+        nearest = int(np.argmin(legs))
+        order[k] = nearest
+        remaining[nearest] = False
+
+    # 2. pairwise exchange improvement.
+    # Cycle k costs distance(origin_k, item_order[k]), so swapping the items of cycles a and b
+    # only changes those two legs and the gain of every swap with a can be evaluated at once.
+    deadline = time.perf_counter() + time_limit
+    legs = distance(origin_bins, origin_heights, item_bins[order], item_heights[order])
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        pass_start = legs.sum()
+        for a in range(n - 1):
+            if time.perf_counter() >= deadline:
+                break
+            item_a = order[a]
+            a_to_others = distance(origin_bins[a], origin_heights[a], item_bins[order[a + 1:]], item_heights[order[a + 1:]])
+            others_to_a = distance(origin_bins[a + 1:], origin_heights[a + 1:], item_bins[item_a], item_heights[item_a])
+            gain = legs[a] + legs[a + 1:] - a_to_others - others_to_a
+            best = int(np.argmax(gain))
+            if gain[best] > 1e-9:
+                b = a + 1 + best
+                order[a], order[b] = order[b], item_a
+                legs[a] = a_to_others[best]
+                legs[b] = others_to_a[best]
+                improved = True
+        if pass_start - legs.sum() <= min_improvement * pass_start:
+            break
+
+    planned_travel = fixed_travel + legs.sum()
+    if planned_travel > naive_travel:
+        # never report a plan worse than executing the wave in arrival order
+        return naive_order, float(naive_travel), float(naive_travel)
+    return order, float(planned_travel), float(naive_travel)
@@ -0,0 +1,98 @@
+"""
+Benchmark of the updates of the inventory index (inventory_index.py).
+
+The sorted lists of InventoryIndex are plain Python lists, so adding or removing an entry is a binary search plus an
+O(n) memmove of the entries after it. This times moving one item (removing its entries from the three item lists and
+adding them back with a new y) at several index sizes, next to rebuilding the lists by sorting, which is what a scan
+of the rack would cost. When sortedcontainers is installed, a SortedList doing the same updates is timed as well.
+
+    python benchmark_inventory_index.py
+    python benchmark_inventory_index.py --sizes 1000 20000
+"""
+import argparse
+import random
+import sys
+import time
+from inventory_index import InventoryIndex
+
+# a rack of 100 bins of height 1000 holds at most 100 * 1000 / 5 = 20000 items
+DEFAULT_SIZES = (1000, 20000, 100000, 1000000)
+NUM_MOVES = 2000
+
+
+def build_index(num_items, rng):
+    """
+    :return: A tuple (InventoryIndex holding `num_items` random items, {item_id: (weight, y, arrival_time)}).
+    """
+    entries = {item_id: (rng.uniform(0.1, 20), rng.uniform(0, 1000), rng.uniform(0, 1e6)) for item_id in range(num_items)}
+    index = InventoryIndex([])
+    index.by_weight = sorted((weight, item_id) for item_id, (weight, _, _) in entries.items())
+    index.by_position = sorted((y, item_id) for item_id, (_, y, _) in entries.items())
+    index.by_arrival = sorted((arrival_time, item_id) for item_id, (_, _, arrival_time) in entries.items())
+    return index, entries
+
+
+def time_moves(index, entries, moves):
+    """
+    :return: Time in microseconds to move one item, i.e. to update its entries in the three item lists.
+    """
+    start = time.perf_counter()
+    for item_id, y in moves:
+        entry = entries[item_id]
+        index._remove_item(item_id, entry)
+        entry = entries[item_id] = (entry[0], y, entry[2])
+        index._add_item(item_id, entry)
+    return (time.perf_counter() - start) / len(moves) * 1e6
+
+
+def time_sorted_list_moves(entries, moves):
+    """
+    :return: The same as `time_moves` with three sortedcontainers.SortedList, or None when it is not installed.
+    """
+    try:
+        from sortedcontainers import SortedList
+    except ImportError:
+        return None
+    lists = [SortedList((entry[field], item_id) for item_id, entry in entries.items()) for field in range(3)]
+    start = time.perf_counter()
+    for item_id, y in moves:
+        entry = entries[item_id]
+        for field, sorted_list in enumerate(lists):
+            sorted_list.remove((entry[field], item_id))
+        entry = entries[item_id] = (entry[0], y, entry[2])
+        for field, sorted_list in enumerate(lists):
+            sorted_list.add((entry[field], item_id))
+    return (time.perf_counter() - start) / len(moves) * 1e6
+
+
+def time_rebuild(entries):
+    """
+    :return: Time in microseconds to rebuild the three item lists by sorting every entry.
+    """
+    start = time.perf_counter()
+    for field in range(3):
+        sorted((entry[field], item_id) for item_id, entry in entries.items())
+    return (time.perf_counter() - start) * 1e6
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Time the updates of the inventory index at several sizes.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="numbers of indexed items")
+    args = parser.parse_args(argv)
+
+    for num_items in args.sizes:
+        rng = random.Random(0)
+        index, entries = build_index(num_items, rng)
+        moves = [(rng.randrange(num_items), rng.uniform(0, 1000)) for _ in range(NUM_MOVES)]
+        moved = time_moves(index, entries, moves)
+        sorted_list = time_sorted_list_moves(entries, moves)
+        rebuild = time_rebuild(entries)
+        line = f"{num_items} items: {moved:.1f} us per moved item"
+        if sorted_list is not None:
+            line += f", {sorted_list:.1f} us with SortedList"
+        print(line + f", {rebuild / 1000:.1f} ms to rebuild by sorting")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
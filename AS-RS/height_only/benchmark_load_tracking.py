@@ -0,0 +1,192 @@
+"""
+Benchmark of the per-bin load tracking.
+
+The same online/reorganize workload is run on the current tree and on a baseline revision of this directory from
+before load tracking was added (by default the parent of the commit that added this file), each in a fresh Python
+process and taking turns, so the numbers show the throughput change against the previous engines. The current tree is also run with
+a load limit, and the cached load check of a bin is timed against summing the weights of its items.
+
+    python benchmark_load_tracking.py                      # compare with the tree before load tracking
+    python benchmark_load_tracking.py --baseline-rev HEAD~5
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from item import Item
+from ASRSManager import ASRSManager
+
+DEFAULT_CONFIG = {
+    "num_bins": 100,
+    "num_operations": 2000,
+    "load_limit": 400,
+    "seed": 0,
+    "repeat": 3,  # runs per process; the first reorganization of a process pays for cold caches
+    "rounds": 3,  # processes per variant
+}
+
+
+def build_manager(num_bins, load_limit):
+    # load_limit is only passed when it is set, so the baseline revisions without it can run the same workload
+    kwargs = {'load_limit': load_limit} if load_limit is not None else {}
+    return ASRSManager(online_priority=list(range(1, num_bins + 1)),
+                       offline_priority=list(range(num_bins, 0, -1)),
+                       bin_dimensions=(50, 1000, 50, 5),
+                       weight_limit=None,
+                       bins_for_pallets=list(range(num_bins + 1, num_bins + 9)),
+                       num_pallets=400,
+                       entrance_position=(0, 0, 0, num_bins + 1),
+                       **kwargs)
+
+
+def run_workload(manager, num_operations, seed):
+    """
+    Place and remove random items online, then reorganize the bins once.
+
+    :return: A tuple (online operations per second, reorganization time in seconds).
+    """
+    rng = random.Random(seed)
+    stored = []
+    start = time.perf_counter()
+    for _ in range(num_operations):
+        if rng.random() < 0.6 or not stored:
+            item = Item(rng.uniform(20, 45), rng.uniform(10, 40), rng.uniform(20, 45), 1, rng.uniform(0.1, 20), None, False)
+            try:
+                stored.append(manager.place_item_online(item)['pallet_id'])
+            except ValueError:
+                pass
+        else:
+            manager.remove_item(stored.pop(rng.randrange(len(stored))))
+    online_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    manager.reorganize_offline()
+    return num_operations / online_time, time.perf_counter() - start
+
+
+def measure(config, load_limit):
+    """
+    Run the workload `repeat` times and keep the best throughput and reorganization time.
+
+    :return: A dictionary {'ops_per_second': float, 'reorganize_ms': float}.
+    """
+    best_ops, best_reorganize = 0.0, float('inf')
+    for _ in range(config["repeat"]):
+        manager = build_manager(config["num_bins"], load_limit)
+        ops_per_second, reorganize_time = run_workload(manager, config["num_operations"], config["seed"])
+        best_ops, best_reorganize = max(best_ops, ops_per_second), min(best_reorganize, reorganize_time)
+    return {'ops_per_second': best_ops, 'reorganize_ms': best_reorganize * 1000}
+
+
+def time_load_checks(manager, num_checks):
+    """
+    Compare the cached load check of a bin with summing the weights of its items on every check.
+
+    :return: A tuple (cached check time, rescan check time) in microseconds per check.
+    """
+    bin = max(manager.bins.values(), key=lambda bin: len(bin.items))
+    item = Item(30, 30, 30, 1, 5, None, False)
+
+    start = time.perf_counter()
+    for _ in range(num_checks):
+        bin.can_carry(item)
+    cached = (time.perf_counter() - start) / num_checks * 1e6
+
+    start = time.perf_counter()
+    for _ in range(num_checks):
+        sum(i.weight for i in bin.items.values() if i.weight is not None) + item.weight <= bin.load_limit
+    rescan = (time.perf_counter() - start) / num_checks * 1e6
+    return cached, rescan
+
+
+def _git(*args, cwd):
+    return subprocess.run(['git', *args], cwd=cwd, check=True, capture_output=True).stdout
+
+
+def default_baseline_rev(directory):
+    """
+    :return: The parent of the commit that added this file, i.e. the tree before load tracking.
+    """
+    added = _git('log', '--diff-filter=A', '--format=%H', '-1', '--', os.path.basename(__file__), cwd=directory)
+    return added.decode().strip() + '^'
+
+
+def run_in_process(directory, config, load_limit):
+    """
+    Measure the workload in a fresh Python process whose modules are imported from `directory`.
+    """
+    script = os.path.join(directory, os.path.basename(__file__))
+    output = subprocess.run([sys.executable, script, '--worker', json.dumps({**config, 'load_limit': load_limit})],
+                            cwd=directory, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def export_revision(directory, rev, destination):
+    """
+    Export this directory at revision `rev` into `destination`, together with the current version of this file.
+
+    :return: The path of the exported directory.
+    """
+    prefix = _git('rev-parse', '--show-prefix', cwd=directory).decode().strip()
+    top_level = _git('rev-parse', '--show-toplevel', cwd=directory).decode().strip()
+    archive = os.path.join(destination, 'baseline.tar')
+    _git('archive', '--format=tar', '-o', archive, f'{rev}:{prefix}', cwd=top_level)
+    baseline_directory = os.path.join(destination, 'baseline')
+    with tarfile.open(archive) as tar:
+        tar.extractall(baseline_directory)
+    # the baseline revision may not have this file yet
+    with open(__file__) as source, open(os.path.join(baseline_directory, os.path.basename(__file__)), 'w') as copy:
+        copy.write(source.read())
+    return baseline_directory
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare the throughput with load tracking against a baseline revision.")
+    parser.add_argument('--baseline-rev', help="git revision to compare with (default: the tree before load tracking)")
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        config = json.loads(args.worker)
+        print(json.dumps(measure(config, config["load_limit"])))
+        return 0
+
+    config = DEFAULT_CONFIG
+    directory = os.path.dirname(os.path.abspath(__file__))
+    rev = args.baseline_rev or default_baseline_rev(directory)
+    with tempfile.TemporaryDirectory() as tmp:
+        variants = {
+            f"baseline {rev}": (export_revision(directory, rev, tmp), None),
+            "current, load_limit=None": (directory, None),
+            f"current, load_limit={config['load_limit']}": (directory, config["load_limit"]),
+        }
+        # the variants take turns, so a slow period of the machine does not hit only one of them
+        results = {name: {'ops_per_second': 0.0, 'reorganize_ms': float('inf')} for name in variants}
+        for _ in range(config["rounds"]):
+            for name, (variant_directory, load_limit) in variants.items():
+                result = run_in_process(variant_directory, config, load_limit)
+                results[name]['ops_per_second'] = max(results[name]['ops_per_second'], result['ops_per_second'])
+                results[name]['reorganize_ms'] = min(results[name]['reorganize_ms'], result['reorganize_ms'])
+    baseline = next(iter(results.values()))
+    for name, result in results.items():
+        online_change = result['ops_per_second'] / baseline['ops_per_second'] - 1
+        reorganize_change = result['reorganize_ms'] / baseline['reorganize_ms'] - 1
+        print(f"{name}: {result['ops_per_second']:.0f} online operations/s ({online_change:+.1%}), "
+              f"reorganization {result['reorganize_ms']:.2f} ms ({reorganize_change:+.1%})")
+
+    manager = build_manager(config["num_bins"], config["load_limit"])
+    run_workload(manager, config["num_operations"], config["seed"])
+    overloaded = [bin.id for bin in manager.bins.values() if bin.get_current_load() > config["load_limit"]]
+    print(f"bins over the load limit: {overloaded}")
+    cached, rescan = time_load_checks(manager, 100000)
+    print(f"load check: {cached:.3f} us cached, {rescan:.3f} us rescanning the bin")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
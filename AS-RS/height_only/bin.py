@@ -1,35 +1,109 @@
+import copy
 import utils
 
 class Bin:
-    def __init__(self, width, height, depth, min_adjust_length, id, weight_limit=None):
+    def __init__(self, width, height, depth, min_adjust_length, id, weight_limit=None, load_limit=None):
         self.width = width
         self.height = height
         self.depth = depth
-        self.weight_limit = weight_limit
+        self.weight_limit = weight_limit  # limit of the weight of a single item
+        self.load_limit = load_limit  # limit of the total weight of the items in the bin
         self.min_adjust_length = min_adjust_length
         self.id = id
         self.items = {}
+        self._current_height = 0  # cached stack height. None means it has to be recomputed.
+        self._current_load = 0  # cached total weight of the items. None means it has to be recomputed.
+
+    @property
+    def items(self):
+        # items restored from a snapshot are only created when the bin is first accessed
+        if self._items_loader is not None:
+            loader, self._items_loader = self._items_loader, None
+            self._items = {item.id: item for item in loader()}
+        return self._items
+
+    @items.setter
+    def items(self, items):
+        self._items = items
+        self._items_loader = None
+
+    def copy(self):
+        """
+        Create an independent copy of the bin and its items.
+        Items that are not loaded yet are shared as a loader, since the loader creates new Item objects.
+        """
+        bin_copy = copy.copy(self)
+        if self._items_loader is None:
+            bin_copy._items = {item_id: copy.copy(item) for item_id, item in self._items.items()}
+        return bin_copy
 
     def reset(self):
         self.items = {}
+        self._current_height = 0
+        self._current_load = 0
 
     def get_current_height(self):
-        if not self.items:
-            return 0
-        return max(item.position[1] + utils.get_adjusted_height(item.placed_dimensions[1], self.min_adjust_length) for item in self.items.values())
+        if self._current_height is None:
+            if not self.items:
+                self._current_height = 0
+            else:
+                self._current_height = max(self._get_item_top(item) for item in self.items.values())
+        return self._current_height
 
-    def can_place(self, item):
+    def get_residual_height(self):
+        return self.height - self.get_current_height()
+
+    def get_current_load(self):
+        if self._current_load is None:
+            self._current_load = sum(item.weight for item in self.items.values() if item.weight is not None)
+        return self._current_load
+
+    def get_residual_load(self):
+        if self.load_limit is None:
+            return float('inf')
+        return self.load_limit - self.get_current_load()
+
+    def can_carry(self, item):
+        """
+        Check the weight limits of the bin for the item: the weight of the item itself, and the total weight
+        of the bin after placing it. Items without a weight always pass.
+        """
+        if item.weight is None:
+            return True
+        if self.weight_limit is not None and self.weight_limit < item.weight:
+            return False
+        if self.load_limit is not None and self.get_current_load() + item.weight > self.load_limit:
+            return False
+        return True
+
+    def _get_item_top(self, item):
+        return item.position[1] + utils.get_adjusted_height(item.placed_dimensions[1], self.min_adjust_length)
+
+    def fit_item(self, item):
+        """
+        Check whether the item fits into this bin when the bin is empty.
+
+        :return: A tuple (placed_dimensions, adjusted height) of the item in its optimal orientation, or None if it does not fit.
+        """
         bin_dimensions = (self.width, self.height, self.depth, self.min_adjust_length)
         item_dimension = utils.get_optimal_dimension(item, bin_dimensions)
-        item.placed_dimensions = item_dimension
-        adjusted_item_height = utils.get_adjusted_height(item.placed_dimensions[1], self.min_adjust_length)
+        if item_dimension is None:
+            return None
+        adjusted_item_height = utils.get_adjusted_height(item_dimension[1], self.min_adjust_length)
 
         # check if the item fits within the bin dimensions at the given position
         if (item.width > self.width or
             adjusted_item_height > self.height or
             item.depth > self.depth):
+            return None
+        return item_dimension, adjusted_item_height
+
+    def can_place(self, item):
+        fit = self.fit_item(item)
+        if fit is None:
             return False
-        
+        item.placed_dimensions, adjusted_item_height = fit
+
         remaining_height = self.height - self.get_current_height() - adjusted_item_height
         if remaining_height < 0:
             return False
@@ -57,5 +131,41 @@ class Bin:
             item.position = position
             item.placed_bin = self.id
             self.items[item.id] = item
+            if self._current_height is not None:
+                self._current_height = max(self._current_height, self._get_item_top(item))
+            if self._current_load is not None and item.weight is not None:
+                self._current_load += item.weight
         except Exception as e:
-            raise ValueError(f"Error placing item {item.id} in bin {self.id}: {e}")
\ No newline at end of file
+            raise ValueError(f"Error placing item {item.id} in bin {self.id}: {e}")
+
+    def load_items(self, items, current_height=None, current_load=None):
+        """
+        Replace the content of the bin with already placed items, e.g. when restoring a snapshot.
+
+        :param items: A list of Item objects whose position and placed_bin are already set,
+                      or a function returning such a list. A function is only called when the items are first accessed.
+        :param current_height: The stack height of the items if it is known, otherwise it is recomputed on demand.
+        :param current_load: The total weight of the items if it is known, otherwise it is recomputed on demand.
+        """
+        if callable(items):
+            self._items = {}
+            self._items_loader = items
+        else:
+            self.items = {item.id: item for item in items}
+        self._current_height = current_height
+        self._current_load = current_load
+
+    def remove_item(self, item_id):
+        """
+        Remove an item from the bin. The items above it are not moved.
+
+        :return: The removed Item object.
+        """
+        item = self.items.pop(item_id)
+        if self._current_height is not None and self._get_item_top(item) >= self._current_height:
+            self._current_height = None
+        if not self._items:
+            self._current_load = 0  # no rounding errors are carried over once the bin is empty
+        elif self._current_load is not None and item.weight is not None:
+            self._current_load -= item.weight
+        return item
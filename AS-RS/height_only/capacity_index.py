@@ -0,0 +1,198 @@
+import bisect
+import copy
+import heapq
+
+
+class CapacityClass:
+    """
+    A group of bins with the same dimensions, kept in priority order.
+    The residual heights are stored in a max segment tree so the first bin that can take a given
+    height is found in O(log n), and in a sorted list so the tightest bin is found in O(log n).
+
+    Attributes:
+        dimensions: (width, height, depth) of the bins in the class.
+        bin_ids: IDs of the bins in the class, in priority order.
+        ranks: Rank of each bin in the global priority list.
+        representative: One bin of the class, only used to check whether an item fits the dimensions.
+    """
+    def __init__(self, dimensions, bin_ids, ranks, residual_heights, representative):
+        self.dimensions = dimensions
+        self.representative = representative
+        self.bin_ids = bin_ids
+        self.ranks = ranks
+        self.positions = {bin_id: i for i, bin_id in enumerate(bin_ids)}
+        self.residual_heights = list(residual_heights)
+
+        self.size = 1
+        while self.size < len(bin_ids):
+            self.size *= 2
+        self.tree = [-1] * (2 * self.size)
+        self.tree[self.size:self.size + len(bin_ids)] = self.residual_heights
+        for node in range(self.size - 1, 0, -1):
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+
+        # (residual height, rank) of every bin, for best fit queries
+        self.sorted_residuals = sorted(zip(self.residual_heights, ranks))
+
+    def copy(self):
+        class_copy = copy.copy(self)
+        class_copy.residual_heights = list(self.residual_heights)
+        class_copy.tree = list(self.tree)
+        class_copy.sorted_residuals = list(self.sorted_residuals)
+        return class_copy
+
+    def update(self, bin_id, residual_height):
+        position = self.positions[bin_id]
+        old_key = (self.residual_heights[position], self.ranks[position])
+        del self.sorted_residuals[bisect.bisect_left(self.sorted_residuals, old_key)]
+        bisect.insort(self.sorted_residuals, (residual_height, self.ranks[position]))
+        self.residual_heights[position] = residual_height
+
+        node = self.size + position
+        self.tree[node] = residual_height
+        node //= 2
+        while node:
+            self.tree[node] = max(self.tree[2 * node], self.tree[2 * node + 1])
+            node //= 2
+
+    def first_fit(self, height, start=0):
+        """
+        :return: The position of the first bin at or after `start` whose residual height is at least `height`, or None.
+        """
+        if start >= len(self.bin_ids):
+            return None
+        return self._first_fit(1, 0, self.size, height, start)
+
+    def _first_fit(self, node, node_start, node_end, height, start):
+        if node_end <= start or self.tree[node] < height:
+            return None
+        if node >= self.size:
+            return node - self.size
+        middle = (node_start + node_end) // 2
+        position = self._first_fit(2 * node, node_start, middle, height, start)
+        if position is None:
+            position = self._first_fit(2 * node + 1, middle, node_end, height, start)
+        return position
+
+    def best_fit(self, height, accept=None):
+        """
+        :param accept: Optional function accept(rank) for further checks, e.g. weight limits. Bins it rejects are skipped.
+        :return: (residual height, rank) of the bin with the smallest residual height that is at least `height`, or None.
+        """
+        i = bisect.bisect_left(self.sorted_residuals, (height, -1))
+        while i < len(self.sorted_residuals):
+            if accept is None or accept(self.sorted_residuals[i][1]):
+                return self.sorted_residuals[i]
+            i += 1
+        return None
+
+
+class CapacityClassIndex:
+    """
+    Groups bins into capacity classes by their dimensions, so that placement only inspects the classes
+    whose footprint and height can hold an item, and the bins of a class by their residual height.
+    The index has to be told about every change of a bin's height with `update`.
+
+    :param bins: A dictionary of Bin objects {id: Bin}.
+    :param priority: A list of bin IDs representing the order in which to try placing items.
+    """
+    def __init__(self, bins: dict, priority: list):
+        self.bins = bins
+        self.priority = priority
+        self.ranks = {bin_id: rank for rank, bin_id in enumerate(priority)}
+
+        grouped = {}
+        for bin_id in priority:
+            bin = bins[bin_id]
+            grouped.setdefault((bin.width, bin.height, bin.depth), []).append(bin_id)
+
+        # tallest classes first, so tall items are offered tall bays first
+        self.classes = []
+        for dimensions in sorted(grouped, key=lambda d: (-d[1], -d[0] * d[2])):
+            bin_ids = grouped[dimensions]
+            self.classes.append(CapacityClass(dimensions=dimensions,
+                                              bin_ids=bin_ids,
+                                              ranks=[self.ranks[bin_id] for bin_id in bin_ids],
+                                              residual_heights=[bins[bin_id].get_residual_height() for bin_id in bin_ids],
+                                              representative=bins[bin_ids[0]]))
+        self.class_of_bin = {bin_id: capacity_class for capacity_class in self.classes for bin_id in capacity_class.bin_ids}
+
+    def copy(self, bins: dict) -> 'CapacityClassIndex':
+        """
+        Create an independent copy of the index for another dictionary of bins with the same content.
+        The bins are not read, so this also works on copy-on-write bins.
+        """
+        index_copy = copy.copy(self)
+        index_copy.bins = bins
+        index_copy.classes = [capacity_class.copy() for capacity_class in self.classes]
+        index_copy.class_of_bin = {bin_id: capacity_class for capacity_class in index_copy.classes for bin_id in capacity_class.bin_ids}
+        return index_copy
+
+    def update(self, bin_id):
+        """
+        Refresh the residual height of a bin after items were placed into or removed from it.
+        Bins that are not part of the priority list are ignored.
+        """
+        capacity_class = self.class_of_bin.get(bin_id)
+        if capacity_class is not None:
+            capacity_class.update(bin_id, self.bins[bin_id].get_residual_height())
+
+    def fitting_classes(self, item):
+        """
+        Find the capacity classes that can hold the item when their bins are empty.
+
+        :param item: Item object to be placed.
+        :return: A list of (CapacityClass, placed_dimensions, adjusted height) tuples, tallest class first.
+        """
+        fitting = []
+        for capacity_class in self.classes:
+            fit = capacity_class.representative.fit_item(item)
+            if fit is not None:
+                fitting.append((capacity_class, fit[0], fit[1]))
+        return fitting
+
+    def iter_first_fit(self, item):
+        """
+        Iterate over the bins that have enough residual height for the item, in priority order.
+        Only the classes that can hold the item are inspected.
+
+        :param item: Item object to be placed.
+        :return: A generator of (bin_id, placed_dimensions) tuples.
+        """
+        heap = []
+        for capacity_class, placed_dimensions, adjusted_height in self.fitting_classes(item):
+            position = capacity_class.first_fit(adjusted_height)
+            if position is not None:
+                heap.append((capacity_class.ranks[position], position, id(capacity_class), capacity_class, placed_dimensions, adjusted_height))
+        heapq.heapify(heap)
+
+        while heap:
+            _, position, _, capacity_class, placed_dimensions, adjusted_height = heapq.heappop(heap)
+            yield capacity_class.bin_ids[position], placed_dimensions
+            position = capacity_class.first_fit(adjusted_height, start=position + 1)
+            if position is not None:
+                heapq.heappush(heap, (capacity_class.ranks[position], position, id(capacity_class), capacity_class, placed_dimensions, adjusted_height))
+
+    def best_fit(self, item, accept=None):
+        """
+        Find the bin that leaves the smallest remaining height after placing the item.
+        Ties are broken by priority.
+
+        :param item: Item object to be placed.
+        :param accept: Optional function accept(bin_id) for further checks, e.g. weight limits. Bins it rejects are skipped.
+        :return: A tuple (bin_id, placed_dimensions), or None if no bin can take the item.
+        """
+        accept_rank = None
+        if accept is not None:
+            accept_rank = lambda rank: accept(self.priority[rank])
+        best = None
+        for capacity_class, placed_dimensions, adjusted_height in self.fitting_classes(item):
+            fit = capacity_class.best_fit(adjusted_height, accept_rank)
+            if fit is None:
+                continue
+            key = (fit[0] - adjusted_height, fit[1])
+            if best is None or key < best[0]:
+                best = (key, placed_dimensions)
+        if best is None:
+            return None
+        return self.priority[best[0][1]], best[1]
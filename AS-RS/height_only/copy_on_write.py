@@ -0,0 +1,64 @@
+from collections.abc import MutableMapping
+
+
+class CopyOnWriteBins(MutableMapping):
+    """
+    A dictionary of bins {id: Bin} that shares the bins of a base dictionary until they are accessed.
+    The first access to a bin replaces it with a private copy (see `Bin.copy`), so the base bins are never
+    modified and only the bins an operation actually looks at are copied.
+
+    The base bins must not be modified while the copy-on-write dictionary is in use.
+
+    :param base: The dictionary of bins to share.
+    """
+    def __init__(self, base):
+        self.base = base
+        self.materialized = {}
+        self.deleted = set()
+
+    def __getitem__(self, bin_id):
+        bin = self.materialized.get(bin_id)
+        if bin is None:
+            if bin_id in self.deleted:
+                raise KeyError(bin_id)
+            peek = getattr(self.base, 'peek', None)
+            bin = (peek(bin_id) if peek is not None else self.base[bin_id]).copy()
+            self.materialized[bin_id] = bin
+        return bin
+
+    def peek(self, bin_id):
+        """
+        Get a bin for reading only, without copying it. The returned bin must not be modified.
+        """
+        bin = self.materialized.get(bin_id)
+        if bin is None:
+            if bin_id in self.deleted:
+                raise KeyError(bin_id)
+            peek = getattr(self.base, 'peek', None)
+            bin = peek(bin_id) if peek is not None else self.base[bin_id]
+        return bin
+
+    def __setitem__(self, bin_id, bin):
+        self.materialized[bin_id] = bin
+        self.deleted.discard(bin_id)
+
+    def __delitem__(self, bin_id):
+        if bin_id not in self:
+            raise KeyError(bin_id)
+        self.materialized.pop(bin_id, None)
+        self.deleted.add(bin_id)
+
+    def __contains__(self, bin_id):
+        # checking a key does not copy the bin
+        return bin_id in self.materialized or (bin_id in self.base and bin_id not in self.deleted)
+
+    def __iter__(self):
+        for bin_id in self.base:
+            if bin_id not in self.deleted:
+                yield bin_id
+        for bin_id in self.materialized:
+            if bin_id not in self.base:
+                yield bin_id
+
+    def __len__(self):
+        return sum(1 for _ in self)
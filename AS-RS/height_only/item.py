@@ -12,6 +12,7 @@ class Item:
         position: Item's placed position. (x, y, z) coordinates when placed.
         placed_bin: ID of the bin where the item is placed.
         placed_dimensions: Store final dimensions after rotation.
+        arrival_time: Time (as returned by time.time()) when the item was stored, None for empty pallets.
     """
     def __init__(self, width, height, depth, rotation, weight, id, empty):
         self.width = width
@@ -24,6 +25,7 @@ class Item:
         self.position = None  # Item's placed position. (x, y, z) coordinates when placed
         self.placed_bin = None  # ID of the bin where the item is placed
         self.placed_dimensions = (width, height, depth)  # Store final dimensions after rotation
+        self.arrival_time = None  # Time when the item was stored
 
     def reset(self, min_adjust_length):
         """
@@ -38,6 +40,7 @@ class Item:
         self.position = None
         self.placed_bin = None
         self.placed_dimensions = (self.width, self.height, self.depth)
+        self.arrival_time = None
 
     def to_dict(self):
         """Converts the item object to a dictionary for JSON serialization."""
@@ -51,5 +54,6 @@ class Item:
             "empty": self.empty,
             "position": self.position,
             "placed_bin": self.placed_bin,
-            "placed_dimensions": self.placed_dimensions
+            "placed_dimensions": self.placed_dimensions,
+            "arrival_time": self.arrival_time
         }
\ No newline at end of file
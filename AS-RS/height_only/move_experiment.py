@@ -30,10 +30,10 @@ if __name__ == '__main__':
         retrieved_item = manager.retrieve_item(item.id)
         if retrieved_item:
             item_position_online[item.id] = (item.placed_bin, retrieved_item.position)
-            # 假設貨物都從第5號bin的中間放入：
+            # 貨物都從入口 (entrance_position) 所在的bin放入：
             # print (f"processing item {retrieved_item.id}")
             vertical_distance += manager.bin_dimensions[1] * abs(retrieved_item.placed_dimensions[1] - manager.bin_dimensions[1]/2)
-            horizontal_distance += manager.bin_dimensions[0] * abs(retrieved_item.placed_bin - 5)
+            horizontal_distance += manager.topology.horizontal_distance(retrieved_item.placed_bin, manager.entrance_position[3])
             
     total_length_online += vertical_distance + horizontal_distance
     for bin in manager.bins.values():
@@ -59,7 +59,7 @@ if __name__ == '__main__':
             retrieved_item = manager.retrieve_item(item.id)
             if retrieved_item is not None:
                 vertical_distance += abs(retrieved_item.placed_dimensions[1] - item_position_online[retrieved_item.id][1][1])
-                horizontal_distance += manager.bin_dimensions[0] * abs(retrieved_item.placed_bin - item_position_online[retrieved_item.id][0])
+                horizontal_distance += manager.topology.horizontal_distance(retrieved_item.placed_bin, item_position_online[retrieved_item.id][0])
         
         total_length_offline += vertical_distance + horizontal_distance
         print(f"Total horizontal distance of items moved offline: {horizontal_distance}")
@@ -103,10 +103,10 @@ if __name__ == '__main__':
         retrieved_item = manager.retrieve_item(item.id)
         if retrieved_item:
             item_position_online[item.id] = (item.placed_bin, retrieved_item.position)
-            # 假設貨物都從第10號bin的中間放入：
+            # 貨物都從入口 (entrance_position) 所在的bin放入：
             # print (f"processing item {retrieved_item.id}")
             vertical_distance += manager.bin_dimensions[1] * abs(retrieved_item.placed_dimensions[1] - manager.bin_dimensions[1]/2)
-            horizontal_distance += manager.bin_dimensions[0] * abs(retrieved_item.placed_bin - 5)
+            horizontal_distance += manager.topology.horizontal_distance(retrieved_item.placed_bin, manager.entrance_position[3])
             
     total_length_online += vertical_distance + horizontal_distance
     for bin in manager.bins.values():
@@ -132,7 +132,7 @@ if __name__ == '__main__':
             retrieved_item = manager.retrieve_item(item.id)
             if retrieved_item is not None:
                 vertical_distance += abs(retrieved_item.placed_dimensions[1] - item_position_online[retrieved_item.id][1][1])
-                horizontal_distance += manager.bin_dimensions[0] * abs(retrieved_item.placed_bin - item_position_online[retrieved_item.id][0])
+                horizontal_distance += manager.topology.horizontal_distance(retrieved_item.placed_bin, item_position_online[retrieved_item.id][0])
         
         total_length_offline += vertical_distance + horizontal_distance
         print(f"Total horizontal distance of items moved offline: {horizontal_distance}")
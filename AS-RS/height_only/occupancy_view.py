@@ -0,0 +1,130 @@
+"""
+Memory-mapped occupancy view of the bins, for dashboards in other processes.
+
+The manager writes one row per bin (residual height, number of items and empty pallets, load, and the manager
+version of the last change of the bin) into a memory-mapped file. Readers map the same file and poll it without
+calling into the manager. Consistency uses a seqlock: the writer makes the sequence counter odd before it writes
+and even again afterwards, and a reader retries whenever the counter was odd or changed while it copied the rows.
+There must be only one writer. Put the file on a RAM-backed file system (e.g. /dev/shm) to avoid disk writes.
+
+File layout (little-endian):
+
+- header: magic (8 bytes), sequence counter (uint64), manager version (uint64), number of bins (uint64),
+  length of the bin ID list (uint64)
+- the bin IDs as a JSON list, padded to 8 bytes
+- a float64 array of shape (number of bins, len(COLUMNS))
+"""
+import json
+import mmap
+import time
+import numpy as np
+
+MAGIC = b'ASRSOCC1'
+HEADER_SIZE = 40
+COLUMNS = ('residual_height', 'item_count', 'pallet_count', 'load', 'version')
+
+
+def _layout(ids_length, num_bins):
+    table_offset = HEADER_SIZE + (ids_length + 7) // 8 * 8
+    return table_offset, table_offset + num_bins * len(COLUMNS) * 8
+
+
+class OccupancyPublisher:
+    """
+    Writes the occupancy of the bins to a memory-mapped file. The file is created or overwritten.
+
+    :param path: Path of the file to write.
+    :param bins: An iterable of Bin objects. The order of the rows follows it.
+    :param version: The current manager version.
+    """
+    def __init__(self, path, bins, version: int=0):
+        bins = list(bins)
+        self.path = path
+        self.rows = {bin.id: row for row, bin in enumerate(bins)}
+        ids = json.dumps([bin.id for bin in bins]).encode()
+        table_offset, size = _layout(len(ids), len(bins))
+
+        with open(path, 'wb') as f:
+            f.truncate(size)
+        self._file = open(path, 'r+b')
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+        self._header = np.frombuffer(self._mmap, dtype='<u8', count=HEADER_SIZE // 8)
+        self._table = np.frombuffer(self._mmap, dtype='<f8', offset=table_offset).reshape(len(bins), len(COLUMNS))
+
+        self._mmap[HEADER_SIZE:HEADER_SIZE + len(ids)] = ids
+        self._header[2:5] = (version, len(bins), len(ids))
+        self.update(bins, version)
+        self._mmap[:8] = MAGIC  # readers only accept the file once it is complete
+
+    def update(self, bins, version: int):
+        """
+        Write the rows of the given bins and the manager version as one consistent change.
+
+        :param bins: An iterable of the Bin objects that changed.
+        :param version: The current manager version.
+        """
+        rows = [(self.rows[bin.id], _occupancy(bin, version)) for bin in bins]
+        self._header[1] += 1  # odd: writing
+        for row, values in rows:
+            self._table[row] = values
+        self._header[2] = version
+        self._header[1] += 1  # even: consistent
+
+    def close(self):
+        del self._header, self._table
+        self._mmap.close()
+        self._file.close()
+
+
+def _occupancy(bin, version):
+    items = bin.items.values()
+    pallet_count = sum(1 for item in items if item.empty)
+    return (bin.get_residual_height(), len(bin.items) - pallet_count, pallet_count, bin.get_current_load(), version)
+
+
+class OccupancyReader:
+    """
+    Reads the occupancy view written by an `OccupancyPublisher`, from any process.
+
+    :param path: Path of the file written by the publisher.
+
+    Attributes:
+        bin_ids: The IDs of the bins, in the order of the rows.
+    """
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:8] != MAGIC:
+            raise ValueError(f"{path} is not an occupancy view, or it is not completely written yet.")
+        self._header = np.frombuffer(self._mmap, dtype='<u8', count=HEADER_SIZE // 8)
+        num_bins, ids_length = (int(value) for value in self._header[3:5])
+        self.bin_ids = json.loads(self._mmap[HEADER_SIZE:HEADER_SIZE + ids_length].decode())
+        table_offset, _ = _layout(ids_length, num_bins)
+        self._table = np.frombuffer(self._mmap, dtype='<f8', offset=table_offset).reshape(num_bins, len(COLUMNS))
+
+    def read(self, timeout: float=1.0) -> dict:
+        """
+        Copy a consistent state of the rack.
+
+        :param timeout: Seconds to keep retrying while the publisher is writing.
+        :return: A dictionary with the manager 'version' and one NumPy array per column in `COLUMNS`,
+                 in the order of `bin_ids`.
+        """
+        deadline = time.perf_counter() + timeout
+        while True:
+            sequence = int(self._header[1])
+            if sequence % 2 == 0:
+                table = self._table.copy()
+                version = int(self._header[2])
+                if int(self._header[1]) == sequence:
+                    break
+            if time.perf_counter() > deadline:
+                raise TimeoutError("The occupancy view did not become consistent in time.")
+        state = {name: table[:, column] for column, name in enumerate(COLUMNS)}
+        state['version'] = version
+        return state
+
+    def close(self):
+        del self._header, self._table
+        self._mmap.close()
+        self._file.close()
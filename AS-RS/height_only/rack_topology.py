@@ -0,0 +1,179 @@
+import math
+import numpy as np
+
+
+class RackTopology:
+    """
+    Positions of the bins in the rack and the travel time of the crane between them.
+
+    Every bin is a column of the rack at a bay (horizontal index) and a level (vertical index). A position inside
+    a bin is given by its bin ID and its height y above the bottom of the bin. The crane moves horizontally and
+    vertically, either one after the other (the travel time is the sum of both times) or simultaneously (Chebyshev
+    travel: the travel time is the larger of both times). Each axis accelerates to its top speed, so a move of
+    distance d takes 2 * sqrt(d / a) if the top speed is never reached, and d / v + v / a otherwise.
+
+    The travel times for every horizontal distance in bays and for every vertical distance that is a multiple of
+    `min_adjust_length` are precomputed, so that looking up a travel time needs no arithmetic beyond indexing.
+
+    :param bins: A dictionary {bin_id: (bay, level)}. Bin IDs must be integers.
+    :param bay_width: Horizontal distance between two neighbouring bays.
+    :param level_height: Vertical distance between two neighbouring levels.
+    :param min_adjust_length: Height unit of the positions in the bins.
+    :param horizontal_speed: Top speed of the crane along the bays.
+    :param vertical_speed: Top speed of the crane along the levels.
+    :param horizontal_acceleration: Acceleration along the bays. None means the top speed is reached at once.
+    :param vertical_acceleration: Acceleration along the levels. None means the top speed is reached at once.
+    :param simultaneous: Whether the crane moves along both axes at the same time.
+    """
+    def __init__(self, bins: dict, bay_width, level_height, min_adjust_length,
+                 horizontal_speed=1.0, vertical_speed=1.0,
+                 horizontal_acceleration=None, vertical_acceleration=None,
+                 simultaneous=True):
+        if not all(isinstance(bin_id, (int, np.integer)) for bin_id in bins):
+            raise ValueError("The rack topology needs integer bin IDs.")
+        self.bins = {bin_id: (int(bay), int(level)) for bin_id, (bay, level) in bins.items()}
+        self.bay_width = bay_width
+        self.level_height = level_height
+        self.min_adjust_length = min_adjust_length
+        self.horizontal_speed = horizontal_speed
+        self.vertical_speed = vertical_speed
+        self.horizontal_acceleration = horizontal_acceleration
+        self.vertical_acceleration = vertical_acceleration
+        self.simultaneous = simultaneous
+
+        # bin ID -> bay, and bin ID -> height of the bottom of the bin, as arrays for vectorized lookups
+        max_bin_id = max(self.bins)
+        self._bay = np.zeros(max_bin_id + 1, dtype=int)
+        self._base = np.zeros(max_bin_id + 1, dtype=float)
+        for bin_id, (bay, level) in self.bins.items():
+            self._bay[bin_id] = bay
+            self._base[bin_id] = level * level_height
+
+        self.horizontal_times = self._profile(np.arange(self._bay.max() + 1) * bay_width,
+                                              horizontal_speed, horizontal_acceleration)
+        num_steps = int(math.ceil((max(level for _, level in self.bins.values()) + 1) * level_height / min_adjust_length)) + 1
+        self.vertical_times = self._profile(np.arange(num_steps) * min_adjust_length, vertical_speed, vertical_acceleration)
+        self._tables_from = {}
+
+    @classmethod
+    def from_config(cls, config: dict, bin_ids, bin_dimensions: tuple) -> 'RackTopology':
+        """
+        Create the topology from the `topology` section of the configuration.
+        Without a section, the bins form a single row ordered by ID and the crane moves one axis at a time
+        at unit speed, so travel times equal the distance `bin_width * |bin_a - bin_b| + |y_a - y_b|`.
+
+        :param config: The `topology` section, or None. Its `bins` entry is either a dictionary {bin_id: [bay, level]}
+                       or a list of [bin_id, bay, level].
+        :param bin_ids: The IDs of all the bins.
+        :param bin_dimensions: The default bin dimensions (width, height, depth, min_adjust_length).
+        """
+        if config is None:
+            return cls(bins={bin_id: (bin_id, 0) for bin_id in bin_ids},
+                       bay_width=bin_dimensions[0],
+                       level_height=bin_dimensions[1],
+                       min_adjust_length=bin_dimensions[3],
+                       simultaneous=False)
+        bins = config.get('bins')
+        if bins is None:
+            bins = {bin_id: (bin_id, 0) for bin_id in bin_ids}
+        elif not isinstance(bins, dict):
+            bins = {bin_id: (bay, level) for bin_id, bay, level in bins}
+        missing = [bin_id for bin_id in bin_ids if bin_id not in bins]
+        if missing:
+            raise ValueError(f"The rack topology has no bay and level for the bins {missing}.")
+        return cls(bins=bins,
+                   bay_width=config.get('bay_width', bin_dimensions[0]),
+                   level_height=config.get('level_height', bin_dimensions[1]),
+                   min_adjust_length=bin_dimensions[3],
+                   horizontal_speed=config.get('horizontal_speed', 1.0),
+                   vertical_speed=config.get('vertical_speed', 1.0),
+                   horizontal_acceleration=config.get('horizontal_acceleration'),
+                   vertical_acceleration=config.get('vertical_acceleration'),
+                   simultaneous=config.get('simultaneous', True))
+
+    @staticmethod
+    def _profile(distance, speed, acceleration):
+        distance = np.asarray(distance, dtype=float)
+        if acceleration is None:
+            return distance / speed
+        # below this distance the crane starts braking before it reaches its top speed
+        full_speed_distance = speed * speed / acceleration
+        return np.where(distance < full_speed_distance,
+                        2 * np.sqrt(distance / acceleration),
+                        distance / speed + speed / acceleration)
+
+    def _combine(self, horizontal, vertical):
+        return np.maximum(horizontal, vertical) if self.simultaneous else horizontal + vertical
+
+    def travel_time(self, bin_a, y_a, bin_b, y_b):
+        """
+        Travel time of the crane between two positions. The arguments can be either numbers or NumPy arrays.
+
+        :return: The travel time, as a float or a NumPy array.
+        """
+        bay_a = self._bay[np.asarray(bin_a, dtype=int)]
+        bay_b = self._bay[np.asarray(bin_b, dtype=int)]
+        horizontal = self.horizontal_times[np.abs(bay_a - bay_b)]
+
+        height = np.abs(self._base[np.asarray(bin_a, dtype=int)] + y_a - self._base[np.asarray(bin_b, dtype=int)] - y_b)
+        steps = height / self.min_adjust_length
+        on_grid = (steps == np.floor(steps)) & (steps < len(self.vertical_times))
+        if np.all(on_grid):
+            vertical = self.vertical_times[steps.astype(int)]
+        else:
+            vertical = np.where(on_grid,
+                                self.vertical_times[np.where(on_grid, steps, 0).astype(int)],
+                                self._profile(height, self.vertical_speed, self.vertical_acceleration))
+        return self._combine(horizontal, vertical)
+
+    def horizontal_distance(self, bin_a, bin_b):
+        """
+        :return: The horizontal distance between two bins.
+        """
+        return self.bay_width * abs(self.bins[bin_a][0] - self.bins[bin_b][0])
+
+    def travel_times_from(self, bin_id, y) -> dict:
+        """
+        Travel times from one position (e.g. the entrance) to every height of every bin, computed once per origin.
+
+        :return: A dictionary {bin_id: list} where list[k] is the travel time to the height k * min_adjust_length.
+        """
+        key = (bin_id, y)
+        tables = self._tables_from.get(key)
+        if tables is None:
+            tables = {}
+            for other_bin in self.bins:
+                num_steps = len(self.vertical_times)
+                heights = np.arange(num_steps) * self.min_adjust_length
+                tables[other_bin] = np.asarray(self.travel_time(bin_id, y, np.full(num_steps, other_bin), heights)).tolist()
+            self._tables_from[key] = tables
+        return tables
+
+    def travel_time_from(self, origin_bin, origin_y, bin_id, y) -> float:
+        """
+        Travel time from an origin to a position, looked up in the tables of `travel_times_from`.
+        """
+        steps = y / self.min_adjust_length
+        if steps != int(steps) or steps < 0:
+            return float(self.travel_time(origin_bin, origin_y, bin_id, y))
+        if steps >= len(self.vertical_times):
+            self._extend_vertical_times(int(steps))
+        return self.travel_times_from(origin_bin, origin_y)[bin_id][int(steps)]
+
+    def _extend_vertical_times(self, steps):
+        # bins taller than the level height (e.g. tall pallet stacks) reach above the precomputed heights
+        num_steps = max(steps + 1, 2 * len(self.vertical_times))
+        self.vertical_times = self._profile(np.arange(num_steps) * self.min_adjust_length,
+                                            self.vertical_speed, self.vertical_acceleration)
+        self._tables_from = {}
+
+    def priority(self, bin_ids, origin_bin, origin_y, farthest_first=False) -> list:
+        """
+        Order bins by the travel time from an origin (e.g. the entrance) to the bottom of each bin.
+
+        :param bin_ids: The IDs of the bins to order.
+        :param farthest_first: Whether to start with the farthest bin instead of the nearest one.
+        :return: A list of bin IDs. Ties keep the order of `bin_ids`.
+        """
+        tables = self.travel_times_from(origin_bin, origin_y)
+        return sorted(bin_ids, key=lambda bin_id: -tables[bin_id][0] if farthest_first else tables[bin_id][0])
@@ -1,32 +1,43 @@
 import random
 import csv
 
-def generate_random_item(num_items, min_width, max_width, min_height, max_height, min_depth, max_depth, min_weight, max_weight, can_rotate=1):
+def generate_random_item(num_items, min_width, max_width, min_height, max_height, min_depth, max_depth, min_weight, max_weight, can_rotate=1,
+                         seed=None, csv_file_name='items.csv'):
+    """
+    Generate random items and write them to a CSV file.
+
+    :param seed: Optional seed, so the same items are generated every time.
+    :param csv_file_name: Path of the CSV file, or None to only return the rows.
+    :return: The rows, starting with the header.
+    """
+    rng = random.Random(seed)
     items_data = []
 
     # CSV header
     items_data.append(['width', 'height', 'depth', 'weight', 'can_rotate', 'id'])
 
     for i in range(1, num_items + 1):
-        width = random.uniform(min_width, max_width)
-        height = random.uniform(min_height, max_height)
-        depth = random.uniform(min_depth, max_depth)
-        weight = random.uniform(min_weight, max_weight)
+        width = rng.uniform(min_width, max_width)
+        height = rng.uniform(min_height, max_height)
+        depth = rng.uniform(min_depth, max_depth)
+        weight = rng.uniform(min_weight, max_weight)
         if can_rotate == 1:
             rotation = 1
         elif can_rotate == 0:
             rotation = 0
         else:
-            rotation = random.randint(0, 1)
+            rotation = rng.randint(0, 1)
         id = str(i)
         items_data.append([width, height, depth, weight, rotation, id])
 
-    csv_file_name = 'items.csv'
+    if csv_file_name is None:
+        return items_data
     with open(csv_file_name, 'w', newline='', encoding='utf-8') as csvfile:
         csv_writer = csv.writer(csvfile)
         csv_writer.writerows(items_data)
 
     print(f"successfully generate {num_items} items to '{csv_file_name}'。")
+    return items_data
 
 if __name__ == "__main__":
     config = {
@@ -0,0 +1,294 @@
+"""
+Performance regression harness for the placement engines.
+
+A seeded random workload (items from `random_item.generate_random_item`) is run through online placement
+(`first_fit`), item removal (`remove_item`), offline reorganization (`reorganize_offline`) and a standalone
+`best_fit` on empty bins. The invariants of the bins are checked after every step, and the time of every
+operation is recorded. The median times can be saved as a baseline and later compared with it, failing when
+an operation got slower than the baseline by more than a tolerance.
+
+Times are also stored divided by the time of a fixed pure-Python calibration loop. Comparing these normalized times
+(`--normalize`) makes a baseline recorded on one machine roughly usable on another one, at the cost of the noise of
+the calibration itself; by default the plain median times are compared.
+
+    python regression_harness.py --record      # write the baseline
+    python regression_harness.py               # compare with the baseline
+"""
+import argparse
+import copy
+import json
+import random
+import statistics
+import sys
+import time
+from bin import Bin
+from item import Item
+from ASRSManager import ASRSManager
+from algorithms.best_fit import best_fit
+from capacity_index import CapacityClassIndex
+from random_item import generate_random_item
+
+DEFAULT_CONFIG = {
+    "num_bins": 40,
+    "num_pallet_bins": 4,
+    "num_pallets": 240,
+    "bin_dimensions": (50, 1000, 50, 5),
+    "weight_limit": 18,
+    "load_limit": 300,
+    "num_operations": 1000,
+    "place_ratio": 0.6,
+    "reorganize_every": 250,
+}
+
+OPERATIONS = ('first_fit', 'remove_item', 'reorganize_offline', 'best_fit')
+
+
+def build_manager(config: dict) -> ASRSManager:
+    num_bins = config["num_bins"]
+    return ASRSManager(online_priority=list(range(1, num_bins + 1)),
+                       offline_priority=list(range(num_bins, 0, -1)),
+                       bin_dimensions=tuple(config["bin_dimensions"]),
+                       weight_limit=config["weight_limit"],
+                       load_limit=config["load_limit"],
+                       bins_for_pallets=list(range(num_bins + 1, num_bins + config["num_pallet_bins"] + 1)),
+                       num_pallets=config["num_pallets"],
+                       entrance_position=(0, 0, 0, num_bins + 1))
+
+
+def generate_workload(config: dict, seed: int) -> list:
+    """
+    Generate a reproducible sequence of operations.
+
+    :return: A list of ('place', Item), ('remove', int) and ('reorganize', None) tuples. The number of a removal
+             selects the stored item to remove (modulo the number of stored items when it is run).
+    """
+    rows = generate_random_item(num_items=config["num_operations"],
+                                min_width=20, max_width=45,
+                                min_height=10, max_height=120,
+                                min_depth=20, max_depth=45,
+                                min_weight=0.1, max_weight=20,
+                                can_rotate=2,
+                                seed=seed,
+                                csv_file_name=None)[1:]
+    rng = random.Random(seed)
+    workload = []
+    for step, (width, height, depth, weight, rotation, _) in enumerate(rows, 1):
+        if rng.random() < config["place_ratio"]:
+            workload.append(('place', Item(width, height, depth, rotation, weight, None, False)))
+        else:
+            workload.append(('remove', rng.randrange(1 << 30)))
+        if step % config["reorganize_every"] == 0:
+            workload.append(('reorganize', None))
+    return workload
+
+
+def check_invariants(bins, num_pallets: int=None) -> list:
+    """
+    Check the invariants of a dictionary of bins.
+
+    - the items of a bin do not overlap in height, and none reaches above the bin height
+    - no item is heavier than the weight limit of its bin, and no bin carries more than its load limit
+    - the cached stack height and load of every bin match its items
+    - with `num_pallets`, every pallet (an item or an empty pallet) is stored exactly once
+
+    :return: A list of descriptions of the violations, empty if all the invariants hold.
+    """
+    violations = []
+    pallet_ids = []
+    for bin in bins.values():
+        items = sorted(bin.items.values(), key=lambda item: item.position[1])
+        top = 0
+        for item in items:
+            if item.placed_bin != bin.id:
+                violations.append(f"item {item.id} in bin {bin.id} records bin {item.placed_bin}")
+            if item.position[1] < top:
+                violations.append(f"item {item.id} in bin {bin.id} starts at {item.position[1]} below the item under it ending at {top}")
+            top = max(top, bin._get_item_top(item))
+            if bin.weight_limit is not None and item.weight is not None and item.weight > bin.weight_limit:
+                violations.append(f"item {item.id} in bin {bin.id} weighs {item.weight} over the weight limit {bin.weight_limit}")
+        if top > bin.height:
+            violations.append(f"bin {bin.id} is stacked to {top} over its height {bin.height}")
+        if top != bin.get_current_height():
+            violations.append(f"bin {bin.id} caches the height {bin.get_current_height()} instead of {top}")
+        load = sum(item.weight for item in items if item.weight is not None)
+        if bin.load_limit is not None and load > bin.load_limit:
+            violations.append(f"bin {bin.id} carries {load} over its load limit {bin.load_limit}")
+        if abs(load - bin.get_current_load()) > 1e-6:
+            violations.append(f"bin {bin.id} caches the load {bin.get_current_load()} instead of {load}")
+        pallet_ids.extend(bin.items)
+
+    if num_pallets is not None and sorted(pallet_ids) != list(range(1, num_pallets + 1)):
+        violations.append(f"{len(pallet_ids)} pallets ({len(set(pallet_ids))} distinct) are stored instead of {num_pallets}")
+    return violations
+
+
+def _run_best_fit(manager: ASRSManager):
+    """
+    Pack copies of all the stored items and pallets into empty bins shaped like the bins of the manager.
+
+    :return: A tuple (seconds, bins, number of packed items).
+    """
+    items = [copy.copy(item) for bin in manager.bins.values() for item in bin.items.values()]
+    bins = {bin_id: Bin(width=bin.width, height=bin.height, depth=bin.depth, min_adjust_length=bin.min_adjust_length,
+                        id=bin_id, weight_limit=bin.weight_limit, load_limit=bin.load_limit)
+            for bin_id, bin in manager.bins.items()}
+    start = time.perf_counter()
+    unplaced = best_fit(items=items, all_bins=bins, bin_dimensions=manager.bin_dimensions,
+                        offline_priority=manager.offline_priority,
+                        capacity_index=CapacityClassIndex(bins, manager.offline_priority))
+    return time.perf_counter() - start, bins, len(items) - len(unplaced)
+
+
+def run_workload(config: dict, seed: int, check: bool=True) -> dict:
+    """
+    Run a seeded workload and check the invariants after every step.
+
+    :param check: Whether to check the invariants. The checks are not included in the timings.
+    :return: A dictionary with the times of every operation in seconds {operation: list}, the 'violations'
+             (a list of (step, description) tuples) and the number of 'rejected' placements.
+    """
+    manager = build_manager(config)
+    timings = {operation: [] for operation in OPERATIONS}
+    violations = []
+    rejected = 0
+    stored = []
+
+    for step, (operation, argument) in enumerate(generate_workload(config, seed)):
+        if operation == 'place':
+            start = time.perf_counter()
+            try:
+                plan = manager.place_item_online(argument)
+            except ValueError:
+                rejected += 1
+                continue
+            timings['first_fit'].append(time.perf_counter() - start)
+            stored.append(plan['pallet_id'])
+        elif operation == 'remove':
+            if not stored:
+                continue
+            start = time.perf_counter()
+            manager.remove_item(stored.pop(argument % len(stored)))
+            timings['remove_item'].append(time.perf_counter() - start)
+        else:
+            seconds, bins, packed = _run_best_fit(manager)
+            timings['best_fit'].append(seconds)
+            if check:
+                violations.extend((step, f"best_fit: {violation}") for violation in check_invariants(bins))
+                if packed != config["num_pallets"]:
+                    violations.append((step, f"best_fit: packed {packed} of {config['num_pallets']} pallets"))
+
+            start = time.perf_counter()
+            manager.reorganize_offline()
+            timings['reorganize_offline'].append(time.perf_counter() - start)
+
+        if check:
+            violations.extend((step, violation) for violation in check_invariants(manager.bins, config["num_pallets"]))
+
+    return {'timings': timings, 'violations': violations, 'rejected': rejected}
+
+
+def calibrate(repeat: int=5) -> float:
+    """
+    :return: The time in seconds of a fixed pure-Python loop, the fastest of `repeat` runs.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        values = {}
+        for i in range(200000):
+            values[i % 1000] = values.get(i % 1000, 0) + i * 0.5
+        sorted(values.values())
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def summarize(timings: dict, calibration: float) -> dict:
+    """
+    :return: A dictionary {operation: {'count', 'median_us', 'normalized'}}, where 'normalized' is the median time
+             divided by the calibration time.
+    """
+    summary = {}
+    for operation, times in timings.items():
+        if times:
+            median = statistics.median(times)
+            summary[operation] = {'count': len(times), 'median_us': median * 1e6, 'normalized': median / calibration}
+    return summary
+
+
+def measure(config: dict, seeds, repeat: int=3) -> dict:
+    """
+    Run the workloads of the given seeds `repeat` times without checks and keep the fastest median of every operation.
+    """
+    runs = []
+    calibration = float('inf')
+    for _ in range(repeat):
+        # calibrating between the runs keeps the fastest calibration close in time to the fastest run
+        calibration = min(calibration, calibrate())
+        timings = {operation: [] for operation in OPERATIONS}
+        for seed in seeds:
+            for operation, times in run_workload(config, seed, check=False)['timings'].items():
+                timings[operation].extend(times)
+        runs.append(timings)
+    best = {}
+    for timings in runs:
+        for operation, stats in summarize(timings, calibration).items():
+            if operation not in best or stats['median_us'] < best[operation]['median_us']:
+                best[operation] = stats
+    return {'calibration_us': calibration * 1e6, 'config': config, 'seeds': list(seeds), 'operations': best}
+
+
+def compare(measured: dict, baseline: dict, tolerance: float, normalize: bool=False) -> list:
+    """
+    :param tolerance: Allowed slowdown, e.g. 0.2 for 20 %.
+    :param normalize: Whether to compare the times divided by the calibration time instead of the median times.
+    :return: A list of (operation, slowdown) tuples of the operations that are slower than the baseline by more
+             than the tolerance.
+    """
+    key = 'normalized' if normalize else 'median_us'
+    regressions = []
+    for operation, stats in baseline['operations'].items():
+        current = measured['operations'].get(operation)
+        if current is None:
+            continue
+        slowdown = current[key] / stats[key] - 1
+        if slowdown > tolerance:
+            regressions.append((operation, slowdown))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check the invariants and the speed of the placement engines.")
+    parser.add_argument('--baseline', default='perf_baseline.json', help="path of the baseline file")
+    parser.add_argument('--record', action='store_true', help="write the baseline instead of comparing with it")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed slowdown, e.g. 0.2 for 20 %%")
+    parser.add_argument('--normalize', action='store_true', help="compare the times relative to a calibration loop")
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0, 1, 2])
+    args = parser.parse_args(argv)
+
+    for seed in args.seeds:
+        result = run_workload(DEFAULT_CONFIG, seed)
+        for step, violation in result['violations']:
+            print(f"seed {seed}, step {step}: {violation}")
+        if result['violations']:
+            return 1
+        print(f"seed {seed}: invariants hold ({result['rejected']} placements rejected)")
+
+    measured = measure(DEFAULT_CONFIG, args.seeds)
+    for operation, stats in measured['operations'].items():
+        print(f"{operation}: {stats['median_us']:.1f} us median over {stats['count']} operations")
+    if args.record:
+        with open(args.baseline, 'w') as f:
+            json.dump(measured, f, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(measured, baseline, args.tolerance, args.normalize)
+    for operation, slowdown in regressions:
+        print(f"{operation} is {slowdown:.0%} slower than the baseline")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
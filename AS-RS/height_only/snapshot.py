@@ -0,0 +1,133 @@
+"""
+Columnar snapshot of the bins and items of an ASRSManager.
+Every item attribute is stored as one NumPy array, so a snapshot is written and read with a single
+`np.savez` / `np.load` and no per-item pickling. Item and bin IDs must be either all integers or all strings.
+"""
+import json
+import numpy as np
+from item import Item
+
+SNAPSHOT_VERSION = 1
+
+ITEM_FLOAT_COLUMNS = ('width', 'height', 'depth', 'weight', 'arrival_time')
+
+
+def bins_to_columns(bins: dict) -> dict:
+    """
+    Convert the bins and their items to a dictionary of NumPy arrays.
+
+    :param bins: A dictionary of Bin objects {id: Bin}.
+    :return: A dictionary {column name: np.ndarray}.
+    """
+    bin_list = list(bins.values())
+    items = [item for bin in bin_list for item in bin.items.values()]
+
+    columns = {
+        'bin_id': np.asarray([bin.id for bin in bin_list]),
+        'bin_size': np.asarray([(bin.width, bin.height, bin.depth) for bin in bin_list], dtype=float).reshape(-1, 3),
+        'bin_current_height': np.asarray([bin.get_current_height() for bin in bin_list], dtype=float),
+        'bin_current_load': np.asarray([bin.get_current_load() for bin in bin_list], dtype=float),
+        'bin_item_count': np.asarray([len(bin.items) for bin in bin_list], dtype=np.int64),
+        'item_id': np.asarray([item.id for item in items]),
+        'item_rotation': np.asarray([bool(item.rotation) for item in items], dtype=bool),
+        'item_empty': np.asarray([bool(item.empty) for item in items], dtype=bool),
+        'item_position': np.asarray([item.position for item in items], dtype=float).reshape(-1, 3),
+        'item_placed_dimensions': np.asarray([item.placed_dimensions for item in items], dtype=float).reshape(-1, 3),
+    }
+    for name in ITEM_FLOAT_COLUMNS:
+        columns[f'item_{name}'] = np.asarray([np.nan if getattr(item, name) is None else getattr(item, name) for item in items], dtype=float)
+    return columns
+
+
+def save_columns(path, columns: dict, config: dict):
+    """
+    Write the columns and the configuration to an uncompressed `.npz` file.
+    """
+    np.savez(path, version=np.asarray(SNAPSHOT_VERSION), config=np.asarray(json.dumps(config)), **columns)
+
+
+def load_columns(path) -> tuple[dict, dict]:
+    """
+    Read a snapshot written by `save_columns`.
+
+    :return: A tuple (columns, config).
+    """
+    with np.load(path, allow_pickle=False) as data:
+        if int(data['version']) != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {int(data['version'])} in {path}.")
+        config = json.loads(str(data['config']))
+        columns = {name: data[name] for name in data.files if name not in ('version', 'config')}
+    return columns, config
+
+
+def _compact(column: np.ndarray) -> np.ndarray:
+    # float columns hold integral sizes as x.0; give whole columns of integers back as int like the config does
+    if column.dtype.kind == 'f' and np.all(np.isfinite(column)) and np.array_equal(column, np.floor(column)):
+        return column.astype(np.int64)
+    return column
+
+
+def item_loaders(columns: dict) -> list:
+    """
+    Create one loader per bin that rebuilds the Item objects of the bin from the columns.
+    The Item objects are only created when a loader is called, so restoring a large rack does not
+    pay for the bins that are never touched.
+
+    :return: A list of functions returning a list of Item objects, in the order of `columns['bin_id']`.
+    """
+    ids = bin_ids(columns)
+    offsets = np.concatenate(([0], np.cumsum(columns['bin_item_count']))).tolist()
+    item_columns = (
+        columns['item_id'],
+        _compact(columns['item_width']),
+        _compact(columns['item_height']),
+        _compact(columns['item_depth']),
+        columns['item_weight'],
+        # snapshots written before arrival times were recorded have no such column
+        columns.get('item_arrival_time', np.full(len(columns['item_id']), np.nan)),
+        columns['item_rotation'],
+        columns['item_empty'],
+        *(_compact(columns['item_position'][:, axis]) for axis in range(3)),
+        *(_compact(columns['item_placed_dimensions'][:, axis]) for axis in range(3)),
+    )
+
+    def make_loader(bin_id, start, end):
+        def load():
+            items = []
+            rows = zip(*(column[start:end].tolist() for column in item_columns))
+            for item_id, width, height, depth, weight, arrival_time, rotation, empty, x, y, z, placed_w, placed_h, placed_d in rows:
+                # Item.__init__ is bypassed: every attribute is restored here
+                item = Item.__new__(Item)
+                item.__dict__ = {
+                    'width': width,
+                    'height': height,
+                    'depth': depth,
+                    'rotation': rotation,
+                    'empty': empty,
+                    'weight': None if weight != weight else weight,
+                    'id': item_id,
+                    'position': (x, y, z),
+                    'placed_bin': bin_id,
+                    'placed_dimensions': (placed_w, placed_h, placed_d),
+                    'arrival_time': None if arrival_time != arrival_time else arrival_time,
+                }
+                items.append(item)
+            return items
+        return load
+
+    return [make_loader(bin_id, offsets[i], offsets[i + 1]) for i, bin_id in enumerate(ids)]
+
+
+def bin_ids(columns: dict) -> list:
+    """
+    :return: The bin IDs of a snapshot, in the order of its columns.
+    """
+    return _compact(columns['bin_id']).tolist()
+
+
+def bin_sizes(columns: dict) -> dict:
+    """
+    :return: A dictionary {bin_id: (width, height, depth)} of a snapshot.
+    """
+    sizes = zip(*(_compact(columns['bin_size'][:, axis]).tolist() for axis in range(3)))
+    return dict(zip(bin_ids(columns), sizes))
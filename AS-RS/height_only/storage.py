@@ -0,0 +1,204 @@
+"""
+SQLite storage backend for the bins and items of an ASRSManager.
+
+The database has three tables:
+
+- ``config``: one row (key, value) with the JSON configuration of the manager.
+- ``bins``: one row per bin with its dimensions, stack height and load.
+- ``items``: one row per item or empty pallet, indexed by item ID (primary key), bin ID and y-position.
+
+Numeric columns have no declared type, so integers and floats are read back as they were written.
+The database is opened in WAL mode, so reporting processes can read it with `connect_read_only`
+while the manager is writing, without going through the manager.
+"""
+import json
+import sqlite3
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from bin import Bin
+from item import Item
+
+ITEM_COLUMNS = ('id', 'bin_id', 'width', 'height', 'depth', 'weight', 'rotation', 'empty',
+                'x', 'y', 'z', 'placed_width', 'placed_height', 'placed_depth', 'arrival_time')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS config (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS bins (
+    id PRIMARY KEY,
+    width, height, depth, min_adjust_length,
+    weight_limit, load_limit,
+    current_height, current_load
+);
+CREATE TABLE IF NOT EXISTS items (
+    id PRIMARY KEY,
+    bin_id NOT NULL,
+    width, height, depth, weight,
+    rotation INTEGER, empty INTEGER,
+    x, y, z,
+    placed_width, placed_height, placed_depth,
+    arrival_time
+);
+CREATE INDEX IF NOT EXISTS items_bin_id ON items (bin_id);
+CREATE INDEX IF NOT EXISTS items_y ON items (y);
+"""
+
+
+def connect_read_only(path) -> sqlite3.Connection:
+    """
+    Open a read-only connection to a database written by `SQLiteBins`, e.g. for reporting.
+    The connection sees the state after the last completed manager operation.
+    """
+    return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+
+
+class SQLiteBins(MutableMapping):
+    """
+    A dictionary of bins {id: Bin} stored in an SQLite database.
+
+    Every bin is kept in memory with its stack height and load, but the items of a bin are only loaded when
+    the bin is accessed, and the items of at most `cache_size` bins are kept in memory. `pinned` bins, such as the
+    bins for empty pallets, are never unloaded.
+    The bins returned by `self[bin_id]` may be modified; they stay in memory until the next `flush`, which writes
+    the modified bins in one transaction. The bins returned by `peek` must not be modified.
+
+    :param path: Path of the database file.
+    :param cache_size: Maximum number of bins whose items are kept in memory, not counting pinned bins.
+    :param pinned: IDs of the bins that are never unloaded.
+    """
+    def __init__(self, path, cache_size: int=1000, pinned=()):
+        self.path = path
+        self.cache_size = cache_size
+        self.pinned = set(pinned)
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+        self.bins = {}
+        self.loaded = OrderedDict()  # bins with items in memory, least recently used first
+        self.checked_out = set()  # bins handed out for modification since the last flush
+        rows = self.connection.execute("SELECT id, width, height, depth, min_adjust_length, weight_limit, load_limit, "
+                                       "current_height, current_load FROM bins")
+        for bin_id, width, height, depth, min_adjust_length, weight_limit, load_limit, current_height, current_load in rows:
+            bin = Bin(width=width, height=height, depth=depth, min_adjust_length=min_adjust_length, id=bin_id,
+                      weight_limit=weight_limit, load_limit=load_limit)
+            bin.load_items(self._make_loader(bin_id), current_height, current_load)
+            self.bins[bin_id] = bin
+
+    def read_config(self):
+        """
+        :return: The configuration saved with `write_config`, or None if the database is new.
+        """
+        row = self.connection.execute("SELECT value FROM config WHERE key = 'manager'").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def write_config(self, config: dict):
+        with self.connection:
+            self.connection.execute("INSERT OR REPLACE INTO config (key, value) VALUES ('manager', ?)", (json.dumps(config),))
+
+    def _make_loader(self, bin_id):
+        def load():
+            items = []
+            rows = self.connection.execute(f"SELECT {', '.join(ITEM_COLUMNS)} FROM items WHERE bin_id = ?", (bin_id,))
+            for item_id, _, width, height, depth, weight, rotation, empty, x, y, z, placed_w, placed_h, placed_d, arrival_time in rows:
+                # Item.__init__ is bypassed: every attribute is restored here
+                item = Item.__new__(Item)
+                item.__dict__ = {
+                    'width': width,
+                    'height': height,
+                    'depth': depth,
+                    'rotation': bool(rotation),
+                    'empty': bool(empty),
+                    'weight': weight,
+                    'id': item_id,
+                    'position': (x, y, z),
+                    'placed_bin': bin_id,
+                    'placed_dimensions': (placed_w, placed_h, placed_d),
+                    'arrival_time': arrival_time,
+                }
+                items.append(item)
+            return items
+        return load
+
+    def _touch(self, bin_id):
+        self.loaded[bin_id] = True
+        self.loaded.move_to_end(bin_id)
+
+    def _evict(self):
+        # unload the least recently used bins that are neither pinned nor handed out for modification
+        candidates = [bin_id for bin_id in self.loaded if bin_id not in self.pinned and bin_id not in self.checked_out]
+        for bin_id in candidates[:max(0, len(candidates) - self.cache_size)]:
+            bin = self.bins[bin_id]
+            bin.load_items(self._make_loader(bin_id), bin.get_current_height(), bin.get_current_load())
+            del self.loaded[bin_id]
+
+    def __getitem__(self, bin_id):
+        bin = self.bins[bin_id]
+        self.checked_out.add(bin_id)
+        self._touch(bin_id)
+        return bin
+
+    def peek(self, bin_id):
+        """
+        Get a bin for reading only. Unmodified bins may be unloaded again to stay within `cache_size`.
+        """
+        bin = self.bins[bin_id]
+        self._touch(bin_id)
+        if len(self.loaded) > self.cache_size + len(self.pinned) + len(self.checked_out):
+            self._evict()
+        return bin
+
+    def __setitem__(self, bin_id, bin):
+        self.bins[bin_id] = bin
+        self.checked_out.add(bin_id)
+        self._touch(bin_id)
+
+    def __delitem__(self, bin_id):
+        del self.bins[bin_id]
+        self.loaded.pop(bin_id, None)
+        self.checked_out.discard(bin_id)
+        with self.connection:
+            self.connection.execute("DELETE FROM items WHERE bin_id = ?", (bin_id,))
+            self.connection.execute("DELETE FROM bins WHERE id = ?", (bin_id,))
+
+    def __contains__(self, bin_id):
+        return bin_id in self.bins
+
+    def __iter__(self):
+        return iter(self.bins)
+
+    def __len__(self):
+        return len(self.bins)
+
+    def locate(self, item_id):
+        """
+        :return: The ID of the bin holding the item as of the last flush, or None.
+        """
+        row = self.connection.execute("SELECT bin_id FROM items WHERE id = ?", (item_id,)).fetchone()
+        return row[0] if row else None
+
+    def flush(self, bin_ids=None):
+        """
+        Write the given bins (by default every bin handed out since the last flush) in one transaction,
+        then unload the least recently used bins beyond `cache_size`. Bins handed out since the last flush
+        but not given are treated as unmodified.
+        """
+        bin_ids = list(self.checked_out if bin_ids is None else bin_ids)
+        bins = [self.bins[bin_id] for bin_id in bin_ids if bin_id in self.bins]
+        with self.connection:
+            # delete first: an item moved between two of the bins must not be inserted before it is deleted
+            self.connection.executemany("DELETE FROM items WHERE bin_id = ?", [(bin.id,) for bin in bins])
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO items ({', '.join(ITEM_COLUMNS)}) VALUES ({', '.join('?' * len(ITEM_COLUMNS))})",
+                [(item.id, bin.id, item.width, item.height, item.depth, item.weight, bool(item.rotation), bool(item.empty),
+                  *item.position, *item.placed_dimensions, item.arrival_time)
+                 for bin in bins for item in bin.items.values()])
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO bins (id, width, height, depth, min_adjust_length, weight_limit, load_limit, "
+                "current_height, current_load) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(bin.id, bin.width, bin.height, bin.depth, bin.min_adjust_length, bin.weight_limit, bin.load_limit,
+                  bin.get_current_height(), bin.get_current_load()) for bin in bins])
+        self.checked_out.clear()
+        self._evict()
+
+    def close(self):
+        self.connection.close()
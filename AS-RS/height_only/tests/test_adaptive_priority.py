@@ -0,0 +1,88 @@
+"""
+Tests of the adaptive online priority, see adaptive_priority.py.
+"""
+import copy
+import random
+import pytest
+import regression_harness
+from ASRSManager import ASRSManager
+from item import Item
+
+NUM_BINS = 20
+NUM_PALLETS = 200
+
+
+def build_manager(residual_weight=0.0):
+    return ASRSManager(online_priority=list(range(1, NUM_BINS + 1)),
+                       offline_priority=list(range(NUM_BINS, 0, -1)),
+                       bin_dimensions=(50, 300, 50, 5),
+                       weight_limit=None,
+                       bins_for_pallets=list(range(NUM_BINS + 1, NUM_BINS + 9)),
+                       num_pallets=NUM_PALLETS,
+                       entrance_position=(0, 0, 0, NUM_BINS + 1),
+                       adaptive_priority={'travel_weight': 1.0, 'residual_weight': residual_weight})
+
+
+def linear_first_fit(manager, item):
+    """The bins that can take the item in the order of their scores, by a scan of every bin"""
+    fits = {id(capacity_class): adjusted_height
+            for capacity_class, _, adjusted_height in manager.online_index.fitting_classes(item)}
+    return [bin_id for bin_id in manager.adaptive_priority.order()
+            if id(manager.online_index.class_of_bin[bin_id]) in fits
+            and manager.bins[bin_id].get_residual_height() >= fits[id(manager.online_index.class_of_bin[bin_id])]]
+
+
+def random_item(rng):
+    return Item(rng.uniform(20, 45), rng.uniform(10, 120), rng.uniform(20, 45), 1, rng.uniform(0.1, 20), None, False)
+
+
+@pytest.mark.parametrize('residual_weight', [0.0, 0.5])
+def test_first_fit_matches_a_scan_of_the_bins(residual_weight):
+    manager = build_manager(residual_weight)
+    rng = random.Random(residual_weight)
+    probes = [random_item(rng) for _ in range(5)] + [Item(40, 300, 40, 1, 1, None, False)]
+    stored = []
+    for step in range(400):
+        if rng.random() < 0.7 or not stored:
+            try:
+                stored.append(manager.place_item_online(random_item(rng))['pallet_id'])
+            except ValueError:
+                pass  # the rack is full
+        else:
+            manager.remove_item(stored.pop(rng.randrange(len(stored))))
+        if step % 20 == 0:
+            for item in probes:
+                assert [bin_id for bin_id, _ in manager.adaptive_priority.iter_first_fit(item)] == linear_first_fit(manager, item)
+    assert regression_harness.check_invariants(manager.bins, NUM_PALLETS) == []
+    assert manager.adaptive_priority.full  # some bins were filled to the top
+
+
+def test_full_bins_leave_the_heap_until_they_get_room():
+    manager = build_manager()
+    priority = manager.adaptive_priority
+    plan = manager.place_item_online(Item(40, 300, 40, 1, 1, None, False))
+    full_bin = plan['target_bin']
+    assert full_bin in priority.full
+    priority.update(full_bin)  # no change, the bin stays full
+    assert full_bin in priority.full
+    priority.rebuild()
+    assert full_bin in priority.full and full_bin not in [bin_id for _, _, bin_id in priority.heap]
+    assert full_bin not in [bin_id for bin_id, _ in priority.iter_first_fit(Item(30, 10, 30, 1, 1, None, False))]
+    # the full bin is still ordered
+    assert sorted(priority.order()) == list(range(1, NUM_BINS + 1))
+
+    manager.remove_item(plan['pallet_id'])
+    assert full_bin not in priority.full
+    assert full_bin in [bin_id for bin_id, _ in priority.iter_first_fit(Item(30, 10, 30, 1, 1, None, False))]
+
+
+def test_copies_are_independent():
+    manager = build_manager()
+    forked = manager.fork()
+    forked.place_item_online(Item(40, 300, 40, 1, 1, None, False))
+    assert forked.adaptive_priority.full and not manager.adaptive_priority.full
+    item = Item(30, 10, 30, 1, 1, None, False)
+    assert [bin_id for bin_id, _ in manager.adaptive_priority.iter_first_fit(item)] == linear_first_fit(manager, item)
+    manager.commit(forked)
+    assert manager.adaptive_priority.full == forked.adaptive_priority.full
+    assert [bin_id for bin_id, _ in manager.adaptive_priority.iter_first_fit(item)] == linear_first_fit(manager, item)
@@ -0,0 +1,94 @@
+"""
+Tests of the capacity classes, see capacity_index.py and `algorithms.best_fit._best_fit_with_index`.
+The bins chosen through the index are compared with a linear scan of the bins in priority order.
+"""
+import copy
+import random
+import pytest
+from algorithms.best_fit import best_fit
+from bin import Bin
+from capacity_index import CapacityClassIndex
+from item import Item
+
+# (width, height, depth) of the bin types of a mixed rack
+BIN_TYPES = [(50, 300, 50), (50, 150, 50), (30, 300, 40)]
+
+
+def build_bins(rng, num_bins, bin_types=BIN_TYPES, fill=True):
+    bins = {}
+    for bin_id in range(1, num_bins + 1):
+        width, height, depth = rng.choice(bin_types)
+        bins[bin_id] = Bin(width, height, depth, 5, bin_id)
+        if fill:
+            # stack a random height of filler items
+            filler = Item(width, rng.randrange(0, height + 1, 5) or 5, depth, 0, None, -bin_id, False)
+            bins[bin_id].place_item(filler, (0, 0, 0))
+    return bins
+
+
+def random_item(rng, item_id=None):
+    return Item(rng.uniform(10, 50), rng.uniform(5, 200), rng.uniform(10, 50), rng.randint(0, 1), rng.uniform(0.1, 20), item_id, False)
+
+
+def linear_first_fit(bins, priority, item):
+    result = []
+    for bin_id in priority:
+        fit = bins[bin_id].fit_item(item)
+        if fit is not None and bins[bin_id].get_residual_height() >= fit[1]:
+            result.append((bin_id, fit[0]))
+    return result
+
+
+def linear_best_fit(bins, priority, item):
+    best = None
+    for rank, bin_id in enumerate(priority):
+        fit = bins[bin_id].fit_item(item)
+        if fit is not None and bins[bin_id].get_residual_height() >= fit[1]:
+            key = (bins[bin_id].get_residual_height() - fit[1], rank)
+            if best is None or key < best[0]:
+                best = (key, (bin_id, fit[0]))
+    return None if best is None else best[1]
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_first_fit_and_best_fit_match_a_linear_scan(seed):
+    rng = random.Random(seed)
+    bins = build_bins(rng, 60)
+    priority = list(bins)
+    rng.shuffle(priority)
+    index = CapacityClassIndex(bins, priority)
+    for _ in range(200):
+        item = random_item(rng)
+        assert list(index.iter_first_fit(item)) == linear_first_fit(bins, priority, item)
+        assert index.best_fit(item) == linear_best_fit(bins, priority, item)
+        # store the item in the first bin, or empty a random bin, and tell the index
+        candidates = linear_first_fit(bins, priority, item)
+        if candidates and rng.random() < 0.7:
+            bin_id, placed_dimensions = candidates[0]
+            item.placed_dimensions = placed_dimensions
+            bins[bin_id].place_item(item, (0, bins[bin_id].get_current_height(), 0))
+        else:
+            bin_id = rng.choice(priority)
+            bins[bin_id].reset()
+        index.update(bin_id)
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_indexed_best_fit_matches_the_linear_best_fit(seed):
+    # with bins of one size the indexed best fit places the items like the linear one
+    rng = random.Random(seed)
+    bin_dimensions = (50, 300, 50, 5)
+    items = [random_item(rng, item_id) for item_id in range(300)]
+    for item in items:
+        item.weight = None
+    results = []
+    for use_index in (False, True):
+        bins = build_bins(random.Random(seed), 30, [bin_dimensions[:3]], fill=False)
+        priority = list(range(30, 0, -1))
+        placed = [copy.copy(item) for item in items]
+        index = CapacityClassIndex(bins, priority) if use_index else None
+        unplaced = best_fit(placed, bins, bin_dimensions, offline_priority=priority, capacity_index=index)
+        results.append(({item.id: (item.placed_bin, item.position, item.placed_dimensions) for item in placed if item not in unplaced},
+                         sorted(item.id for item in unplaced)))
+    assert results[0] == results[1]
+    assert results[0][1]  # the bins were filled up
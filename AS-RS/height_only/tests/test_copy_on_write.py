@@ -0,0 +1,109 @@
+"""
+Tests of the copy-on-write forks, see copy_on_write.py and `ASRSManager.fork` / `ASRSManager.commit`.
+"""
+import copy
+import pytest
+import regression_harness
+from bin import Bin
+from copy_on_write import CopyOnWriteBins
+from item import Item
+
+CONFIG = regression_harness.DEFAULT_CONFIG
+
+
+def incoming_items(seed, num_items):
+    items = [argument for operation, argument in regression_harness.generate_workload(CONFIG, seed) if operation == 'place']
+    return [copy.copy(item) for item in items[:num_items]]
+
+
+def place_all(manager, items):
+    plans = []
+    for item in items:
+        try:
+            plans.append(manager.place_item_online(item))
+        except ValueError:
+            pass
+    return plans
+
+
+def bin_state(bins):
+    return {bin_id: (bin.get_current_height(), bin.get_current_load(),
+                     sorted((item.id, item.position, item.placed_dimensions, item.empty) for item in bin.items.values()))
+            for bin_id, bin in bins.items()}
+
+
+def test_bins_are_copied_on_first_access():
+    base = {1: Bin(50, 100, 50, 5, 1), 2: Bin(50, 100, 50, 5, 2)}
+    base[1].place_item(Item(10, 10, 10, 0, 1, 'a', False), (0, 0, 0))
+    bins = CopyOnWriteBins(base)
+
+    assert bins.peek(1) is base[1] and not bins.materialized
+    assert 1 in bins and 3 not in bins and not bins.materialized
+    bins[1].place_item(Item(10, 10, 10, 0, 1, 'b', False), (0, 15, 0))
+    assert set(bins.materialized) == {1} and bins.peek(1) is bins[1]
+    assert sorted(bins[1].items) == ['a', 'b'] and list(base[1].items) == ['a']
+    # the items are copied along with the bin
+    bins[1].items['a'].position = (0, 1, 0)
+    assert base[1].items['a'].position == (0, 0, 0)
+
+    bins[3] = Bin(50, 100, 50, 5, 3)
+    del bins[2]
+    assert list(bins) == [1, 3] and len(bins) == 2
+    assert 2 not in bins and sorted(base) == [1, 2]
+    with pytest.raises(KeyError):
+        bins[2]
+    with pytest.raises(KeyError):
+        del bins[2]
+
+
+def test_discarded_fork_leaves_the_manager_alone():
+    manager = regression_harness.build_manager(CONFIG)
+    place_all(manager, incoming_items(0, 40))
+    before, version = bin_state(manager.bins), manager.version
+
+    forked = manager.fork()
+    plans = place_all(forked, incoming_items(1, 20))
+    for plan in plans[::2]:
+        forked.remove_item(plan['pallet_id'])
+    forked.reorganize_offline()
+    assert bin_state(forked.bins) != before
+    assert bin_state(manager.bins) == before and manager.version == version
+    assert regression_harness.check_invariants(manager.bins, CONFIG['num_pallets']) == []
+
+
+def test_commit_applies_the_fork():
+    manager = regression_harness.build_manager(CONFIG)
+    reference = regression_harness.build_manager(CONFIG)
+    for system in (manager, reference):
+        place_all(system, incoming_items(0, 40))
+
+    forked = manager.fork()
+    place_all(forked, incoming_items(1, 20))
+    changed = manager.commit(forked)
+    place_all(reference, incoming_items(1, 20))
+    assert changed and set(changed) <= set(manager.bins)
+    assert bin_state(manager.bins) == bin_state(reference.bins)
+    assert regression_harness.check_invariants(manager.bins, CONFIG['num_pallets']) == []
+
+    # the indexes were taken over as well: later placements match the manager that never forked
+    items = incoming_items(2, 20)
+    assert [plan['target_bin'] for plan in place_all(manager, items)] == \
+           [plan['target_bin'] for plan in place_all(reference, copy.deepcopy(items))]
+    assert [item['id'] for item in manager.query_items_by_weight(min_weight=10)] == \
+           [item['id'] for item in reference.query_items_by_weight(min_weight=10)]
+
+
+def test_commit_rejects_stale_forks():
+    manager = regression_harness.build_manager(CONFIG)
+    forked = manager.fork()
+    place_all(forked, incoming_items(0, 5))
+    place_all(manager, incoming_items(1, 1))  # the manager changed after the fork
+    with pytest.raises(ValueError):
+        manager.commit(forked)
+
+    forked = manager.fork()
+    manager.commit(forked)
+    with pytest.raises(ValueError):
+        manager.commit(forked)  # a fork is committed once
+    with pytest.raises(ValueError):
+        regression_harness.build_manager(CONFIG).commit(manager.fork())
@@ -0,0 +1,44 @@
+"""
+Tests of the dual-command cycles, see `ASRSManager.plan_dual_command_cycles`.
+"""
+import copy
+import pytest
+import regression_harness
+
+CONFIG = regression_harness.DEFAULT_CONFIG
+
+
+def stored_manager(seed=0, num_items=60):
+    manager = regression_harness.build_manager(CONFIG)
+    items = [argument for operation, argument in regression_harness.generate_workload(CONFIG, seed) if operation == 'place']
+    stored = []
+    for item in items:
+        if len(stored) == num_items:
+            break
+        try:
+            stored.append(manager.place_item_online(copy.copy(item))['pallet_id'])
+        except ValueError:
+            continue
+    return manager, stored, items[-10:]
+
+
+def test_store_plans_from_a_fork_are_paired():
+    manager, stored, incoming = stored_manager()
+    forked = manager.fork()
+    store_plans = [forked.place_item_online(copy.copy(item)) for item in incoming[:4]]
+    assert len({plan['pallet_id'] for plan in store_plans}) == 4
+    version = manager.version
+    report = manager.plan_dual_command_cycles(store_plans, stored[:6])
+    assert manager.version == version
+    assert report['dual_command_cycles'] == 4 and report['single_command_cycles'] == 2
+    assert sorted(cycle['retrieval_item_id'] for cycle in report['cycles']) == sorted(stored[:6])
+    assert report['total_travel'] <= report['single_command_travel']
+
+
+def test_store_plans_sharing_a_pallet_are_rejected():
+    manager, stored, incoming = stored_manager()
+    # both plans are made on the same state, so they take the same pallet and the same slot
+    store_plans = [manager.plan_online_placement(copy.copy(item)) for item in incoming[:2]]
+    assert store_plans[0]['pallet_id'] == store_plans[1]['pallet_id']
+    with pytest.raises(ValueError):
+        manager.plan_dual_command_cycles(store_plans, stored[:2])
@@ -0,0 +1,74 @@
+"""
+Tests of the cached load of the bins, see `Bin.get_current_load` and the load_limit of ASRSManager.
+The cached load is compared with a rescan of the items after placements and removals.
+"""
+import copy
+import random
+import pytest
+import regression_harness
+from bin import Bin
+from item import Item
+
+
+def rescan_load(bin):
+    return sum(item.weight for item in bin.items.values() if item.weight is not None)
+
+
+def test_cached_load_matches_a_rescan_after_removals():
+    rng = random.Random(0)
+    bin = Bin(50, 10 ** 6, 50, 5, 1, load_limit=500)
+    stored = []
+    for step in range(2000):
+        if rng.random() < 0.55 or not stored:
+            weight = None if rng.random() < 0.1 else rng.uniform(0.1, 20)
+            item = Item(30, rng.uniform(5, 50), 30, 0, weight, step, False)
+            bin.place_item(item, (0, bin.get_current_height(), 0))
+            stored.append(item.id)
+        else:
+            # remove from anywhere in the stack, not only from the top
+            bin.remove_item(stored.pop(rng.randrange(len(stored))))
+        assert bin.get_current_load() == pytest.approx(rescan_load(bin), abs=1e-9)
+        probe = Item(30, 10, 30, 0, rng.uniform(0.1, 20), None, False)
+        if abs(rescan_load(bin) + probe.weight - bin.load_limit) > 1e-9:  # away from rounding at the limit
+            assert bin.can_carry(probe) == (rescan_load(bin) + probe.weight <= bin.load_limit)
+    # once the bin is empty, no rounding error is left
+    for item_id in stored:
+        bin.remove_item(item_id)
+    assert bin.get_current_load() == 0
+
+
+def test_copies_and_restored_bins_track_their_own_load():
+    bin = Bin(50, 1000, 50, 5, 1)
+    for weight in (3.5, 7.25, None):
+        bin.place_item(Item(30, 10, 30, 0, weight, len(bin.items), False), (0, bin.get_current_height(), 0))
+    bin_copy = bin.copy()
+    bin_copy.remove_item(0)
+    assert bin.get_current_load() == 10.75 and bin_copy.get_current_load() == 7.25
+
+    restored = Bin(50, 1000, 50, 5, 2)
+    restored.load_items([copy.copy(item) for item in bin.items.values()])  # the load is not given: it is rescanned
+    assert restored.get_current_load() == 10.75
+    restored.remove_item(1)
+    assert restored.get_current_load() == rescan_load(restored) == 3.5
+
+
+def test_manager_keeps_the_load_limit_through_removals():
+    config = dict(regression_harness.DEFAULT_CONFIG, load_limit=60)
+    manager = regression_harness.build_manager(config)
+    items = [argument for operation, argument in regression_harness.generate_workload(config, 0) if operation == 'place']
+    plans = []
+    for item in items[:300]:
+        try:
+            plans.append(manager.place_item_online(item))
+        except ValueError:
+            pass
+    for plan in plans[::2]:
+        manager.remove_item(plan['pallet_id'])
+    for bin in manager.bins.values():
+        assert bin.get_current_load() == pytest.approx(rescan_load(bin), abs=1e-9)
+        assert bin.get_current_load() <= config['load_limit'] + 1e-9
+    # the freed load can be used again
+    plan = manager.place_item_online(Item(30, 10, 30, 1, 0.5, None, False))
+    bin = manager.bins[plan['target_bin']]
+    assert bin.get_current_load() == pytest.approx(rescan_load(bin), abs=1e-9)
+    assert regression_harness.check_invariants(manager.bins, config['num_pallets']) == []
@@ -0,0 +1,51 @@
+"""
+Tests of the buffered lookahead placement, see algorithms/lookahead.py and `ASRSManager.place_items_lookahead`.
+"""
+import pytest
+import regression_harness
+
+CONFIG = regression_harness.DEFAULT_CONFIG
+
+
+def incoming_items(seed, num_items):
+    items = [argument for operation, argument in regression_harness.generate_workload(CONFIG, seed) if operation == 'place']
+    return items[:num_items]
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_lookahead_keeps_the_invariants(seed):
+    manager = regression_harness.build_manager(CONFIG)
+    items = incoming_items(seed, 120)
+    result = manager.place_items_lookahead(items, buffer_size=5, compare=True)
+
+    # the comparison with first fit runs on a fork and leaves the bins alone
+    assert regression_harness.check_invariants(manager.bins, CONFIG['num_pallets']) == []
+    # every incoming item is either stored once or rejected
+    placed = [plan['item_object'] for plan in result['plans']]
+    assert sorted(map(id, placed + result['unplaced'])) == sorted(map(id, items))
+    for plan in result['plans']:
+        stored = manager.bins[plan['target_bin']].items[plan['pallet_id']]
+        assert stored.placed_bin == plan['target_bin'] and not stored.empty
+        assert stored.weight == plan['item_object'].weight
+    # the harness draws weights up to 20 over the weight limit of 18, and those items can not be stored
+    assert all(item.weight <= CONFIG['weight_limit'] for item in placed)
+    assert result['lookahead']['unplaced'] == len(result['unplaced'])
+    assert result['lookahead']['bins_used'] == sum(1 for bin_id in manager.online_priority if manager.bins[bin_id].items)
+    assert result['first_fit']['unplaced'] == sum(1 for item in items if item.weight > CONFIG['weight_limit'])
+
+    # the stored items can be removed and reorganized as usual
+    for plan in result['plans'][::3]:
+        manager.remove_item(plan['pallet_id'])
+    manager.reorganize_offline()
+    assert regression_harness.check_invariants(manager.bins, CONFIG['num_pallets']) == []
+
+
+def test_lookahead_after_removals_keeps_the_invariants():
+    manager = regression_harness.build_manager(CONFIG)
+    first = manager.place_items_lookahead(incoming_items(2, 40), compare=False)
+    assert first['first_fit'] is None
+    for plan in first['plans'][::2]:
+        manager.remove_item(plan['pallet_id'])
+    second = manager.place_items_lookahead(incoming_items(3, 40), buffer_size=3, compare=False)
+    assert len(second['plans']) + len(second['unplaced']) == 40
+    assert regression_harness.check_invariants(manager.bins, CONFIG['num_pallets']) == []
@@ -0,0 +1,79 @@
+"""
+Tests of the memory-mapped occupancy view, see occupancy_view.py.
+"""
+import random
+import numpy as np
+import pytest
+from item import Item
+from occupancy_view import OccupancyReader
+import regression_harness
+
+
+def expected_occupancy(manager, bin_ids):
+    bins = [manager.bins[bin_id] for bin_id in bin_ids]
+    pallets = [sum(1 for item in bin.items.values() if item.empty) for bin in bins]
+    return {
+        'residual_height': [bin.get_residual_height() for bin in bins],
+        'item_count': [len(bin.items) - count for bin, count in zip(bins, pallets)],
+        'pallet_count': pallets,
+        'load': [bin.get_current_load() for bin in bins],
+    }
+
+
+def assert_matches(reader, manager):
+    state = reader.read()
+    assert state['version'] == manager.version
+    for column, values in expected_occupancy(manager, reader.bin_ids).items():
+        np.testing.assert_allclose(state[column], values, err_msg=column)
+
+
+@pytest.fixture
+def published(tmp_path):
+    manager = regression_harness.build_manager(regression_harness.DEFAULT_CONFIG)
+    manager.publish_occupancy(tmp_path / 'occupancy')
+    reader = OccupancyReader(tmp_path / 'occupancy')
+    yield manager, reader
+    reader.close()
+    manager.close()
+
+
+def test_reader_follows_placements_and_removals(published):
+    manager, reader = published
+    assert sorted(reader.bin_ids) == sorted(manager.bins)
+    assert_matches(reader, manager)
+
+    rng = random.Random(0)
+    stored = []
+    for _ in range(100):
+        if rng.random() < 0.7 or not stored:
+            item = Item(rng.uniform(20, 45), rng.uniform(10, 80), rng.uniform(20, 45), 1, rng.uniform(0.1, 15), None, False)
+            stored.append(manager.place_item_online(item)['pallet_id'])
+        else:
+            manager.remove_item(stored.pop(rng.randrange(len(stored))))
+        assert_matches(reader, manager)
+
+    manager.reorganize_offline()
+    assert_matches(reader, manager)
+
+
+def test_reader_sees_committed_forks_only(published):
+    manager, reader = published
+    forked = manager.fork()
+    forked.place_item_online(Item(30, 40, 30, 1, 5, None, False))
+    before = reader.read()
+    assert before['version'] == manager.version
+    assert before['item_count'].sum() == 0
+
+    manager.commit(forked)
+    assert_matches(reader, manager)
+    assert reader.read()['item_count'].sum() == 1
+
+
+def test_reader_waits_while_the_publisher_writes(published):
+    manager, reader = published
+    publisher = manager.occupancy_publisher
+    publisher._header[1] += 1  # odd sequence: a write is in progress
+    with pytest.raises(TimeoutError):
+        reader.read(timeout=0.01)
+    publisher._header[1] += 1
+    assert_matches(reader, manager)
@@ -0,0 +1,54 @@
+"""
+Tests of the relocation of empty pallets toward the entrance, see `ASRSManager.plan_pallet_prepositioning`.
+"""
+import copy
+import pytest
+import regression_harness
+from ASRSManager import ASRSManager
+
+NUM_PALLETS = 30
+
+
+def build_manager():
+    # 20 pallets in bin 5, 10 in bin 6, and the entrance at the bottom of the empty bin 7
+    return ASRSManager(online_priority=[1, 2, 3, 4],
+                       offline_priority=[4, 3, 2, 1],
+                       bin_dimensions=(50, 100, 50, 5),
+                       weight_limit=None,
+                       bins_for_pallets=[5, 6, 7],
+                       num_pallets=NUM_PALLETS,
+                       entrance_position=(0, 0, 0, 7))
+
+
+def positions(manager):
+    return {bin_id: {item.id: item.position for item in manager.bins[bin_id].items.values()}
+            for bin_id in manager.bins_for_pallets}
+
+
+def test_prepositioning_moves_the_pallets():
+    manager = build_manager()
+    plan = manager.plan_pallet_prepositioning(10)
+    assert len(plan['moves']) == 10 and plan['expected_saving'] > 0
+    assert manager.execute_pallet_prepositioning(plan) is True
+    for move in plan['moves']:
+        assert manager.bins[move['to_bin']].items[move['pallet_id']].position == move['to_position']
+        assert move['pallet_id'] not in manager.bins[move['from_bin']].items
+    assert regression_harness.check_invariants(manager.bins, NUM_PALLETS) == []
+    # the pallets are now where the plan wanted them
+    assert manager.plan_pallet_prepositioning(10)['moves'] == []
+
+
+@pytest.mark.parametrize('field, value', [('from_position', (0, 50, 0)), ('to_position', (0, 95, 0))])
+def test_prepositioning_is_all_or_nothing(field, value):
+    manager = build_manager()
+    plan = manager.plan_pallet_prepositioning(10)
+    before, version = positions(manager), manager.version
+    # the last move is no longer possible, after the others were applied
+    stale = copy.deepcopy(plan)
+    stale['moves'][-1][field] = value
+    assert manager.execute_pallet_prepositioning(stale) is False
+    assert positions(manager) == before and manager.version == version
+    assert regression_harness.check_invariants(manager.bins, NUM_PALLETS) == []
+
+    assert manager.execute_pallet_prepositioning(plan) is True
+    assert positions(manager) != before
@@ -0,0 +1,104 @@
+"""
+Tests of the crane travel times, see rack_topology.py. The expected values are worked out by hand.
+"""
+import math
+import pytest
+from ASRSManager import ASRSManager
+from rack_topology import RackTopology
+
+# bin ID -> (bay, level)
+BINS = {1: (0, 0), 2: (1, 0), 3: (0, 1), 4: (2, 1)}
+
+
+def build_topology(**kwargs):
+    config = dict(bin_ids=BINS, bay_width=3, level_height=20, min_adjust_length=5,
+                  horizontal_speed=2, vertical_speed=4, horizontal_acceleration=1)
+    config.update(kwargs)
+    return RackTopology(bins=config.pop('bin_ids'), **config)
+
+
+def test_default_topology_is_the_distance_along_a_row():
+    topology = RackTopology.from_config(None, [1, 2, 3, 4], (50, 1000, 50, 5))
+    # one axis at a time at unit speed: 50 per bin, plus the height difference
+    assert topology.travel_time(1, 0, 3, 20) == pytest.approx(2 * 50 + 20)
+    assert topology.travel_time(4, 35, 2, 10) == pytest.approx(2 * 50 + 25)
+    assert topology.travel_time(2, 15, 2, 15) == 0
+
+
+def test_accelerated_horizontal_travel():
+    topology = build_topology()
+    # top speed 2 and acceleration 1: the top speed is reached after 2 * 2 / 1 = 4 units of distance (both ways)
+    # one bay (3 units) never reaches it: 2 * sqrt(3 / 1)
+    assert topology.travel_time(1, 0, 2, 0) == pytest.approx(2 * math.sqrt(3))
+    # two bays (6 units): 6 / 2 + 2 / 1
+    assert topology.horizontal_times[2] == pytest.approx(6 / 2 + 2 / 1)
+    # bin 4 is one level up, which takes 20 / 4 = 5 as well
+    assert topology.travel_time(1, 0, 4, 0) == pytest.approx(5)
+
+
+def test_simultaneous_and_sequential_travel():
+    simultaneous = build_topology()
+    sequential = build_topology(simultaneous=False)
+    # bin 2 to bin 3: one bay (2 * sqrt(3)) and one level up (20 / 4 = 5)
+    assert simultaneous.travel_time(2, 0, 3, 0) == pytest.approx(5)
+    assert sequential.travel_time(2, 0, 3, 0) == pytest.approx(5 + 2 * math.sqrt(3))
+    # bin 1 at height 0 to bin 4 at height 5: two bays (5) and 20 + 5 = 25 up (6.25)
+    assert simultaneous.travel_time(1, 0, 4, 5) == pytest.approx(6.25)
+    assert sequential.travel_time(1, 0, 4, 5) == pytest.approx(11.25)
+
+
+def test_accelerated_vertical_travel_off_the_height_grid():
+    topology = build_topology(vertical_acceleration=2)
+    # top speed 4 and acceleration 2: the top speed is reached after 4 * 4 / 2 = 8 units of distance
+    assert topology.travel_time(1, 0, 1, 5) == pytest.approx(2 * math.sqrt(5 / 2))
+    assert topology.travel_time(1, 0, 3, 5) == pytest.approx(25 / 4 + 4 / 2)
+    # 2.5 is not a multiple of min_adjust_length, so it is computed instead of looked up
+    assert topology.travel_time(1, 0, 1, 2.5) == pytest.approx(2 * math.sqrt(2.5 / 2))
+    assert topology.travel_time(1, 0, 1, 12.5) == pytest.approx(12.5 / 4 + 4 / 2)
+
+
+def test_tables_from_an_origin_match_the_travel_times():
+    topology = build_topology(vertical_acceleration=2)
+    tables = topology.travel_times_from(2, 10)
+    for bin_id, times in tables.items():
+        for steps, time in enumerate(times):
+            assert time == pytest.approx(float(topology.travel_time(2, 10, bin_id, steps * 5)))
+    # one bay (2 * sqrt(3)) and 20 + 15 - 10 = 25 up
+    assert topology.travel_time_from(2, 10, 4, 15) == pytest.approx(25 / 4 + 4 / 2)
+    # above the precomputed heights (e.g. a tall pallet stack) the tables are extended
+    assert topology.travel_time_from(2, 10, 1, 400) == pytest.approx(390 / 4 + 4 / 2)
+    assert topology.travel_time_from(2, 10, 1, 2.5) == pytest.approx(2 * math.sqrt(7.5 / 2))
+
+
+def test_priority_orders_bins_by_travel_time_from_the_entrance():
+    topology = build_topology()
+    # from the bottom of bin 1: bin 2 (2 * sqrt(3)), bin 3 (5), bin 4 (max(5, 5) = 5), ties keep the given order
+    assert topology.priority([4, 3, 2], 1, 0) == [2, 4, 3]
+    assert topology.priority([4, 3, 2], 1, 0, farthest_first=True) == [4, 3, 2]
+
+
+def test_from_config():
+    config = {'bins': [[1, 0, 0], [2, 1, 0], [3, 0, 1], [4, 2, 1]], 'bay_width': 3, 'level_height': 20,
+              'horizontal_speed': 2, 'vertical_speed': 4, 'horizontal_acceleration': 1}
+    topology = RackTopology.from_config(config, [1, 2, 3, 4], (50, 1000, 50, 5))
+    assert topology.bins == BINS
+    assert topology.travel_time(1, 0, 4, 5) == pytest.approx(6.25)
+    with pytest.raises(ValueError):
+        RackTopology.from_config(config, [1, 2, 3, 4, 5], (50, 1000, 50, 5))
+
+
+def test_manager_travel_times_follow_the_topology():
+    manager = ASRSManager(online_priority='nearest',
+                          offline_priority='farthest',
+                          bin_dimensions=(10, 20, 10, 5),
+                          weight_limit=None,
+                          bins_for_pallets=[5],
+                          num_pallets=4,
+                          entrance_position=(0, 0, 0, 1),
+                          topology={'bins': {**BINS, 5: (3, 0)}, 'bay_width': 3,
+                                    'horizontal_speed': 2, 'vertical_speed': 4, 'horizontal_acceleration': 1})
+    # from the bottom of bin 1: bin 1 (0), bin 2 (2 * sqrt(3)), bins 3 and 4 (5), ties in the order of the bin IDs
+    assert manager.online_priority == [1, 2, 3, 4]
+    assert manager.offline_priority == [3, 4, 2, 1]
+    assert manager._calculate_distance(2, 0, 3, 0) == pytest.approx(5)
+    assert manager._calculate_distance(1, 0, 4, 5) == pytest.approx(6.25)
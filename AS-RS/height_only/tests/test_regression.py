@@ -0,0 +1,48 @@
+"""
+Invariant and performance regression tests for the placement engines, see regression_harness.py.
+
+The performance test compares with the baseline file in the `ASRS_PERF_BASELINE` environment variable
+(written with `python regression_harness.py --record --baseline <path>`) and is skipped without it.
+`ASRS_PERF_TOLERANCE` sets the allowed slowdown (default 0.2, i.e. 20 %).
+"""
+import json
+import os
+import pytest
+import regression_harness
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_invariants(seed):
+    result = regression_harness.run_workload(regression_harness.DEFAULT_CONFIG, seed)
+    assert result['violations'] == []
+    assert all(result['timings'][operation] for operation in regression_harness.OPERATIONS)
+
+
+def test_workload_is_reproducible():
+    first = regression_harness.generate_workload(regression_harness.DEFAULT_CONFIG, 7)
+    second = regression_harness.generate_workload(regression_harness.DEFAULT_CONFIG, 7)
+    assert [(operation, vars(argument) if operation == 'place' else argument) for operation, argument in first] == \
+           [(operation, vars(argument) if operation == 'place' else argument) for operation, argument in second]
+
+
+def test_invariant_checks_detect_violations():
+    manager = regression_harness.build_manager(regression_harness.DEFAULT_CONFIG)
+    plan = manager.place_item_online(regression_harness.Item(30, 40, 30, 1, 5, None, False))
+    item = manager.bins[plan['target_bin']].items[plan['pallet_id']]
+    item.position = (0, manager.bins[plan['target_bin']].height, 0)
+    del manager.bins[manager.bins_for_pallets[0]].items[plan['pallet_id'] + 1]
+
+    violations = regression_harness.check_invariants(manager.bins, regression_harness.DEFAULT_CONFIG['num_pallets'])
+    assert any('over its height' in violation for violation in violations)
+    assert any('pallets' in violation for violation in violations)
+
+
+def test_performance():
+    path = os.environ.get('ASRS_PERF_BASELINE')
+    if not path:
+        pytest.skip("ASRS_PERF_BASELINE is not set")
+    with open(path) as f:
+        baseline = json.load(f)
+    measured = regression_harness.measure(baseline['config'], baseline['seeds'])
+    regressions = regression_harness.compare(measured, baseline, float(os.environ.get('ASRS_PERF_TOLERANCE', 0.2)))
+    assert regressions == []
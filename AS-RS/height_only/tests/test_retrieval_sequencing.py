@@ -0,0 +1,43 @@
+"""
+Tests of the batch retrieval planning, see algorithms/retrieval_sequencing.py.
+"""
+import random
+import time
+from ASRSManager import ASRSManager
+from item import Item
+
+
+def build_wave(num_bins, num_items, seed=0):
+    manager = ASRSManager(online_priority=list(range(1, num_bins + 1)),
+                          offline_priority=list(range(num_bins, 0, -1)),
+                          bin_dimensions=(50, 1000, 50, 5),
+                          weight_limit=None,
+                          bins_for_pallets=list(range(num_bins + 1, num_bins + 13)),
+                          num_pallets=num_items,
+                          entrance_position=(0, 0, 0, num_bins + 1))
+    rng = random.Random(seed)
+    item_ids = [manager.place_item_online(Item(30, rng.randint(10, 60), 30, 1, None, None, False))['pallet_id']
+                for _ in range(num_items)]
+    rng.shuffle(item_ids)
+    return manager, item_ids
+
+
+def test_large_wave_is_planned_quickly():
+    manager, item_ids = build_wave(num_bins=120, num_items=2000)
+    start = time.perf_counter()
+    plan = manager.plan_retrievals(item_ids)
+    seconds = time.perf_counter() - start
+
+    assert seconds < 1.0
+    assert sorted(plan['sequence']) == sorted(item_ids)
+    assert plan['planned_travel'] <= plan['naive_travel']
+    assert plan['saving'] == plan['naive_travel'] - plan['planned_travel']
+
+
+def test_plan_matches_executed_retrievals():
+    manager, item_ids = build_wave(num_bins=10, num_items=60, seed=1)
+    plan = manager.plan_retrievals(item_ids)
+    assert plan['planned_travel'] <= plan['naive_travel']
+    for move in plan['moves']:
+        pallet = manager.remove_item(move['item_id'])['pallet']
+        assert (pallet['placed_bin'], tuple(pallet['position'])) == (move['pallet_return_bin'], move['pallet_return_position'])
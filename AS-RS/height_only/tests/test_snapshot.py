@@ -0,0 +1,89 @@
+"""
+Tests of the columnar snapshots, see snapshot.py and `ASRSManager.save` / `ASRSManager.load`.
+"""
+import copy
+import numpy as np
+import pytest
+import regression_harness
+import snapshot
+from ASRSManager import ASRSManager
+from bin import Bin
+from item import Item
+
+CONFIG = regression_harness.DEFAULT_CONFIG
+
+ITEM_ATTRIBUTES = ('id', 'width', 'height', 'depth', 'rotation', 'empty', 'weight', 'position', 'placed_bin',
+                   'placed_dimensions', 'arrival_time')
+
+
+def busy_manager(seed=0, num_operations=400):
+    """A manager after the first operations of a harness workload, with items, empty pallets and removals"""
+    manager = regression_harness.build_manager(CONFIG)
+    stored = []
+    for operation, argument in regression_harness.generate_workload(CONFIG, seed)[:num_operations]:
+        if operation == 'place':
+            try:
+                stored.append(manager.place_item_online(argument)['pallet_id'])
+            except ValueError:
+                pass
+        elif operation == 'remove' and stored:
+            manager.remove_item(stored.pop(argument % len(stored)))
+    return manager
+
+
+def bin_state(bins):
+    return {bin_id: (bin.width, bin.height, bin.depth, bin.get_current_height(), bin.get_current_load(),
+                     {item.id: tuple(getattr(item, name) for name in ITEM_ATTRIBUTES) for item in bin.items.values()})
+            for bin_id, bin in bins.items()}
+
+
+def test_manager_round_trip(tmp_path):
+    manager = busy_manager()
+    path = tmp_path / 'rack.npz'
+    manager.save(path)
+    loaded = ASRSManager.load(path)
+
+    assert bin_state(loaded.bins) == bin_state(manager.bins)
+    assert loaded._get_config() == manager._get_config()
+    assert regression_harness.check_invariants(loaded.bins, CONFIG['num_pallets']) == []
+    # the restored system makes the same decisions
+    items = [argument for operation, argument in regression_harness.generate_workload(CONFIG, 1) if operation == 'place'][:30]
+    for item in items:
+        plans = []
+        for system in (manager, loaded):
+            try:
+                plans.append(system.place_item_online(copy.copy(item)))
+            except ValueError:
+                plans.append(None)
+        if plans[0] is not None:
+            plans[0].pop('item_object'), plans[1].pop('item_object')
+        assert plans[0] == plans[1]
+
+
+def test_columns_round_trip(tmp_path):
+    bins = {'A': Bin(50, 100, 40, 5, 'A'), 'B': Bin(30, 100, 30, 5, 'B')}
+    stored = Item(20.5, 30, 10, 1, 7.25, 'item', False)
+    stored.placed_dimensions = (20.5, 10, 30)
+    stored.arrival_time = 1700000000.5
+    pallet = Item(50, 5, 40, 0, None, 'pallet', True)
+    bins['A'].place_item(pallet, (0, 0, 0))
+    bins['A'].place_item(stored, (0, 5, 0))
+
+    path = tmp_path / 'columns.npz'
+    snapshot.save_columns(path, snapshot.bins_to_columns(bins), {'name': 'test'})
+    columns, config = snapshot.load_columns(path)
+    assert config == {'name': 'test'}
+    assert snapshot.bin_ids(columns) == ['A', 'B']
+    assert snapshot.bin_sizes(columns) == {'A': (50, 100, 40), 'B': (30, 100, 30)}
+    loaded = {bin_id: load() for bin_id, load in zip(snapshot.bin_ids(columns), snapshot.item_loaders(columns))}
+    assert loaded['B'] == []
+    assert [tuple(getattr(item, name) for name in ITEM_ATTRIBUTES) for item in loaded['A']] == \
+           [tuple(getattr(item, name) for name in ITEM_ATTRIBUTES) for item in (pallet, stored)]
+    assert columns['bin_current_height'].tolist() == [15.0, 0.0]
+
+
+def test_unknown_version_is_rejected(tmp_path):
+    path = tmp_path / 'future.npz'
+    np.savez(path, version=np.asarray(snapshot.SNAPSHOT_VERSION + 1), config=np.asarray('{}'))
+    with pytest.raises(ValueError):
+        snapshot.load_columns(path)
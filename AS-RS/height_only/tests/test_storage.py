@@ -0,0 +1,97 @@
+"""
+Tests of the SQLite storage backend, see storage.py.
+"""
+import random
+import pytest
+from ASRSManager import ASRSManager
+from item import Item
+import regression_harness
+
+
+def build_manager(path, cache_size=3):
+    config = regression_harness.DEFAULT_CONFIG
+    num_bins = config["num_bins"]
+    return ASRSManager(online_priority=list(range(1, num_bins + 1)),
+                       offline_priority=list(range(num_bins, 0, -1)),
+                       bin_dimensions=tuple(config["bin_dimensions"]),
+                       weight_limit=config["weight_limit"],
+                       load_limit=config["load_limit"],
+                       bins_for_pallets=list(range(num_bins + 1, num_bins + config["num_pallet_bins"] + 1)),
+                       num_pallets=config["num_pallets"],
+                       entrance_position=(0, 0, 0, num_bins + 1),
+                       storage_path=path,
+                       cache_size=cache_size)
+
+
+def inventory(manager):
+    """
+    :return: The content of every bin: {bin_id: (stack height, load, sorted list of item tuples)}.
+    """
+    state = {}
+    for bin_id in manager.bins:
+        bin = manager.bins[bin_id]
+        items = sorted((item.id, item.empty, item.weight, tuple(item.position), tuple(item.placed_dimensions))
+                       for item in bin.items.values())
+        state[bin_id] = (bin.get_current_height(), round(bin.get_current_load(), 9), items)
+    return state
+
+
+def run_operations(manager, seed, num_operations=200):
+    rng = random.Random(seed)
+    stored = []
+    for _ in range(num_operations):
+        if rng.random() < 0.7 or not stored:
+            item = Item(rng.uniform(20, 45), rng.uniform(10, 80), rng.uniform(20, 45), 1, rng.uniform(0.1, 15), None, False)
+            stored.append(manager.place_item_online(item)['pallet_id'])
+        else:
+            manager.remove_item(stored.pop(rng.randrange(len(stored))))
+    return stored
+
+
+def test_reopen_keeps_inventory(tmp_path):
+    path = tmp_path / 'inventory.db'
+    manager = build_manager(path)
+    stored = run_operations(manager, seed=0)
+    manager.reorganize_offline()
+    expected_items = manager.get_all_items()
+    expected = inventory(manager)
+    manager.close()
+
+    reopened = ASRSManager.open(path)
+    try:
+        assert reopened.get_all_items() == expected_items
+        assert inventory(reopened) == expected
+        assert regression_harness.check_invariants(reopened.bins, regression_harness.DEFAULT_CONFIG["num_pallets"]) == []
+
+        # the reopened system keeps working: removals find the stored items, and new items are placed on the pallets
+        reopened.remove_item(stored[0])
+        assert str(stored[0]) not in reopened.get_all_items()
+        plan = reopened.place_item_online(Item(30, 40, 30, 1, 5, None, False))
+        assert reopened.get_all_items()[str(plan['pallet_id'])]['placed_bin'] == plan['target_bin']
+    finally:
+        reopened.close()
+
+
+def test_changes_after_reopen_are_persisted(tmp_path):
+    path = tmp_path / 'inventory.db'
+    build_manager(path).close()
+
+    manager = ASRSManager.open(path, cache_size=2)
+    run_operations(manager, seed=1, num_operations=50)
+    expected = inventory(manager)
+    manager.close()
+
+    reopened = ASRSManager.open(path)
+    try:
+        assert inventory(reopened) == expected
+    finally:
+        reopened.close()
+
+
+def test_existing_and_missing_databases_are_rejected(tmp_path):
+    path = tmp_path / 'inventory.db'
+    build_manager(path).close()
+    with pytest.raises(ValueError):
+        build_manager(path)
+    with pytest.raises(ValueError):
+        ASRSManager.open(tmp_path / 'empty.db')
@@ -0,0 +1,112 @@
+"""
+Tests of the vectorized workload generator, see workload_generator.py.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+import workload_generator
+from workload_generator import COLUMNS, DEFAULT_CONFIG, generate_workload, make_catalogue, to_items, write_workload
+
+# a small catalogue keeps the tests fast
+CONFIG = {"num_skus": 50}
+
+
+def concatenate(chunks):
+    chunks = list(chunks)
+    return {column: np.concatenate([chunk[column] for chunk in chunks]) for column in COLUMNS}
+
+
+def test_same_seed_gives_the_same_items():
+    first = concatenate(generate_workload(5000, CONFIG, seed=3, chunk_size=1000))
+    second = concatenate(generate_workload(5000, CONFIG, seed=3, chunk_size=1000))
+    other = concatenate(generate_workload(5000, CONFIG, seed=4, chunk_size=1000))
+    for column in COLUMNS:
+        np.testing.assert_array_equal(first[column], second[column])
+    assert not np.array_equal(first['weight'], other['weight'])
+
+
+@pytest.mark.parametrize('config', [CONFIG, {"num_skus": None}], ids=['catalogue', 'no_catalogue'])
+def test_items_follow_the_configuration(config):
+    config = {**DEFAULT_CONFIG, **config, "rotate_ratio": 0.5}
+    chunks = list(generate_workload(2500, config, seed=0, chunk_size=1000))
+    assert [len(chunk['id']) for chunk in chunks] == [1000, 1000, 500]
+    items = concatenate(chunks)
+
+    for column in COLUMNS:
+        assert items[column].dtype == workload_generator.DTYPES[column]
+    np.testing.assert_array_equal(items['id'], np.arange(1, 2501))
+    assert np.all((config["min_width"] <= items['width']) & (items['width'] <= config["max_width"]))
+    assert np.all((config["min_depth"] <= items['depth']) & (items['depth'] <= config["max_depth"]))
+    assert np.all((config["min_height"] <= items['height']) & (items['height'] <= config["max_height"]))
+    assert np.all((config["min_weight"] <= items['weight']) & (items['weight'] <= config["max_weight"]))
+    assert set(np.unique(items['can_rotate'])) == {0, 1}
+    # the arrivals keep increasing across the chunks and every item is retrieved after it arrives
+    assert np.all(np.diff(items['arrival_time']) > 0)
+    assert np.all(items['retrieval_time'] > items['arrival_time'])
+    if config["num_skus"] is None:
+        assert np.all(items['sku'] == -1)
+    else:
+        assert np.all((0 <= items['sku']) & (items['sku'] < config["num_skus"]))
+
+
+def test_items_of_a_sku_share_its_dimensions():
+    config = {**DEFAULT_CONFIG, **CONFIG}
+    catalogue = make_catalogue(config, seed=1)
+    items = concatenate(generate_workload(20000, config, seed=1))
+    for column in ('width', 'height', 'depth', 'can_rotate'):
+        np.testing.assert_array_equal(items[column], catalogue[column][items['sku']])
+    assert catalogue['popularity'].sum() == pytest.approx(1.0)
+    # the popularity follows a Zipf law: the first SKU is drawn about 2 ** 1.1 times as often as the second
+    counts = np.bincount(items['sku'], minlength=config["num_skus"])
+    assert counts[0] / counts[1] == pytest.approx(2 ** config["zipf_exponent"], rel=0.15)
+    assert counts[0] == counts.max()
+
+
+def test_weight_grows_with_the_volume():
+    items = concatenate(generate_workload(20000, {"num_skus": None, "max_weight": 1e9}, seed=0))
+    volume = items['width'] * items['height'] * items['depth']
+    assert np.corrcoef(np.log(volume), np.log(items['weight']))[0, 1] > 0.5
+
+
+@pytest.mark.parametrize('file_format', ['csv', 'npz'])
+def test_written_files_hold_the_generated_items(tmp_path, file_format):
+    path = tmp_path / f"workload.{file_format}"
+    assert write_workload(path, 2500, CONFIG, seed=5, chunk_size=1000) == 2500
+    expected = concatenate(generate_workload(2500, CONFIG, seed=5, chunk_size=1000))
+
+    if file_format == 'csv':
+        written = pd.read_csv(path)
+        assert tuple(written.columns) == COLUMNS
+        for column in COLUMNS:
+            # the floats are written with 10 significant digits
+            np.testing.assert_allclose(written[column].to_numpy(), expected[column], rtol=1e-9)
+    else:
+        written = np.load(path)['items']
+        assert written.shape == (2500,)
+        for column in COLUMNS:
+            np.testing.assert_array_equal(written[column], expected[column])
+
+
+def test_parquet_holds_the_generated_items(tmp_path):
+    pq = pytest.importorskip('pyarrow.parquet')
+    path = tmp_path / "workload.parquet"
+    write_workload(path, 2500, CONFIG, seed=5, chunk_size=1000)
+    written = pq.read_table(path)
+    assert written.num_rows == 2500 and tuple(written.column_names) == COLUMNS
+    expected = concatenate(generate_workload(2500, CONFIG, seed=5, chunk_size=1000))
+    np.testing.assert_array_equal(written.column('weight').to_numpy(), expected['weight'])
+
+
+def test_unknown_file_format(tmp_path):
+    with pytest.raises(ValueError):
+        write_workload(tmp_path / "workload.txt", 10, CONFIG)
+
+
+def test_to_items():
+    chunk = next(generate_workload(100, CONFIG, seed=2))
+    items = to_items(chunk)
+    assert [item.id for item in items] == chunk['id'].tolist()
+    assert [(item.width, item.height, item.depth, item.weight) for item in items] == \
+           list(zip(chunk['width'].tolist(), chunk['height'].tolist(), chunk['depth'].tolist(), chunk['weight'].tolist()))
+    assert [item.arrival_time for item in items] == chunk['arrival_time'].tolist()
+    assert not any(item.empty for item in items)
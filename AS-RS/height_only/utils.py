@@ -57,4 +57,5 @@ def ItemDictToItem(item_dict):
     item.position = item_dict.get('position', None)
     item.placed_bin = item_dict.get('placed_bin', None)
     item.placed_dimensions = item_dict.get('placed_dimensions', (item.width, item.height, item.depth))
+    item.arrival_time = item_dict.get('arrival_time', None)
     return item
\ No newline at end of file
@@ -0,0 +1,208 @@
+"""
+Vectorized generator of large synthetic workloads.
+
+Unlike `random_item.generate_random_item`, which draws one item at a time, the items are drawn with NumPy in chunks,
+so millions of items take seconds. The workload models a SKU catalogue:
+
+- every SKU has fixed dimensions; the heights are log-normal, the widths and depths uniform
+- the popularity of the SKUs follows a Zipf law, so a few SKUs make up most of the items
+- the weight of an item is its volume times a density, with log-normal noise, so heavy items are the large ones
+- the items arrive as a Poisson process and are retrieved after a log-normal dwell time
+
+Without a catalogue (`num_skus=None`) every item gets its own dimensions from the same distributions.
+The items only depend on the seed and the chunk size. They can be written to CSV (with the columns of `items.csv`
+first, so `main.py` can read the file), Parquet (needs pyarrow) or NPZ, one chunk at a time.
+"""
+import numpy as np
+from item import Item
+
+COLUMNS = ('width', 'height', 'depth', 'weight', 'can_rotate', 'id', 'sku', 'arrival_time', 'retrieval_time')
+DTYPES = {
+    'width': np.float64,
+    'height': np.float64,
+    'depth': np.float64,
+    'weight': np.float64,
+    'can_rotate': np.int8,
+    'id': np.int64,
+    'sku': np.int64,
+    'arrival_time': np.float64,
+    'retrieval_time': np.float64,
+}
+
+DEFAULT_CONFIG = {
+    "num_skus": 5000,
+    "zipf_exponent": 1.1,
+    "min_width": 20, "max_width": 45,
+    "min_depth": 20, "max_depth": 45,
+    "min_height": 10, "max_height": 200,
+    "height_median": 40, "height_sigma": 0.5,
+    "density": 2e-4, "weight_sigma": 0.3,
+    "min_weight": 0.1, "max_weight": 50,
+    "rotate_ratio": 0.0,
+    "arrival_rate": 1.0,  # items per second
+    "dwell_median": 86400.0, "dwell_sigma": 1.0,  # seconds between arrival and retrieval
+}
+
+
+def _draw_dimensions(rng, size, config):
+    width = rng.uniform(config["min_width"], config["max_width"], size)
+    depth = rng.uniform(config["min_depth"], config["max_depth"], size)
+    height = np.clip(rng.lognormal(np.log(config["height_median"]), config["height_sigma"], size),
+                     config["min_height"], config["max_height"])
+    return width, height, depth
+
+
+def make_catalogue(config: dict, seed: int=None) -> dict:
+    """
+    Draw the SKU catalogue.
+
+    :return: A dictionary of arrays with one entry per SKU: 'width', 'height', 'depth', 'can_rotate' and 'popularity'
+             (the probability that an item is of the SKU).
+    """
+    rng = np.random.default_rng([seed if seed is not None else 0, 0])
+    num_skus = config["num_skus"]
+    width, height, depth = _draw_dimensions(rng, num_skus, config)
+    popularity = 1.0 / np.arange(1, num_skus + 1) ** config["zipf_exponent"]
+    return {
+        'width': width,
+        'height': height,
+        'depth': depth,
+        'can_rotate': (rng.random(num_skus) < config["rotate_ratio"]).astype(np.int8),
+        'popularity': popularity / popularity.sum(),
+    }
+
+
+def generate_workload(num_items: int, config: dict=None, seed: int=None, chunk_size: int=1000000):
+    """
+    Generate a workload chunk by chunk.
+
+    :param num_items: Number of items.
+    :param config: Distribution parameters, see `DEFAULT_CONFIG`. Missing keys use the defaults.
+    :param seed: Seed of the random numbers. The same seed and chunk size give the same items.
+    :param chunk_size: Maximum number of items per chunk.
+    :return: A generator of dictionaries {column: array} with the columns in `COLUMNS`. Item IDs start at 1.
+    """
+    config = {**DEFAULT_CONFIG, **(config or {})}
+    catalogue = make_catalogue(config, seed) if config["num_skus"] else None
+    cumulative_popularity = np.cumsum(catalogue['popularity']) if catalogue is not None else None
+    last_arrival = 0.0
+
+    for chunk_index, start in enumerate(range(0, num_items, chunk_size)):
+        size = min(chunk_size, num_items - start)
+        rng = np.random.default_rng([seed if seed is not None else 0, 1, chunk_index])
+
+        if catalogue is not None:
+            # inverse transform sampling is much faster than rng.choice with p for large catalogues
+            sku = np.minimum(np.searchsorted(cumulative_popularity, rng.random(size)), len(cumulative_popularity) - 1)
+            width, height, depth = catalogue['width'][sku], catalogue['height'][sku], catalogue['depth'][sku]
+            can_rotate = catalogue['can_rotate'][sku]
+        else:
+            sku = np.full(size, -1, dtype=np.int64)
+            width, height, depth = _draw_dimensions(rng, size, config)
+            can_rotate = (rng.random(size) < config["rotate_ratio"]).astype(np.int8)
+
+        weight = np.clip(width * height * depth * config["density"] * rng.lognormal(0.0, config["weight_sigma"], size),
+                         config["min_weight"], config["max_weight"])
+        arrival_time = last_arrival + np.cumsum(rng.exponential(1.0 / config["arrival_rate"], size))
+        last_arrival = arrival_time[-1]
+        retrieval_time = arrival_time + rng.lognormal(np.log(config["dwell_median"]), config["dwell_sigma"], size)
+
+        yield {
+            'width': width,
+            'height': height,
+            'depth': depth,
+            'weight': weight,
+            'can_rotate': can_rotate.astype(np.int8),
+            'id': np.arange(start + 1, start + size + 1, dtype=np.int64),
+            'sku': sku.astype(np.int64),
+            'arrival_time': arrival_time,
+            'retrieval_time': retrieval_time,
+        }
+
+
+def write_workload(path, num_items: int, config: dict=None, seed: int=None, chunk_size: int=1000000, file_format: str=None) -> int:
+    """
+    Generate a workload and write it one chunk at a time, so the whole workload is never held in memory.
+
+    :param path: Path of the output file.
+    :param file_format: 'csv', 'parquet' or 'npz'. By default it is taken from the file extension.
+                        An NPZ file holds one structured array 'items' with the columns as fields.
+    :return: The number of items written.
+    """
+    if file_format is None:
+        file_format = str(path).rsplit('.', 1)[-1].lower()
+    chunks = generate_workload(num_items, config, seed, chunk_size)
+    if file_format == 'csv':
+        _write_csv(path, chunks)
+    elif file_format == 'parquet':
+        _write_parquet(path, chunks)
+    elif file_format == 'npz':
+        _write_npz(path, chunks, num_items)
+    else:
+        raise ValueError(f"Unknown file format '{file_format}'. Use 'csv', 'parquet' or 'npz'.")
+    return num_items
+
+
+def _write_csv(path, chunks):
+    import pandas as pd
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        for chunk_index, chunk in enumerate(chunks):
+            # 10 significant digits keep the floats exact enough and write faster than the full repr
+            pd.DataFrame(chunk, columns=COLUMNS).to_csv(f, header=chunk_index == 0, index=False, float_format='%.10g')
+
+
+def _write_parquet(path, chunks):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.table({column: chunk[column] for column in COLUMNS})
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)  # one row group per chunk
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def _write_npz(path, chunks, num_items):
+    import zipfile
+    dtype = np.dtype([(column, DTYPES[column]) for column in COLUMNS])
+    with zipfile.ZipFile(path, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        with archive.open('items.npy', 'w', force_zip64=True) as f:
+            # the shape is known in advance, so the .npy header is written first and the rows are appended
+            np.lib.format.write_array_header_2_0(f, {'descr': np.lib.format.dtype_to_descr(dtype),
+                                                     'fortran_order': False,
+                                                     'shape': (num_items,)})
+            for chunk in chunks:
+                rows = np.empty(len(chunk['id']), dtype=dtype)
+                for column in COLUMNS:
+                    rows[column] = chunk[column]
+                f.write(rows.tobytes())
+
+
+def to_items(chunk: dict) -> list[Item]:
+    """
+    Convert a chunk of `generate_workload` into Item objects with their arrival times.
+    """
+    items = []
+    for width, height, depth, weight, can_rotate, item_id, arrival_time in zip(
+            chunk['width'].tolist(), chunk['height'].tolist(), chunk['depth'].tolist(), chunk['weight'].tolist(),
+            chunk['can_rotate'].tolist(), chunk['id'].tolist(), chunk['arrival_time'].tolist()):
+        item = Item(width, height, depth, can_rotate, weight, item_id, False)
+        item.arrival_time = arrival_time
+        items.append(item)
+    return items
+
+
+if __name__ == '__main__':
+    import time
+    config = {
+        "num_items": 1000000,
+        "path": "workload.csv",
+        "seed": 0,
+    }
+    start = time.perf_counter()
+    write_workload(config["path"], config["num_items"], seed=config["seed"])
+    print(f"successfully generate {config['num_items']} items to '{config['path']}' in {time.perf_counter() - start:.1f} s.")
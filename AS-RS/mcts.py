@@ -1,8 +1,11 @@
 import numpy as np
 from heapq import heappush, heappop, heapify
+from bisect import bisect_left
 import random
 import math
-import copy
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
 class Item:
     def __init__(self, width, height, depth, weight, rotation, fragile, id=None):
@@ -16,21 +19,105 @@ class Item:
         self.id = id
         self.placed_dimensions = None  # Store final dimensions after rotation
 
+class ExtremePointIndex:
+    """
+    極端點的索引。點以 (y, z, x) 為鍵存在一個排序好的 list 中：
+    - 迭代時依 (y, z, x) 的順序（最低、最後方、最左方優先）回傳 (x, y, z)，不必每次排序
+    - 「在長方體內的點」只會落在 y 的一段連續範圍，以二分搜尋找出這段範圍後只檢查其中的點
+    - 複製只是複製一個 list，快照很便宜
+    - digest 是所有鍵的 hash 的 XOR，隨 add / remove_inside 增量更新，與點加入的順序無關（見 _state_key）
+    """
+    __slots__ = ('keys', 'digest')
+
+    def __init__(self, points=()):
+        self.keys = sorted({(y, z, x) for x, y, z in points})
+        self.digest = 0
+        for key in self.keys:
+            self.digest ^= hash(key)
+
+    def copy(self):
+        index = ExtremePointIndex.__new__(ExtremePointIndex)
+        index.keys = self.keys.copy()
+        index.digest = self.digest
+        return index
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __iter__(self):
+        for y, z, x in self.keys:
+            yield x, y, z
+
+    def add(self, x, y, z):
+        """加入一個點，已存在時不重複加入"""
+        key = (y, z, x)
+        i = bisect_left(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            self.keys.insert(i, key)
+            self.digest ^= hash(key)
+
+    def remove_inside(self, x0, y0, z0, x1, y1, z1):
+        """移除 [x0, x1) × [y0, y1) × [z0, z1) 內的所有點"""
+        lo = bisect_left(self.keys, (y0,))
+        hi = bisect_left(self.keys, (y1,), lo)
+        if lo < hi:
+            kept = []
+            for key in self.keys[lo:hi]:
+                if z0 <= key[1] < z1 and x0 <= key[2] < x1:
+                    self.digest ^= hash(key)
+                else:
+                    kept.append(key)
+            self.keys[lo:hi] = kept
+
+
+_empty_summed_volumes = {}
+
+def _summed_volume_dtype(width, height, depth):
+    """前綴和的最大值是格子總數，2^31 格以上的貨櫃 int32 會溢位，改用 int64"""
+    return np.int32 if width * height * depth < 2 ** 31 else np.int64
+
+def _empty_summed_volume(width, height, depth):
+    """空貨櫃的前綴和（全為 0），同尺寸的貨櫃共用同一個唯讀陣列"""
+    table = _empty_summed_volumes.get((width, height, depth))
+    if table is None:
+        table = np.zeros((width + 1, height + 1, depth + 1), dtype=_summed_volume_dtype(width, height, depth))
+        table.flags.writeable = False
+        _empty_summed_volumes[(width, height, depth)] = table
+    return table
+
 class Container:
+    """
+    貨櫃。space 是每個格子是否被佔據的 bool 陣列。
+
+    為了讓 can_place 不必掃描整個候選長方體，另外維護一個 3D 前綴和 (summed-volume table)：
+    summed_volume[i, j, k] 是「某個時間點」的 space[:i, :j, :k] 中被佔據的格數，之後放入的長方體記在
+    pending_boxes。檢查一個長方體時，以前綴和的 8 個角在 O(1) 算出其中已佔據的格數，再和 pending_boxes
+    中的少數長方體比較是否重疊。pending_boxes 超過 rebuild_threshold 個時才從 space 重建前綴和（O(體積)），
+    rebuild_threshold 為 None 時不重建。
+
+    前綴和陣列建立後不再修改，所以快照直接共用它，只複製 pending_boxes 與極端點，不複製 space，
+    快照的大小與貨櫃解析度無關。新的貨櫃與從快照恢復的貨櫃在第一次讀取 space 時才由前綴和與 pending_boxes
+    算出 space；can_place 與 MCTS 的搜尋都不讀取 space，搜尋中的貨櫃也不重建前綴和，所以搜尋中沒有 O(體積) 的操作。
+    """
+    rebuild_threshold = 16
+
     def __init__(self, width, height, depth, buffer):
         self.width = width
         self.height = height
         self.depth = depth
         self.items = []
         self.buffer = buffer  # Buffer spaces between items
-        self.space = np.zeros((width, height, depth), dtype=bool)  # Track occupied space
-        self.extreme_points = [(0, 0, 0)]  # Start with bottom-left-back corner
+        self._space = None  # Track occupied space，第一次讀取 space 時才配置（見 space）
+        self.summed_volume = _empty_summed_volume(width, height, depth)
+        self.pending_boxes = []  # (x0, y0, z0, x1, y1, z1) placed after summed_volume was built
+        self.extreme_points = ExtremePointIndex([(0, 0, 0)])  # Start with bottom-left-back corner
 
     def get_state_snapshot(self):
         """為了 MCTS，建立一個輕量級的狀態快照"""
         snapshot = {
             'items': [item.id for item in self.items],
-            'space': self.space.copy(),
+            'summed_volume': self.summed_volume,  # 不會被修改，可以共用
+            'pending_boxes': self.pending_boxes.copy(),
             'extreme_points': self.extreme_points.copy()
         }
         return snapshot
@@ -38,21 +125,110 @@ class Container:
     def load_state_snapshot(self, snapshot):
         """從快照恢復狀態，注意：這不會恢復 item 物件本身"""
         # 為了簡化，我們只恢復 MCTS 決策所需的核心狀態
-        self.space = snapshot['space'].copy()
-        self.extreme_points = snapshot['extreme_points'].copy()
+        if 'summed_volume' in snapshot:
+            self._space = None  # 需要時才由前綴和算出
+            self.summed_volume = snapshot['summed_volume']
+            self.pending_boxes = snapshot['pending_boxes'].copy()
+        else:
+            # 舊格式的快照只有 space
+            self._space = snapshot['space'].copy()
+            self.rebuild_summed_volume()
+        self.extreme_points = _load_extreme_points(snapshot['extreme_points'])
         # 實際 items 列表的恢復較複雜，在 MCTS 中我們主要關心空間
 
+    @property
+    def space(self):
+        """每個格子是否被佔據的 bool 陣列"""
+        if self._space is None:
+            # 前綴和的 3D 差分是前綴和建立時的 space，再加上之後放入的長方體
+            table = self.summed_volume
+            space = (table[1:, 1:, 1:] - table[:-1, 1:, 1:] - table[1:, :-1, 1:] - table[1:, 1:, :-1]
+                     + table[:-1, :-1, 1:] + table[:-1, 1:, :-1] + table[1:, :-1, :-1] - table[:-1, :-1, :-1]) > 0
+            for x0, y0, z0, x1, y1, z1 in self.pending_boxes:
+                space[x0:x1, y0:y1, z0:z1] = True
+            self._space = space
+        return self._space
+
+    @space.setter
+    def space(self, space):
+        self._space = space
+
+    def rebuild_summed_volume(self):
+        """從 space 重建前綴和，並清空 pending_boxes"""
+        dtype = _summed_volume_dtype(self.width, self.height, self.depth)
+        table = np.zeros((self.width + 1, self.height + 1, self.depth + 1), dtype=dtype)
+        np.cumsum(self.space, axis=0, dtype=dtype, out=table[1:, 1:, 1:])
+        np.cumsum(table[1:, 1:, 1:], axis=1, out=table[1:, 1:, 1:])
+        np.cumsum(table[1:, 1:, 1:], axis=2, out=table[1:, 1:, 1:])
+        table.flags.writeable = False  # 快照會共用這個陣列
+        self.summed_volume = table
+        self.pending_boxes = []
+
+    def occupied_volume(self, x, y, z, width, height, depth):
+        """
+        前綴和建立時，長方體 [x, x+width) × [y, y+height) × [z, z+depth) 內被佔據的格數，O(1)。
+        參數也可以是 NumPy 陣列。不包含 pending_boxes。
+        """
+        table = self.summed_volume
+        x1, y1, z1 = x + width, y + height, z + depth
+        return (table[x1, y1, z1] - table[x, y1, z1] - table[x1, y, z1] - table[x1, y1, z]
+                + table[x, y, z1] + table[x, y1, z] + table[x1, y, z] - table[x, y, z])
+
     def can_place(self, x, y, z, width, height, depth):
         # Check container boundaries with given dimensions
         if (x + width + self.buffer > self.width or
             y + height> self.height or
             z + depth + self.buffer > self.depth):
             return False
-        return not np.any(self.space[x:x+width, y:y+height, z:z+depth])
+        if self.occupied_volume(x, y, z, width, height, depth):
+            return False
+        x1, y1, z1 = x + width, y + height, z + depth
+        for bx0, by0, bz0, bx1, by1, bz1 in self.pending_boxes:
+            if x < bx1 and bx0 < x1 and y < by1 and by0 < y1 and z < bz1 and bz0 < z1:
+                return False
+        return True
+
+    def can_place_batch(self, points, orientations):
+        """
+        一次檢查所有放置點 × 所有方向是否可行，結果與逐一呼叫 can_place 相同。
+
+        :param points: (x, y, z) 放置點的列表
+        :param orientations: (width, height, depth) 方向的列表
+        :return: 形狀為 (len(points), len(orientations)) 的 bool 陣列
+        """
+        if len(points) == 0 or len(orientations) == 0:
+            return np.zeros((len(points), len(orientations)), dtype=bool)
+        points = np.asarray(points, dtype=np.int64).reshape(-1, 1, 3)
+        orientations = np.asarray(orientations, dtype=np.int64).reshape(1, -1, 3)
+        x, y, z = points[..., 0], points[..., 1], points[..., 2]
+        width, height, depth = orientations[..., 0], orientations[..., 1], orientations[..., 2]
+        inside = ((x + width + self.buffer <= self.width) &
+                  (y + height <= self.height) &
+                  (z + depth + self.buffer <= self.depth))
+        # 超出邊界的組合改為檢查空的長方體，避免索引越界
+        x, y, z = np.where(inside, x, 0), np.where(inside, y, 0), np.where(inside, z, 0)
+        width, height, depth = np.where(inside, width, 0), np.where(inside, height, 0), np.where(inside, depth, 0)
+        feasible = inside & (self.occupied_volume(x, y, z, width, height, depth) == 0)
+        if self.pending_boxes:
+            boxes = np.asarray(self.pending_boxes, dtype=np.int64)
+            x, y, z = x[..., None], y[..., None], z[..., None]
+            x1, y1, z1 = x + width[..., None], y + height[..., None], z + depth[..., None]
+            overlaps = ((x < boxes[:, 3]) & (boxes[:, 0] < x1) &
+                        (y < boxes[:, 4]) & (boxes[:, 1] < y1) &
+                        (z < boxes[:, 5]) & (boxes[:, 2] < z1))
+            feasible &= ~overlaps.any(axis=-1)
+        return feasible
 
     def place_item(self, item, x, y, z, width, height, depth):
-        # Mark space as occupied
-        self.space[x:x+width+self.buffer, y:y+height, z:z+depth+self.buffer] = True
+        # Mark space as occupied（還沒有讀取過 space 時只記在 pending_boxes）
+        if self._space is not None:
+            self._space[x:x+width+self.buffer, y:y+height, z:z+depth+self.buffer] = True
+        self.pending_boxes.append((x, y, z,
+                                   min(x + width + self.buffer, self.width),
+                                   min(y + height, self.height),
+                                   min(z + depth + self.buffer, self.depth)))
+        if self.rebuild_threshold is not None and len(self.pending_boxes) > self.rebuild_threshold:
+            self.rebuild_summed_volume()
         item.position = (x, y, z)
         item.placed_dimensions = (width, height, depth)  # Store final dimensions
         self.items.append(item)
@@ -62,45 +238,28 @@ class Container:
 
     def update_extreme_points(self, item, x, y, z, width, height, depth):
         """
-        更新極端點列表。
-        1. 移除被新放置物品佔據或遮蔽的所有現有極端點。
-        2. 加入由新物品產生的三個新極端點。
-        3. 去除重複點並重新整理成一個堆。
+        更新極端點索引。
+        1. 移除被新放置物品佔據（包含緩衝區）的所有現有極端點。
+        2. 加入由新物品產生的三個新極端點（索引會去除重複的點）。
+
+        任何放在極端點上的長方體都包含該點所在的格子，所以格子已被佔據、或連 1×1×1 都放不下的點
+        以後也不會再用到，直接捨棄，不影響放置結果，並讓 find_best_placement_for_item 少檢查這些點。
         """
-        # 步驟 1: 找出並移除所有被新物品遮蔽的點
-        # 我們定義新物品佔據的體積（不包含緩衝區，因為極端點本身不應落在緩衝區內）
-        item_x_end = x + width
-        item_y_end = y + height
-        item_z_end = z + depth
-
-        survivors = []
-        for point in self.extreme_points:
-            px, py, pz = point
-            # 如果一個點位於新物品的體積之內，它就被遮蔽了
-            if (px >= x and px < item_x_end and
-                py >= y and py < item_y_end and
-                pz >= z and pz < item_z_end):
-                continue  # 這個點被遮蔽了，捨棄
-            survivors.append(point)
-        
-        # 步驟 2: 加入由新物品產生的新極端點
+        # 步驟 1: 移除所有落在新物品佔據空間內的點
+        self.extreme_points.remove_inside(x, y, z, x + width + self.buffer, y + height, z + depth + self.buffer)
+
+        # 步驟 2: 加入由新物品產生的新極端點，右側與前側的點在緩衝區之外
         new_points = [
-            (x + width, y, z),          # 右側面產生的點
-            (x, y, z + depth),          # 前側面產生的點
+            (x + width + self.buffer, y, z),          # 右側面產生的點
+            (x, y, z + depth + self.buffer),          # 前側面產生的點
         ]
         if not item.fragile:
             new_points.append((x, y + height, z))  # 頂面產生的點
 
-        # 步驟 3: 將倖存的點和新產生的點合併
-        # 我們只加入在貨櫃範圍內的點
+        # 我們只加入還放得下東西的點
         for p in new_points:
-            if p[0] < self.width and p[1] < self.height and p[2] < self.depth:
-                survivors.append(p)
-
-        # 步驟 4: 去除重複的點並重新堆化 (heapify)
-        # 使用 set 來快速去除重複項
-        self.extreme_points = list(set(survivors))
-        heapify(self.extreme_points)
+            if self.can_place(p[0], p[1], p[2], 1, 1, 1):
+                self.extreme_points.add(*p)
 
 # def bottom_left_3d_bin_packing(container, items):
 #     """
@@ -140,16 +299,185 @@ class Container:
 #             print(f"Cannot place item with original dimensions ({item.width}, {item.height}, {item.depth})")
 #             # raise ValueError("No feasible placement found for item.")
 
+class EMSContainer(Container):
+    """
+    以空的極大空間 (empty maximal spaces, EMS) 表示剩餘空間的貨櫃，介面與 Container 相同。
+
+    不存體素格，而是存所有「無法再往任何方向擴大」的空長方體 (x0, y0, z0, x1, y1, z1)。一個長方體可以放入
+    若且唯若它被某個 EMS 包含，所以結果與 Container 完全相同。放入物品時，與它重疊的 EMS 會被切成最多
+    6 個剩餘的長方體，再移除被其他 EMS 包含者。快照只有 EMS 陣列與極端點，大小與貨櫃解析度無關，
+    通常只有數 KB，適合需要大量節點的搜尋樹。
+    """
+    def __init__(self, width, height, depth, buffer):
+        self.width = width
+        self.height = height
+        self.depth = depth
+        self.items = []
+        self.buffer = buffer  # Buffer spaces between items
+        self.spaces = np.array([[0, 0, 0, width, height, depth]], dtype=np.int64)  # EMS，每列 (x0, y0, z0, x1, y1, z1)
+        self.extreme_points = ExtremePointIndex([(0, 0, 0)])  # Start with bottom-left-back corner
+
+    def get_state_snapshot(self):
+        """為了 MCTS，建立一個輕量級的狀態快照"""
+        return {
+            'items': [item.id for item in self.items],
+            'spaces': self.spaces,  # 不會被修改，可以共用
+            'extreme_points': self.extreme_points.copy()
+        }
+
+    def load_state_snapshot(self, snapshot):
+        """從快照恢復狀態，注意：這不會恢復 item 物件本身"""
+        self.spaces = snapshot['spaces']
+        self.extreme_points = _load_extreme_points(snapshot['extreme_points'])
+
+    def can_place(self, x, y, z, width, height, depth):
+        # Check container boundaries with given dimensions
+        if (x + width + self.buffer > self.width or
+            y + height> self.height or
+            z + depth + self.buffer > self.depth):
+            return False
+        spaces = self.spaces
+        return bool(np.any((spaces[:, 0] <= x) & (spaces[:, 1] <= y) & (spaces[:, 2] <= z) &
+                           (x + width <= spaces[:, 3]) & (y + height <= spaces[:, 4]) & (z + depth <= spaces[:, 5])))
+
+    def can_place_batch(self, points, orientations):
+        """
+        一次檢查所有放置點 × 所有方向是否可行，結果與逐一呼叫 can_place 相同。
+
+        :param points: (x, y, z) 放置點的列表
+        :param orientations: (width, height, depth) 方向的列表
+        :return: 形狀為 (len(points), len(orientations)) 的 bool 陣列
+        """
+        if len(points) == 0 or len(orientations) == 0:
+            return np.zeros((len(points), len(orientations)), dtype=bool)
+        points = np.asarray(points, dtype=np.int64)
+        orientations = np.asarray(orientations, dtype=np.int64)
+        # 每個 (放置點, 方向) 組合一列，對所有 EMS 做 6 次比較
+        low = np.repeat(points, len(orientations), axis=0)[:, :, None]
+        high = low + np.tile(orientations, (len(points), 1))[:, :, None]
+        spaces = self.spaces.T[:, None, :]
+        contained = ((spaces[0] <= low[:, 0]) & (spaces[1] <= low[:, 1]) & (spaces[2] <= low[:, 2]) &
+                     (high[:, 0] <= spaces[3]) & (high[:, 1] <= spaces[4]) & (high[:, 2] <= spaces[5])).any(axis=1)
+        inside = ((high[:, 0, 0] + self.buffer <= self.width) &
+                  (high[:, 1, 0] <= self.height) &
+                  (high[:, 2, 0] + self.buffer <= self.depth))
+        return (inside & contained).reshape(len(points), len(orientations))
+
+    def place_item(self, item, x, y, z, width, height, depth):
+        # 物品加上緩衝區後佔據的長方體
+        box = np.array([x, y, z,
+                        min(x + width + self.buffer, self.width),
+                        min(y + height, self.height),
+                        min(z + depth + self.buffer, self.depth)], dtype=np.int64)
+        self.spaces = _subtract_box(self.spaces, box)
+        item.position = (x, y, z)
+        item.placed_dimensions = (width, height, depth)  # Store final dimensions
+        self.items.append(item)
+        # Update extreme points
+
+        self.update_extreme_points(item, x, y, z, width, height, depth)
+
+def _subtract_box(spaces, box):
+    """從 EMS 列表中扣除一個長方體，回傳新的 EMS 陣列（不修改原陣列）"""
+    overlaps = np.all((spaces[:, :3] < box[3:]) & (box[:3] < spaces[:, 3:]), axis=1)
+    if not overlaps.any():
+        return spaces
+    kept = spaces[~overlaps]
+    split = spaces[overlaps]
+    pieces = []
+    # 每個軸上，長方體的前方與後方各留下一塊
+    for axis in range(3):
+        before = split[split[:, axis] < box[axis]].copy()
+        before[:, axis + 3] = box[axis]
+        after = split[box[axis + 3] < split[:, axis + 3]].copy()
+        after[:, axis] = box[axis + 3]
+        pieces += [before, after]
+    pieces = np.concatenate(pieces)
+    if len(pieces) == 0:
+        return kept
+    # 移除被其他 EMS 包含的新長方體（未重疊的 EMS 不可能被新長方體包含）
+    candidates = np.concatenate([kept, pieces]).T[:, None, :]
+    columns = pieces.T[:, :, None]
+    contains = ((candidates[0] <= columns[0]) & (candidates[1] <= columns[1]) & (candidates[2] <= columns[2]) &
+                (columns[3] <= candidates[3]) & (columns[4] <= candidates[4]) & (columns[5] <= candidates[5]))
+    # 互相包含代表完全相同，只保留索引最小的一個（包括自己）
+    identical = ((candidates[0] == columns[0]) & (candidates[1] == columns[1]) & (candidates[2] == columns[2]) &
+                 (candidates[3] == columns[3]) & (candidates[4] == columns[4]) & (candidates[5] == columns[5]))
+    own_index = np.arange(len(pieces)) + len(kept)
+    later = np.arange(candidates.shape[2])[None, :] >= own_index[:, None]
+    dominated = (contains & ~(identical & later)).any(axis=1)
+    return np.concatenate([kept, pieces[~dominated]])
+
+
+class NodeStatistics:
+    """節點的訪問次數與總分數，同一個貨櫃狀態的節點透過 TranspositionTable 共用同一個物件"""
+    __slots__ = ('visits', 'total_value')
+
+    def __init__(self):
+        self.visits = 0
+        self.total_value = 0.0
+
+
+class TranspositionTable:
+    """
+    以貨櫃狀態的標準鍵（已放置的物品與位置、極端點）對應 NodeStatistics 的表。
+
+    先放 A 再放 B 與先放 B 再放 A 常常得到同一個貨櫃狀態，這些路徑上的節點共用統計資料。
+    表的大小有上限，超過時移除最久沒有用到的項目 (LRU)；被移除的統計資料仍由樹上的節點持有，只是不再共用。
+
+    :param max_size: 最多保存的狀態數
+    """
+    def __init__(self, max_size=100000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, key):
+        """
+        :return: (key 對應的 NodeStatistics, 是否已存在於表中)，不存在時建立一個新的
+        """
+        stats = self.entries.get(key)
+        if stats is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return stats, True
+        self.misses += 1
+        stats = self.entries[key] = NodeStatistics()
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+        return stats, False
+
+
 class MonteCarloNode:
-    def __init__(self, parent, container_state, unplaced_items, action_item=None):
+    def __init__(self, parent, container_state, unplaced_items, action_item=None, stats=None, key=None):
         self.parent = parent
         self.container_state = container_state # 儲存貨櫃狀態快照
         self.unplaced_items = unplaced_items # 尚未放置的物品 set
         self.action_item = action_item # 導致這個節點的動作 (放置了哪個 item)
+        self.key = key # 貨櫃狀態的標準鍵，只在使用 TranspositionTable 時設定
 
         self.children = []
-        self.visits = 0
-        self.total_value = 0.0 # 來自模擬的總分數
+        self.stats = stats if stats is not None else NodeStatistics()
+
+    @property
+    def visits(self):
+        return self.stats.visits
+
+    @visits.setter
+    def visits(self, value):
+        self.stats.visits = value
+
+    @property
+    def total_value(self):
+        return self.stats.total_value # 來自模擬的總分數
+
+    @total_value.setter
+    def total_value(self, value):
+        self.stats.total_value = value
 
     def is_fully_expanded(self):
         """檢查是否所有可能的動作（放置物品）都已經有對應的子節點"""
@@ -157,15 +485,17 @@ class MonteCarloNode:
 
     def select_best_child(self, exploration_weight=1.41):
         """使用 UCB1 公式選擇最佳子節點"""
-        best_score = -1
+        best_score = -math.inf
         best_child = None
+        log_visits = math.log(self.visits) if self.visits > 0 else 0.0 # 每個子節點共用，迴圈外只算一次
         for child in self.children:
-            if child.visits == 0:
+            stats = child.stats # 直接讀共用的統計，省去 property 呼叫
+            if stats.visits == 0:
                 # 優先選擇未訪問過的節點
                 return child
             
-            exploit_score = child.total_value / child.visits
-            explore_score = math.sqrt(math.log(self.visits) / child.visits)
+            exploit_score = stats.total_value / stats.visits
+            explore_score = math.sqrt(log_visits / stats.visits)
             ucb_score = exploit_score + exploration_weight * explore_score
             
             if ucb_score > best_score:
@@ -173,76 +503,198 @@ class MonteCarloNode:
                 best_child = child
         return best_child
 
-def find_best_placement_for_item(container, item):
-    """一個輔助函式，為單一物品找到最佳放置點"""
-    # 這裡使用你之前的邏輯：找到第一個可行的極端點
-    temp_container = copy.deepcopy(container) # 在副本上操作
-    
-    # 產生方向
+def default_placement_score(container, placement):
+    """預設的放置評分（越大越好）：頂面越低越好，其次越靠近後方、左方"""
+    return (-(placement['y'] + placement['h']),
+            -(placement['z'] + placement['d']),
+            -(placement['x'] + placement['w']))
+
+def _load_extreme_points(points):
+    """複製快照中的極端點；舊格式的快照是 (x, y, z) 的 list"""
+    return points.copy() if isinstance(points, ExtremePointIndex) else ExtremePointIndex(points)
+
+def _orientations(item):
+    """物品可用的 (width, height, depth) 方向"""
     orientations = [(item.width, item.height, item.depth)]
     if item.rotation == 1:
         w, h, d = item.width, item.height, item.depth
         orientations = list(set([(w,h,d), (d,h,w), (w,d,h), (h,w,d), (h,d,w), (d,w,h)]))
+    return orientations
 
-    # 遍歷所有極端點和方向
-    # 為了穩定性，我們不 heappop，而是遍歷排序後的副本
-    sorted_points = sorted(temp_container.extreme_points)
-    for y, z, x in sorted_points:
-        for w, h, d in orientations:
-            if temp_container.can_place(x, y, z, w, h, d):
+def find_best_placement_for_item(container, item, best=False, score=None, chunk_size=64):
+    """
+    一個輔助函式，為單一物品找到最佳放置點。
+    只讀取貨櫃狀態（space 與 extreme_points），不修改也不複製貨櫃。
+
+    :param best: False 時回傳第一個可行的放置點；True 時檢查所有極端點與方向，回傳評分最高者
+    :param score: 評分函式 score(container, placement)，越大越好，預設為 default_placement_score
+    :param chunk_size: best=False 時第一次一起檢查的極端點數，之後每次加倍。極端點已依 (y, z, x) 排序，
+                       找到可行的點就停止，所以通常只需檢查前面的少數點；放不下時也只需 O(log n) 次批次檢查
+    :return: {'x', 'y', 'z', 'w', 'h', 'd'}，放不下時回傳 None
+    """
+    # 產生方向
+    orientations = _orientations(item)
+
+    # 遍歷所有極端點和方向，極端點依 (y, z, x) 的順序
+    if not best:
+        # 分段算出 (極端點, 方向) 組合是否可行，回傳第一個可行的組合
+        keys = container.extreme_points.keys
+        start = 0
+        while start < len(keys):
+            chunk = [(x, y, z) for y, z, x in keys[start:start + chunk_size]]
+            start += chunk_size
+            chunk_size *= 2
+            feasible = container.can_place_batch(chunk, orientations)
+            point_indexes, orientation_indexes = np.nonzero(feasible)
+            if len(point_indexes):
+                x, y, z = chunk[point_indexes[0]]
+                w, h, d = orientations[orientation_indexes[0]]
                 return {'x': x, 'y': y, 'z': z, 'w': w, 'h': h, 'd': d}
-    return None # 放不下了
+        return None
 
-def run_mcts(initial_container, items_to_place, n_simulations, exploration_weight=1.41):
-    """執行 MCTS 來決定下一步要放哪個物品"""
-    
-    root = MonteCarloNode(None, initial_container.get_state_snapshot(), set(items_to_place))
-    
-    for _ in range(n_simulations):
+    # 一次算出所有組合是否可行，再挑選評分最高者
+    points = list(container.extreme_points)
+    feasible = container.can_place_batch(points, orientations)
+    if score is None:
+        score = default_placement_score
+    best_placement, best_score = None, None
+    for point_index, orientation_index in zip(*np.nonzero(feasible)):
+        x, y, z = points[point_index]
+        w, h, d = orientations[orientation_index]
+        placement = {'x': x, 'y': y, 'z': z, 'w': w, 'h': h, 'd': d}
+        placement_score = score(container, placement)
+        if best_placement is None or placement_score > best_score:
+            best_placement, best_score = placement, placement_score
+    return best_placement # 放不下時為 None
+
+def _placement_hash(item, box):
+    """放入一個物品對 _state_key 的貢獻"""
+    return hash(('item', item)) ^ hash(('box', box))
+
+
+def _state_key(container, placed_items):
+    """
+    貨櫃狀態的標準鍵，與放置順序無關：貨櫃中的物品集合、它們佔用的 (x, y, z, w, h, d) 集合與極端點集合
+    各元素 hash 的 XOR（Zobrist hashing），是一個固定大小的 int。哪個物品在哪個位置不影響之後的放置，所以不列入。
+    搜尋中的子節點不必呼叫這個函式，而是以 _child_state_key 從父節點的鍵增量算出。
+    不同狀態的鍵碰撞的機率可以忽略，碰撞時兩個狀態共用統計資料，只影響搜尋品質
+
+    :param placed_items: 已放置的物品，position 與 placed_dimensions 必須已設定
+    """
+    key = container.extreme_points.digest
+    for item in placed_items:
+        key ^= _placement_hash(item, (*item.position, *item.placed_dimensions))
+    return key
+
+
+def _child_state_key(parent_key, parent_points, child_points, item, box):
+    """父節點狀態放入 item（佔用 box）後的 _state_key：換掉極端點的部分，加上新物品的部分"""
+    return parent_key ^ parent_points.digest ^ child_points.digest ^ _placement_hash(item, box)
+
+
+def _search_container(initial_container, snapshot):
+    """
+    從快照恢復一個與 initial_container 同類型、同尺寸的貨櫃，供搜尋使用。
+    它不重建前綴和：每個節點只多幾個 pending_boxes，而重建是 O(體積)
+    """
+    container = type(initial_container)(initial_container.width, initial_container.height, initial_container.depth, initial_container.buffer)
+    container.load_state_snapshot(snapshot)
+    container.rebuild_threshold = None
+    return container
+
+
+def _search_tree(initial_container, items_to_place, n_simulations, exploration_weight, best_placement, rng,
+                 transpositions=None, root=None, time_limit=None):
+    """
+    建立一棵搜尋樹（或延續 root）並執行 n_simulations 次模擬
+
+    :param n_simulations: 模擬次數，None 表示只受 time_limit 限制
+    :param rng: 隨機數產生器（random.Random 或 random 模組）。物品一律依 items_to_place 的順序排列後才抽樣，
+                所以同一個種子得到同一棵樹（set 的迭代順序取決於物件位址，不可重現）
+    :param transpositions: TranspositionTable 或 None。展開到表中已有且被訪問過的狀態時，
+                           直接以該狀態的平均分數代替一次 rollout
+    :param root: 要繼續搜尋的樹（見 reuse_subtree），它的狀態必須是 initial_container 的狀態，
+                 未放置的物品必須都在 items_to_place 中。None 時建立新的樹
+    :param time_limit: 秒數上限。在根節點的每個物品都嘗試過之前不會停止，以免沒有任何決策
+    :return: (根節點, {'simulations': 這次執行的模擬次數, 'depth': 這次到達的最大深度})
+    """
+    order = {item: index for index, item in enumerate(items_to_place)}
+    total_possible_volume = sum(i.width * i.height * i.depth for i in items_to_place)
+    if root is None:
+        key = None
+        if transpositions is not None:
+            # 鍵包含搜尋前就在貨櫃中的物品，所以跨決策共用同一個表時，不同決策的鍵仍然一致
+            key = _state_key(initial_container, initial_container.items)
+        root = MonteCarloNode(None, initial_container.get_state_snapshot(), set(items_to_place), key=key)
+    elif root.key is None:
+        transpositions = None # 樹是在沒有 TranspositionTable 時建立的，節點沒有鍵
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    min_simulations = len(root.unplaced_items)
+
+    simulations = 0
+    max_depth = 0
+    while n_simulations is None or simulations < n_simulations:
+        if deadline is not None and simulations >= min_simulations and time.perf_counter() >= deadline:
+            break
         node = root
-        
+        known_value = None
+        depth = 0
+
         # 1. Selection
         while node.is_fully_expanded() and node.children:
             node = node.select_best_child(exploration_weight)
-            
+            depth += 1
+
         # 2. Expansion
         if not node.is_fully_expanded():
             unexpanded_items = node.unplaced_items - {c.action_item for c in node.children}
-            item_to_place = random.choice(list(unexpanded_items))
-            
+            item_to_place = rng.choice(sorted(unexpanded_items, key=order.__getitem__))
+
             # 建立一個臨時的貨櫃來模擬放置
-            temp_container = Container(initial_container.width, initial_container.height, initial_container.depth, initial_container.buffer)
-            temp_container.load_state_snapshot(node.container_state)
-            
-            placement = find_best_placement_for_item(temp_container, item_to_place)
-            
+            temp_container = _search_container(initial_container, node.container_state)
+
+            placement = find_best_placement_for_item(temp_container, item_to_place, best_placement)
+
             if placement:
                 temp_container.place_item(item_to_place, placement['x'], placement['y'], placement['z'],
                                           placement['w'], placement['h'], placement['d'])
-                
+
                 new_unplaced = node.unplaced_items - {item_to_place}
-                child_node = MonteCarloNode(node, temp_container.get_state_snapshot(), new_unplaced, action_item=item_to_place)
+                stats, key, known = None, None, False
+                if transpositions is not None:
+                    box = (placement['x'], placement['y'], placement['z'], placement['w'], placement['h'], placement['d'])
+                    key = _child_state_key(node.key, node.container_state['extreme_points'],
+                                           temp_container.extreme_points, item_to_place, box)
+                    stats, known = transpositions.lookup(key)
+                child_node = MonteCarloNode(node, temp_container.get_state_snapshot(), new_unplaced, action_item=item_to_place,
+                                            stats=stats, key=key)
                 node.children.append(child_node)
                 node = child_node # 模擬從新節點開始
-        
+                depth += 1
+                if known and node.visits > 0:
+                    # 其他路徑已經模擬過這個狀態
+                    known_value = node.total_value / node.visits
+        max_depth = max(max_depth, depth)
+
         # 3. Simulation (Rollout)
-        sim_container = Container(initial_container.width, initial_container.height, initial_container.depth, initial_container.buffer)
-        sim_container.load_state_snapshot(node.container_state)
-        
-        items_for_simulation = list(node.unplaced_items)
-        random.shuffle(items_for_simulation) # 隨機順序是蒙地卡羅的精髓
-        
-        placed_volume = 0
-        for item in items_for_simulation:
-            placement = find_best_placement_for_item(sim_container, item)
-            if placement:
-                sim_container.place_item(item, placement['x'], placement['y'], placement['z'],
-                                         placement['w'], placement['h'], placement['d'])
-                placed_volume += placement['w'] * placement['h'] * placement['d']
-        
-        # 評分：成功放置的體積 / 總體積
-        total_possible_volume = sum(i.width * i.height * i.depth for i in items_to_place)
-        score = placed_volume / total_possible_volume if total_possible_volume > 0 else 0
+        if known_value is not None:
+            score = known_value
+        else:
+            sim_container = _search_container(initial_container, node.container_state)
+
+            items_for_simulation = sorted(node.unplaced_items, key=order.__getitem__)
+            rng.shuffle(items_for_simulation) # 隨機順序是蒙地卡羅的精髓
+
+            placed_volume = 0
+            for item in items_for_simulation:
+                placement = find_best_placement_for_item(sim_container, item, best_placement)
+                if placement:
+                    sim_container.place_item(item, placement['x'], placement['y'], placement['z'],
+                                             placement['w'], placement['h'], placement['d'])
+                    placed_volume += placement['w'] * placement['h'] * placement['d']
+
+            # 評分：成功放置的體積 / 總體積
+            score = placed_volume / total_possible_volume if total_possible_volume > 0 else 0
 
         # 4. Backpropagation
         while node is not None:
@@ -250,21 +702,202 @@ def run_mcts(initial_container, items_to_place, n_simulations, exploration_weigh
             node.total_value += score
             node = node.parent
 
-    # 決策：選擇訪問次數最多的子節點的動作
-    if not root.children:
-        return None # 如果根節點無法擴展，代表一個都放不了
-    
-    best_child = max(root.children, key=lambda c: c.visits)
-    return best_child.action_item
+        simulations += 1
+
+    return root, {'simulations': simulations, 'depth': max_depth}
+
+
+def reuse_subtree(root, item, items_to_place):
+    """
+    把 root 之下放置 item 的子節點變成新的根節點，保留它的子樹與統計資料（如 DRL MCTS 的 MCTree.succeed）。
+    items_to_place 中新出現的物品加入子樹每個節點的未放置物品，之後會在這些節點上展開。
+    沿用的統計資料來自沒有新物品的模擬，只是近似值。
+
+    :param items_to_place: 下一次決策的物品（lookahead 緩衝區）
+    :return: 新的根節點；沒有這個子節點或子樹中有不在 items_to_place 的物品時回傳 None
+    """
+    child = next((c for c in root.children if c.action_item is item), None)
+    if child is None or not child.unplaced_items <= set(items_to_place):
+        return None
+    new_items = set(items_to_place) - child.unplaced_items
+    child.parent = None
+    if new_items:
+        stack = [child]
+        while stack:
+            node = stack.pop()
+            node.unplaced_items = node.unplaced_items | new_items
+            stack.extend(node.children)
+    return child
+
+
+def _rebase_snapshots(root, container):
+    """
+    讓沿用的子樹的快照改用 container（狀態與 root 相同的實際貨櫃）的前綴和。
+    搜尋中的貨櫃不重建前綴和，每個節點的 pending_boxes 是 root 的 pending_boxes 加上從 root 到它放入的長方體；
+    實際貨櫃重建前綴和之後若不換掉，子樹的 pending_boxes 會隨著每次決策越來越長
+    """
+    state = root.container_state
+    if 'summed_volume' not in state or state['summed_volume'] is container.summed_volume:
+        return  # EMSContainer，或實際貨櫃沒有重建前綴和
+    offset = len(state['pending_boxes'])
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        node.container_state['summed_volume'] = container.summed_volume
+        node.container_state['pending_boxes'] = container.pending_boxes + node.container_state['pending_boxes'][offset:]
+        stack.extend(node.children)
+
+
+def _run_mcts_tree(task):
+    """
+    建立或延續一棵搜尋樹
+
+    :return: (根節點, 統計資料)
+    """
+    (initial_container, items_to_place, n_simulations, exploration_weight, best_placement, seed,
+     transposition_size, transpositions, root, time_limit) = task
+    rng = random.Random(seed) if seed is not None else random
+    if transpositions is None and transposition_size:
+        transpositions = TranspositionTable(transposition_size)
+    hits = transpositions.hits if transpositions is not None else 0 # 共用的表在之前的決策中已有命中次數
+    reused_visits = root.visits if root is not None else 0
+    start = time.perf_counter()
+    root, info = _search_tree(initial_container, items_to_place, n_simulations, exploration_weight, best_placement, rng,
+                              transpositions, root, time_limit)
+    seconds = time.perf_counter() - start
+    return root, {'simulations': info['simulations'],
+                  'reused_visits': reused_visits,
+                  'depth': info['depth'],
+                  'seconds': seconds,
+                  'simulations_per_second': info['simulations'] / seconds if seconds > 0 else float('inf'),
+                  'transposition_hits': transpositions.hits - hits if transpositions is not None else 0,
+                  'transposition_size': len(transpositions) if transpositions is not None else 0}
 
 
-def pack_items_with_mcts(container, all_items, lookahead_k, n_simulations):
+def _run_mcts_worker(task):
+    """
+    在一個 worker process 中建立一棵獨立的搜尋樹，只把結果傳回，不傳回整棵樹
+
+    :return: (各根子節點的訪問次數 {物品在 items_to_place 中的索引: visits}, 統計資料)
+    """
+    root, stats = _run_mcts_tree(task)
+    order = {item: index for index, item in enumerate(task[1])}
+    return {order[child.action_item]: child.visits for child in root.children}, stats
+
+
+def run_mcts(initial_container, items_to_place, n_simulations, exploration_weight=1.41, best_placement=False,
+             n_workers=1, seed=None, transposition_size=None, executor=None,
+             time_limit=None, tree=None, transpositions=None, return_stats=False):
+    """
+    執行 MCTS 來決定下一步要放哪個物品
+
+    n_workers > 1 時使用 root parallelization：每個 worker process 以自己的種子建立一棵獨立的樹，
+    執行 n_simulations / n_workers 次模擬，最後加總各 worker 根子節點的訪問次數，選擇總訪問次數最多的物品。
+    這是唯一的平行模式：rollout 是純 Python，同一棵樹在多個 thread 中搜尋會被 GIL 串行化。
+
+    :param n_simulations: 模擬次數（所有 worker 的總和），None 表示只受 time_limit 限制
+    :param best_placement: 傳給 find_best_placement_for_item 的 best，True 時每個物品放在評分最高的位置
+    :param n_workers: worker process 的數量，1 時在目前的 process 中執行
+    :param seed: 隨機種子（int 或 str）。給定種子與 n_workers 時結果可重現；None 時使用 random 模組的全域狀態
+    :param transposition_size: 每棵樹的 TranspositionTable 最多保存的狀態數，None 或 0 時不使用。
+                               這個表只在這次決策中使用
+    :param executor: 可重複使用的 concurrent.futures.ProcessPoolExecutor，None 時每次呼叫建立一個
+    :param time_limit: 每個 worker 搜尋的秒數上限，見 _search_tree
+    :param tree: 要繼續搜尋的樹（見 reuse_subtree），只能在 n_workers == 1 時使用
+    :param transpositions: 跨決策共用的 TranspositionTable（見 pack_items_with_mcts），給定時取代 transposition_size。
+                           只能在 n_workers == 1 時使用：worker process 拿到的是表的複本，更新不會傳回
+    :param return_stats: True 時回傳 (item, stats)。stats 包含：
+                         'simulations' 這次執行的總模擬次數、'reused_visits' 沿用的樹已有的訪問次數、
+                         'depth' 到達的最大深度、'seconds' 耗時、'visits' 各物品的訪問次數 {item.id: visits}、
+                         'transposition_hits'、各 worker 的 'workers'（含 simulations_per_second），
+                         以及 n_workers == 1 時搜尋後的整棵樹 'tree'
+    """
+    items_to_place = list(items_to_place)
+    if n_simulations is not None:
+        n_workers = min(n_workers, n_simulations)
+    n_workers = max(1, n_workers)
+    if tree is not None and n_workers > 1:
+        raise ValueError("A search tree can only be continued with n_workers=1.")
+    if transpositions is not None and n_workers > 1:
+        raise ValueError("A transposition table can only be shared with n_workers=1.")
+    tasks = []
+    for worker in range(n_workers):
+        worker_simulations = None if n_simulations is None else n_simulations // n_workers + (1 if worker < n_simulations % n_workers else 0)
+        worker_seed = None if seed is None else f"{seed}:{worker}"
+        tasks.append((initial_container, items_to_place, worker_simulations, exploration_weight, best_placement,
+                      worker_seed, transposition_size, transpositions, tree, time_limit))
+
+    start = time.perf_counter()
+    root = None
+    if n_workers == 1:
+        root, worker_stats = _run_mcts_tree(tasks[0])
+        order = {item: index for index, item in enumerate(items_to_place)}
+        results = [({order[child.action_item]: child.visits for child in root.children}, worker_stats)]
+    elif executor is not None:
+        results = list(executor.map(_run_mcts_worker, tasks))
+    else:
+        with ProcessPoolExecutor(n_workers) as pool:
+            results = list(pool.map(_run_mcts_worker, tasks))
+    seconds = time.perf_counter() - start
+
+    # 合併各棵樹根子節點的訪問次數
+    visits = {}
+    for worker_visits, _ in results:
+        for index, count in worker_visits.items():
+            visits[index] = visits.get(index, 0) + count
+
+    # 決策：選擇訪問次數最多的子節點的動作（平手時選 items_to_place 中較前面的）
+    # 如果根節點無法擴展，代表一個都放不了
+    best_item = items_to_place[max(sorted(visits), key=visits.get)] if visits else None
+    if not return_stats:
+        return best_item
+    worker_stats = [worker_stats for _, worker_stats in results]
+    return best_item, {'simulations': sum(stats['simulations'] for stats in worker_stats),
+                       'reused_visits': sum(stats['reused_visits'] for stats in worker_stats),
+                       'depth': max(stats['depth'] for stats in worker_stats),
+                       'seconds': seconds,
+                       'visits': {items_to_place[index].id: count for index, count in sorted(visits.items())},
+                       'transposition_hits': sum(stats['transposition_hits'] for stats in worker_stats),
+                       'workers': worker_stats,
+                       'tree': root}
+
+
+def pack_items_with_mcts(container, all_items, lookahead_k, n_simulations, best_placement=False,
+                         n_workers=1, seed=None, transposition_size=None,
+                         time_limit=None, reuse_tree=True):
     """
     使用 MCTS 進行裝箱的主控函式。
     - lookahead_k: 可預見的貨物數量 (1-3)
-    - n_simulations: 每次決策要執行的模擬次數
+    - n_simulations: 每次決策要執行的模擬次數，None 表示只受 time_limit 限制
+    - best_placement: True 時每個物品放在評分最高的位置，而不是第一個可行的位置
+    - n_workers: 每次決策平行建立的搜尋樹數量 (root parallelization)，整個裝箱過程共用同一組 worker process
+    - seed: 隨機種子，第 i 次決策使用 f"{seed}:{i}"，給定時結果可重現
+    - transposition_size: TranspositionTable 最多保存的狀態數，None 表示不使用。n_workers == 1 時整個裝箱過程
+      共用同一個表，沿用的子樹與之後展開的節點共用統計資料（與 reuse_subtree 一樣，來自舊緩衝區的統計資料只是近似值）；
+      平行時每個 worker 在每次決策各建立一個
+    - time_limit: 每次決策的秒數上限（例如 0.05），模擬次數依可用時間調整
+    - reuse_tree: True 時把選中物品的子樹留作下一次決策的根節點（見 reuse_subtree），只在 n_workers == 1 時有效
+
+    回傳每次決策的統計資料 list：'item'（放置的物品 id，無法放置時為 None）、'simulations'、
+    'reused_visits'（沿用的子樹已有的訪問次數）、'depth'（搜尋到達的最大深度）、'transposition_hits' 與 'seconds'
     """
+    if n_workers > 1:
+        with ProcessPoolExecutor(n_workers) as executor:
+            return _pack_items_with_mcts(container, all_items, lookahead_k, n_simulations, best_placement,
+                                         n_workers, seed, transposition_size,
+                                         time_limit, False, executor)
+    return _pack_items_with_mcts(container, all_items, lookahead_k, n_simulations, best_placement,
+                                 n_workers, seed, transposition_size,
+                                 time_limit, reuse_tree, None)
+
+
+def _pack_items_with_mcts(container, all_items, lookahead_k, n_simulations, best_placement,
+                          n_workers, seed, transposition_size, time_limit, reuse_tree,
+                          executor):
     item_queue = list(all_items)
+    decisions = []
+    tree = None
+    transpositions = TranspositionTable(transposition_size) if transposition_size and n_workers == 1 else None
     
     while item_queue:
         # 決定 lookahead 緩衝區
@@ -274,7 +907,18 @@ def pack_items_with_mcts(container, all_items, lookahead_k, n_simulations):
         # print(f"\n--- Deciding for buffer: {[item.id for item in lookahead_buffer]} ---")
         
         # 使用 MCTS 決定下一步要放哪個物品
-        best_item_to_place = run_mcts(container, lookahead_buffer, n_simulations)
+        best_item_to_place, stats = run_mcts(container, lookahead_buffer, n_simulations, best_placement=best_placement,
+                                             n_workers=n_workers, seed=None if seed is None else f"{seed}:{len(decisions)}",
+                                             transposition_size=transposition_size, executor=executor,
+                                             time_limit=time_limit, tree=tree, transpositions=transpositions,
+                                             return_stats=True)
+        decisions.append({'item': best_item_to_place.id if best_item_to_place is not None else None,
+                          'simulations': stats['simulations'],
+                          'reused_visits': stats['reused_visits'],
+                          'depth': stats['depth'],
+                          'transposition_hits': stats['transposition_hits'],
+                          'seconds': stats['seconds']})
+        tree = None
         
         if best_item_to_place is None:
             # print(f"MCTS decided no item in the buffer can be placed. Stopping.")
@@ -288,7 +932,7 @@ def pack_items_with_mcts(container, all_items, lookahead_k, n_simulations):
         # print(f"MCTS Choice: Place item {best_item_to_place.id}")
         
         # 執行最佳動作
-        placement = find_best_placement_for_item(container, best_item_to_place)
+        placement = find_best_placement_for_item(container, best_item_to_place, best_placement)
         if placement:
             container.place_item(best_item_to_place, placement['x'], placement['y'], placement['z'],
                                  placement['w'], placement['h'], placement['d'])
@@ -299,12 +943,20 @@ def pack_items_with_mcts(container, all_items, lookahead_k, n_simulations):
             item_queue.remove(item_to_remove)
             
             print(f"Placed {best_item_to_place.id} at {best_item_to_place.position} with dims {best_item_to_place.placed_dimensions}")
+
+            if reuse_tree and stats['tree'] is not None:
+                # 放置的方式與搜尋時相同，所以選中的子節點就是目前貨櫃的狀態
+                tree = reuse_subtree(stats['tree'], best_item_to_place, item_queue[:lookahead_k])
+                if tree is not None:
+                    _rebase_snapshots(tree, container)
         else:
             # 理論上 MCTS 找到的解應該是可行的，但以防萬一
             print(f"Error: MCTS chose {best_item_to_place.id}, but placement failed in final step. Skipping.")
             item_to_remove = next(i for i in item_queue if i.id == best_item_to_place.id)
             item_queue.remove(item_to_remove)
 
+    return decisions
+
 if __name__ == "__main__":
     # 定義貨櫃和貨物
     container = Container(width=10, height=10, depth=10, buffer=1)
@@ -333,9 +985,22 @@ if __name__ == "__main__":
     # 500-1000 是一個不錯的起點
     N_SIMULATIONS = 500
 
+    # 平行建立的搜尋樹數量 (worker process)，1 表示不平行
+    N_WORKERS = 1
+
+    # 共用相同貨櫃狀態統計資料的表大小，None 表示不使用
+    TRANSPOSITION_SIZE = 100000
+
+    # 每次決策的秒數上限，None 表示只依 N_SIMULATIONS
+    TIME_LIMIT = None
+
     # 執行裝箱
     if LOOKAHEAD_K:
-        pack_items_with_mcts(container, items, lookahead_k=LOOKAHEAD_K, n_simulations=N_SIMULATIONS)
+        decisions = pack_items_with_mcts(container, items, lookahead_k=LOOKAHEAD_K, n_simulations=N_SIMULATIONS,
+                                         n_workers=N_WORKERS, seed=0, transposition_size=TRANSPOSITION_SIZE,
+                                         time_limit=TIME_LIMIT)
+        print(f"\n{sum(d['simulations'] for d in decisions)} simulations, "
+              f"{sum(d['reused_visits'] for d in decisions)} visits reused in {len(decisions)} decisions")
     
     # 輸出結果
     print("\n--- Final Placement Result ---")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# mcts.py is imported as a top-level module, as when it is run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
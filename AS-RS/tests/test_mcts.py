@@ -0,0 +1,246 @@
+"""
+Tests of the MCTS packing, see mcts.py.
+"""
+import random
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pytest
+from mcts import (Container, EMSContainer, Item, TranspositionTable, _orientations, _rebase_snapshots, _state_key,
+                  _summed_volume_dtype, find_best_placement_for_item, pack_items_with_mcts, reuse_subtree, run_mcts)
+
+DIMENSIONS = [(2, 2, 2), (3, 3, 3), (4, 4, 4), (5, 5, 5), (2, 3, 1), (1, 2, 3), (3, 2, 1), (2, 1, 3),
+              (1, 1, 1), (2, 2, 3), (3, 1, 2), (4, 2, 1), (5, 3, 2), (2, 4, 3)]
+
+
+def build_items(dimensions=DIMENSIONS):
+    return [Item(width=w, height=h, depth=d, weight=1, rotation=1, fragile=0, id=index + 1)
+            for index, (w, h, d) in enumerate(dimensions)]
+
+
+def random_items(seed, count, largest):
+    rng = random.Random(seed)
+    return [Item(width=rng.randint(1, largest), height=rng.randint(1, largest), depth=rng.randint(1, largest),
+                 weight=1, rotation=rng.randint(0, 1), fragile=int(rng.random() < 0.2), id=index)
+            for index in range(count)]
+
+
+def placements(container):
+    return [(item.id, item.position, item.placed_dimensions) for item in container.items]
+
+
+def pack(**kwargs):
+    container = Container(width=10, height=10, depth=10, buffer=1)
+    decisions = pack_items_with_mcts(container, build_items(), lookahead_k=3, n_simulations=40, **kwargs)
+    return placements(container), [decision['item'] for decision in decisions]
+
+
+def place_all(container, items):
+    for item in items:
+        placement = find_best_placement_for_item(container, item)
+        if placement:
+            container.place_item(item, placement['x'], placement['y'], placement['z'],
+                                 placement['w'], placement['h'], placement['d'])
+    return container
+
+
+def marked_space(container):
+    space = np.zeros((container.width, container.height, container.depth), dtype=bool)
+    for item in container.items:
+        (x, y, z), (w, h, d) = item.position, item.placed_dimensions
+        space[x:x + w + container.buffer, y:y + h, z:z + d + container.buffer] = True
+    return space
+
+
+def test_root_parallel_search_is_reproducible():
+    items = build_items()[:4]
+    with ProcessPoolExecutor(2) as executor:
+        runs = [run_mcts(Container(10, 10, 10, 1), items, 60, n_workers=2, seed=7, executor=executor,
+                         return_stats=True) for _ in range(2)]
+    (first_item, first), (second_item, second) = runs
+    assert first_item is second_item
+    assert first['visits'] == second['visits']
+    assert sum(first['visits'].values()) == first['simulations'] == 60
+    assert [worker['simulations'] for worker in first['workers']] == [30, 30]
+
+
+def test_parallel_packing_is_reproducible():
+    first = pack(n_workers=2, seed=0)
+    assert first == pack(n_workers=2, seed=0)
+    assert first[0]
+
+
+def test_transposed_placements_share_one_table_entry():
+    # two items of the same size: A then B and B then A fill the same boxes and leave the same extreme points
+    first, second = build_items([(3, 2, 3), (3, 2, 3)])
+    table = TranspositionTable(100)
+    best, stats = run_mcts(Container(10, 10, 10, 1), [first, second], 10, seed=0, transpositions=table,
+                           return_stats=True)
+    root = stats['tree']
+    grandchildren = {(child.action_item, grandchild.action_item): grandchild
+                     for child in root.children for grandchild in child.children}
+    after_first, after_second = grandchildren[first, second], grandchildren[second, first]
+    assert isinstance(after_first.key, int)
+    assert after_first.key == after_second.key
+    assert after_first.stats is after_second.stats is table.entries[after_first.key]
+    assert table.hits >= 1 and stats['transposition_hits'] == table.hits
+    # both children and the shared grandchild, the root is not looked up
+    assert len(table) == 3
+
+    # the key of the shared state does not depend on the order in which the items were placed
+    container = place_all(Container(10, 10, 10, 1), [second, first])
+    assert _state_key(container, container.items) == after_first.key
+
+    # a later search from the same root finds the states in the table
+    hits = table.hits
+    run_mcts(Container(10, 10, 10, 1), [first, second], 10, seed=1, transpositions=table)
+    assert table.hits > hits
+
+
+def test_summed_volume_dtype_follows_the_volume():
+    assert _summed_volume_dtype(1200, 1500, 1000) == np.int32
+    # 1291^3 cells do not fit in int32
+    assert _summed_volume_dtype(1291, 1291, 1291) == np.int64
+
+
+def test_snapshots_do_not_copy_the_space():
+    container = Container(10, 10, 10, 1)
+    container.rebuild_threshold = 4
+    place_all(container, build_items())
+    assert container.pending_boxes and len(container.pending_boxes) <= 4
+    assert np.array_equal(container.space, marked_space(container))
+
+    snapshot = container.get_state_snapshot()
+    assert 'space' not in snapshot and snapshot['summed_volume'] is container.summed_volume
+    restored = Container(10, 10, 10, 1)
+    restored.load_state_snapshot(snapshot)
+    # the space of a restored container is worked out from the summed volume and the pending boxes
+    assert np.array_equal(restored.space, container.space)
+
+
+def test_reused_subtree_is_rebased_on_the_rebuilt_table():
+    items = build_items()[:5]
+    container = place_all(Container(10, 10, 10, 1), build_items()[5:8])
+    best, stats = run_mcts(container, items, 60, seed=0, return_stats=True)
+    container.rebuild_threshold = 0  # the next placement rebuilds the table
+    place_all(container, [best])
+    assert container.pending_boxes == []
+    tree = reuse_subtree(stats['tree'], best, items)
+
+    def spaces(node):
+        restored = Container(10, 10, 10, 1)
+        restored.load_state_snapshot(node.container_state)
+        return [restored.space] + [space for child in node.children for space in spaces(child)]
+    before = spaces(tree)
+    assert np.array_equal(before[0], container.space)
+    _rebase_snapshots(tree, container)
+    assert tree.container_state['summed_volume'] is container.summed_volume
+    assert tree.container_state['pending_boxes'] == []
+    assert all(np.array_equal(old, new) for old, new in zip(before, spaces(tree)))
+
+
+def reference_placements(dimensions, buffer, items):
+    """First fit with a plain set of extreme points and np.any over the voxels, the rules of update_extreme_points"""
+    width, height, depth = dimensions
+    space = np.zeros(dimensions, dtype=bool)
+    points = {(0, 0, 0)}
+
+    def fits(x, y, z, w, h, d):
+        return (x + w + buffer <= width and y + h <= height and z + d + buffer <= depth
+                and not space[x:x + w, y:y + h, z:z + d].any())
+
+    result = []
+    for item in items:
+        placement = next(((x, y, z, *orientation) for x, y, z in sorted(points, key=lambda p: (p[1], p[2], p[0]))
+                          for orientation in _orientations(item) if fits(x, y, z, *orientation)), None)
+        if placement is None:
+            continue
+        x, y, z, w, h, d = placement
+        result.append((item.id, (x, y, z), (w, h, d)))
+        space[x:x + w + buffer, y:y + h, z:z + d + buffer] = True
+        points = {(px, py, pz) for px, py, pz in points
+                  if not (x <= px < x + w + buffer and y <= py < y + h and z <= pz < z + d + buffer)}
+        new_points = [(x + w + buffer, y, z), (x, y, z + d + buffer)] + ([] if item.fragile else [(x, y + h, z)])
+        points.update(point for point in new_points if fits(*point, 1, 1, 1))
+    return result
+
+
+@pytest.mark.parametrize('container_type', [Container, EMSContainer])
+@pytest.mark.parametrize('dimensions, buffer, largest', [((10, 10, 10), 0, 4), ((10, 10, 10), 1, 4),
+                                                         ((30, 20, 30), 1, 8)])
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_extreme_point_index_keeps_the_placements(container_type, dimensions, buffer, largest, seed):
+    items = random_items(seed, 80, largest)
+    expected = reference_placements(dimensions, buffer, items)
+    container = place_all(container_type(*dimensions, buffer), items)
+    assert placements(container) == expected
+    assert len(expected) > 5
+
+
+@pytest.mark.parametrize('buffer', [0, 1])
+def test_ems_container_accepts_the_same_boxes(buffer):
+    rng = random.Random(buffer)
+    voxels, ems = Container(12, 10, 8, buffer), EMSContainer(12, 10, 8, buffer)
+    for item in random_items(buffer, 30, 5):
+        placement = find_best_placement_for_item(voxels, item)
+        assert find_best_placement_for_item(ems, item) == placement
+        if placement:
+            for container in (voxels, ems):
+                container.place_item(item, placement['x'], placement['y'], placement['z'],
+                                     placement['w'], placement['h'], placement['d'])
+        for _ in range(50):
+            box = (rng.randrange(12), rng.randrange(10), rng.randrange(8),
+                   rng.randint(1, 6), rng.randint(1, 6), rng.randint(1, 6))
+            assert voxels.can_place(*box) == ems.can_place(*box)
+
+
+@pytest.mark.parametrize('container_type', [Container, EMSContainer])
+def test_can_place_batch_matches_can_place(container_type):
+    container = container_type(12, 10, 8, 1)
+    container.rebuild_threshold = 5  # both the table and the pending boxes are checked
+    points = [(x, y, z) for x in range(0, 13, 3) for y in range(0, 11, 2) for z in range(0, 9, 3)]
+    orientations = [(1, 1, 1), (2, 3, 1), (4, 1, 2), (5, 5, 5), (12, 1, 1)]
+    for item in random_items(3, 12, 4):
+        feasible = container.can_place_batch(points, orientations)
+        assert feasible.shape == (len(points), len(orientations))
+        assert feasible.tolist() == [[container.can_place(*point, *orientation) for orientation in orientations]
+                                     for point in points]
+        place_all(container, [item])
+    assert container.can_place_batch([], orientations).shape == (0, len(orientations))
+
+
+def test_transposition_table_is_a_bounded_lru():
+    table = TranspositionTable(max_size=2)
+    first, known = table.lookup('a')
+    assert not known
+    table.lookup('b')
+    assert table.lookup('a') == (first, True)  # 'a' becomes the most recently used entry
+    table.lookup('c')  # evicts 'b'
+    assert len(table) == 2 and list(table.entries) == ['a', 'c']
+    assert table.lookup('a')[0] is first
+    assert table.lookup('b')[1] is False
+    assert list(table.entries) == ['a', 'b']
+    assert (table.hits, table.misses) == (2, 4)
+
+
+def test_reused_subtree_keeps_the_visit_counts():
+    items = build_items()[:4]
+    best, stats = run_mcts(Container(10, 10, 10, 1), items, 80, seed=3, return_stats=True)
+    child = next(child for child in stats['tree'].children if child.action_item is best)
+    visits = {id(node): node.visits for node in [child] + child.children}
+    links = {id(node): [id(grandchild) for grandchild in node.children] for node in [child] + child.children}
+
+    new_item = build_items()[4]
+    tree = reuse_subtree(stats['tree'], best, [item for item in items if item is not best] + [new_item])
+    assert tree is child and tree.parent is None
+    assert {id(node): node.visits for node in [tree] + tree.children} == visits
+    assert {id(node): [id(grandchild) for grandchild in node.children] for node in [tree] + tree.children} == links
+    assert new_item in tree.unplaced_items and all(new_item in node.unplaced_items for node in tree.children)
+
+    # the next search continues from the reused visits
+    container = place_all(Container(10, 10, 10, 1), [best])
+    _, more = run_mcts(container, [item for item in items if item is not best] + [new_item], 20, seed=4,
+                       tree=tree, return_stats=True)
+    assert more['reused_visits'] == visits[id(child)]
+    assert more['tree'] is tree and tree.visits == visits[id(child)] + 20
+    # an item that is not in the next buffer drops the subtree
+    assert reuse_subtree(stats['tree'], best, [new_item]) is None